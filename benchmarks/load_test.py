@@ -0,0 +1,279 @@
+# python -m benchmarks.load_test --clients 10 25 50 100 --duration 10
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+import time
+
+from game.settings import *
+from game.server import Server
+from networking.network_layer import NetworkLayer
+from networking.input_packet import InputHistory
+from networking.snapshot_codec import HEADER, is_snapshot, peek_sequence, encode_snapshot_ack
+from networking.congestion_control import ReceivedSequences
+from networking.keepalive import Keepalive
+from shared_util.fixed_rate_loop import FixedRateLoop
+
+CONNECT_TIMEOUT = 30  # Seconds for every bot to get through the lobby
+IDLE_TIMEOUT = 2  # Seconds without a snapshot before a bot decides the match is over
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load the server with headless bot clients")
+    parser.add_argument('--clients', type=int, nargs='+', default=[10, 25, 50, 100],
+                        help="bot counts to measure, one fresh server each")
+    parser.add_argument('--duration', type=float, default=10, help="seconds measured per bot count")
+    parser.add_argument('--processes', type=int, default=1, help="processes the bots are spread over")
+    parser.add_argument('--port', type=int, default=4250)
+    parser.add_argument('--tick-rate', type=int, default=SERVER_TICK_RATE)
+    parser.add_argument('--send-rate', type=int, default=SERVER_SEND_RATE)
+    parser.add_argument('--snapshot-rate', type=int, default=SNAPSHOT_RATE, help="rate the bots ask for")
+    parser.add_argument('--seed', type=int, default=1)
+    return parser.parse_args()
+
+
+# Server side
+
+def run_server(args, results):
+    """Dedicated server on a fixed rate loop, measured from the first in game tick for args.duration"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        network_layer = NetworkLayer(bind_socket=True, port=args.port)
+        network_layer.start()
+        network_layer.stats.interval = 0
+        server = Server(network_layer, args.tick_rate, args.send_rate)
+        loop = FixedRateLoop(args.tick_rate, stats_interval=0)
+
+        started = time.time()
+        measure_start = None
+
+        def step(dt):
+            nonlocal measure_start
+            server.run(dt)
+            now = time.time()
+            if measure_start is None:
+                if server.state == "in_game":
+                    measure_start = now
+                    loop.stats.reset()
+                    for peer in network_layer.stats.peers.values():
+                        peer.reset()
+                elif now - started > CONNECT_TIMEOUT:
+                    loop.stop()
+            elif now - measure_start >= args.duration:
+                loop.stop()
+
+        loop.run(step)
+
+    if measure_start is None:
+        results.put(('server', None))
+        return
+
+    elapsed = time.time() - measure_start
+    peers = [peer.rates(elapsed) for peer in network_layer.stats.peers.values() if peer.snapshots]
+    stats = loop.stats
+    results.put(('server', {
+        'players': len(server.connected_players),
+        'tick_avg': stats.total_work / max(1, stats.ticks),
+        'tick_max': stats.max_work,
+        'overruns': stats.overruns,
+        'dropped_ticks': stats.dropped_ticks,
+        'snapshot_size': sum(peer['snapshot_size'] for peer in peers) / max(1, len(peers)),
+        'snapshot_rate': sum(peer['snapshots'] for peer in peers) / max(1, len(peers)),
+        'bytes_sent': sum(peer['bytes_sent'] for peer in peers),
+        'rtt': [peer['rtt'] for peer in peers if peer['rtt'] is not None],
+    }))
+    network_layer.socket.close()
+
+
+# Client side
+
+class BotClient:
+    """A client without a screen. Goes through the real lobby handshake, streams
+    random inputs and acks snapshots like Client does, but only reads their header."""
+
+    def __init__(self, name, server_address, snapshot_rate, rng):
+        self.name = name
+        self.server_address = server_address
+        self.snapshot_rate = snapshot_rate
+        self.rng = rng
+
+        self.network_layer = NetworkLayer()
+        self.network_layer.start()
+
+        self.confirmed = False
+        self.keepalive = Keepalive(KEEPALIVE_INTERVAL)
+        self.input_history = InputHistory()
+        self.received_sequences = ReceivedSequences()
+        self.last_sequence = 0
+        self.last_snapshot_time = None
+        self.send_times = {}  # input sequence -> time sent
+        self.latencies = []  # Input sent until a snapshot says it was applied
+        self.snapshots = 0
+
+        self.input_data = {}
+        self.next_input_change = 0
+
+    def connect(self):
+        message = {"type": "CONNECTION_ATTEMPT", "player_name": self.name, "ready": False,
+                   "snapshot_rate": self.snapshot_rate}
+        self.network_layer.send_reliable(json.dumps(message).encode(), self.server_address)
+
+    def ready_up(self):
+        message = {"type": "READY", "status": True}
+        self.network_layer.send_reliable(json.dumps(message).encode(), self.server_address)
+
+    def step(self, now):
+        if self.last_snapshot_time is not None:
+            self.send_input(now)
+        else:
+            # Reliable acks don't count as traffic, without this a slow lobby gets early bots timed out
+            self.keepalive.maybe_send(self.network_layer, self.server_address, now)
+
+        while True:
+            message = self.network_layer.listen_for_messages()
+            if message is None:
+                break
+            data = message[0]
+            if is_snapshot(data):
+                self.on_snapshot(data, now)
+            elif not self.confirmed and b'CONNECTION_CONFIRMATION' in data:
+                self.confirmed = True
+
+    def send_input(self, now):
+        # Hold a random set of keys for a while, like a player weaving around
+        if now >= self.next_input_change:
+            self.next_input_change = now + self.rng.uniform(0.2, 1.5)
+            self.input_data = {key: self.rng.random() < 0.4 for key in ('w', 'a', 's', 'd', 'mouse_left')}
+            self.input_data['mouse_world_pos'] = (self.rng.uniform(0, WORLD_WIDTH), self.rng.uniform(0, WORLD_HEIGHT))
+            self.input_data['space'] = self.rng.random() < 0.05
+
+        self.network_layer.send_to(self.input_history.encode(self.input_data), self.server_address)
+        self.send_times[self.input_history.sequence] = now
+
+    def on_snapshot(self, data, now):
+        sequence = peek_sequence(data)
+        self.received_sequences.add(sequence)
+        self.snapshots += 1
+        self.last_snapshot_time = now
+        if sequence <= self.last_sequence:
+            return
+        self.last_sequence = sequence
+
+        input_ack = HEADER.unpack_from(data, 0)[8]
+        sent_time = self.send_times.pop(input_ack, None)
+        if sent_time is not None:
+            self.latencies.append(now - sent_time)
+            for old in [old for old in self.send_times if old < input_ack]:
+                del self.send_times[old]
+
+        ack = encode_snapshot_ack(sequence, self.received_sequences.bits_before(sequence))
+        self.network_layer.send_to(ack, self.server_address)
+
+
+def run_bots(args, count, first_index, joined, processes, results):
+    rng = random.Random(args.seed * 1000 + first_index)
+    server_address = ('127.0.0.1', args.port)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        bots = [BotClient(f"bot{first_index + i}", server_address, args.snapshot_rate, rng) for i in range(count)]
+    for bot in bots:
+        bot.connect()
+
+    # Everyone joins before anyone readies up, the server starts once all players are ready.
+    # Bots keep stepping while they wait on the other processes, so they stay alive on the server.
+    deadline = time.time() + CONNECT_TIMEOUT
+    counted = False
+    while time.time() < deadline:
+        for bot in bots:
+            bot.step(time.time())
+        if not counted and all(bot.confirmed for bot in bots):
+            counted = True
+            with joined.get_lock():
+                joined.value += 1
+        if joined.value >= processes:
+            break
+        time.sleep(0.005)
+    for bot in bots:
+        bot.ready_up()
+
+    frame_time = 1 / 60
+    started = time.time()
+    while True:
+        frame_start = time.time()
+        for bot in bots:
+            bot.step(frame_start)
+
+        last_snapshot = max((bot.last_snapshot_time or 0) for bot in bots)
+        if last_snapshot and frame_start - last_snapshot > IDLE_TIMEOUT:
+            break
+        if not last_snapshot and frame_start - started > CONNECT_TIMEOUT:
+            break
+        time.sleep(max(0.0, frame_time - (time.time() - frame_start)))
+
+    results.put(('bots', {
+        'latencies': [latency for bot in bots for latency in bot.latencies],
+        'snapshots': sum(bot.snapshots for bot in bots),
+    }))
+    for bot in bots:
+        bot.network_layer.socket.close()
+
+
+# Driver
+
+def measure(args, clients):
+    results = multiprocessing.Queue()
+    processes = max(1, min(args.processes, clients))
+    joined = multiprocessing.Value('i', 0)  # Bot processes whose bots are all in the lobby
+
+    workers = [multiprocessing.Process(target=run_server, args=(args, results))]
+    per_process, extra = divmod(clients, processes)
+    first_index = 0
+    for i in range(processes):
+        count = per_process + (1 if i < extra else 0)
+        workers.append(multiprocessing.Process(target=run_bots, args=(args, count, first_index, joined, processes, results)))
+        first_index += count
+
+    workers[0].start()
+    time.sleep(0.5)  # Let the server bind first
+    for worker in workers[1:]:
+        worker.start()
+
+    server = None
+    latencies = []
+    for _ in workers:
+        kind, result = results.get(timeout=CONNECT_TIMEOUT * 2 + args.duration + IDLE_TIMEOUT * 2)
+        if kind == 'server':
+            server = result
+        else:
+            latencies.extend(result['latencies'])
+    for worker in workers:
+        worker.join()
+    return server, sorted(latencies)
+
+
+def main():
+    args = parse_args()
+    print(f"{args.tick_rate} ticks/s, bots ask for {args.snapshot_rate} snapshots/s, "
+          f"{args.duration:.0f} s per row, bots over {args.processes} process(es)")
+    print(f"{'players':>9} {'tick avg':>9} {'tick max':>9} {'overruns':>8} {'dropped':>7} "
+          f"{'snapshot':>9} {'snaps/s':>7} {'server out':>11} {'rtt':>8} {'input avg':>9} {'input p95':>9}")
+
+    for clients in args.clients:
+        server, latencies = measure(args, clients)
+        if server is None:
+            print(f"{clients:>9} bots never got into a match")
+            continue
+
+        rtt = sum(server['rtt']) / len(server['rtt']) if server['rtt'] else 0
+        input_avg = sum(latencies) / len(latencies) if latencies else 0
+        input_p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+        # Fewer players than bots means some never got in or were dropped on the way
+        players = f"{server['players']}/{clients}"
+        print(f"{players:>9} {server['tick_avg'] * 1000:>7.2f}ms {server['tick_max'] * 1000:>7.2f}ms "
+              f"{server['overruns']:>8} {server['dropped_ticks']:>7} {server['snapshot_size']:>7.0f} B "
+              f"{server['snapshot_rate']:>7.1f} {server['bytes_sent'] / 1024:>6.0f} KB/s "
+              f"{rtt * 1000:>6.1f}ms {input_avg * 1000:>7.1f}ms {input_p95 * 1000:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
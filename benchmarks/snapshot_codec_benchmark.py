@@ -0,0 +1,204 @@
+# python -m benchmarks.snapshot_codec_benchmark
+import gzip
+import json
+import random
+import sys
+import time
+
+
+from game.settings import *
+from entities.ships.ship import Ship
+from entities.projectiles.bullet import Bullet
+from entities.projectiles.rocket import Rocket
+from shared_util.asteroid_logic import generate_some_asteroids, handle_asteroids
+from networking.snapshot_codec import SnapshotEncoder, build_snapshot_tables, decode_snapshot
+from networking.snapshot_history import SnapshotHistory
+
+
+def get_nearby_asteroids(all_asteroids, all_ships, radius=CAMERA_VIEW_WIDTH):
+    """Asteroids within radius of any ship, how the old JSON snapshot picked them"""
+    nearby_asteroids = []
+    radius_sq = radius ** 2
+    for asteroid_list in all_asteroids.values():
+        for asteroid in asteroid_list:
+            if not asteroid.alive:
+                continue
+            for ship in all_ships:
+                dx = ship.x - asteroid.x
+                dy = ship.y - asteroid.y
+                if dx * dx + dy * dy <= radius_sq:
+                    nearby_asteroids.append(asteroid)
+                    break
+    return nearby_asteroids
+
+
+def build_game_state(number_of_ships, number_of_projectiles):
+    ships = []
+    for i in range(number_of_ships):
+        ship = Ship(random.uniform(0, WORLD_WIDTH), random.uniform(0, WORLD_HEIGHT), ('10.0.0.1', 5000 + i), None)
+        ship.owner_name = f"player{i}"
+        ship.dx = random.uniform(-10, 10)
+        ship.dy = random.uniform(-10, 10)
+        ship.facing_angle = random.uniform(0, 360)
+        ships.append(ship)
+
+    projectiles = []
+    for _ in range(number_of_projectiles):
+        owner = random.choice(ships)
+        # Rockets are rationed by MAX_ROCKETS and their cooldown, most of the air is bullets
+        projectile_class = Rocket if random.random() < 0.1 else Bullet
+        projectiles.append(projectile_class(owner.x + random.uniform(-500, 500), owner.y + random.uniform(-500, 500),
+                                            owner.dx, owner.dy, owner.facing_angle, owner.owner, (0.0, 1.0)))
+
+    asteroids = generate_some_asteroids(MAX_ASTEROIDS)
+    all_asteroids = [asteroid for asteroid_list in asteroids.values() for asteroid in asteroid_list]
+    for net_id, entity in enumerate(ships + projectiles + all_asteroids):
+        entity.net_id = net_id
+
+    explosions = [(ship.x, ship.y, ORANGE, 150) for ship in ships[:4]]
+    collision_events = [{'player_id': ships[0].owner, 'ship_id': ships[0].net_id, 'collision_type': 'asteroid'}]
+
+    return {
+        'projectiles': projectiles,
+        'ships': ships,
+        'asteroids': asteroids,
+        'explosions': explosions,
+        'timestamp': time.time(),
+        'tick': 1,
+        'collision_events': collision_events,
+    }
+
+
+def advance(game_state):
+    """One server tick worth of movement, without collisions"""
+    for ship in game_state['ships']:
+        ship.dx += random.uniform(-THRUST, THRUST)
+        ship.dy += random.uniform(-THRUST, THRUST)
+        ship.move()
+    for projectile in game_state['projectiles']:
+        projectile.run()
+    handle_asteroids(game_state['asteroids'])
+    game_state['tick'] += 1
+
+
+def round_coordinates(obj):
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key in ['x', 'y', 'dx', 'dy', 'a'] and isinstance(value, (int, float)):
+                obj[key] = int(round(value))
+            elif isinstance(value, (dict, list)):
+                round_coordinates(value)
+    elif isinstance(obj, list):
+        for item in obj:
+            round_coordinates(item)
+
+
+def encode_json(game_state):
+    """The JSON + gzip path Server.broadcast_game_state used before the binary codec"""
+    nearby_asteroids = {}
+    for asteroid in get_nearby_asteroids(game_state['asteroids'], game_state['ships']):
+        nearby_asteroids.setdefault(asteroid.sector, []).append(
+            {'x': asteroid.x, 'y': asteroid.y, 'radius': asteroid.radius})
+
+    state_to_send = {
+        't': 'gu',
+        's': [ship.to_dict() for ship in game_state['ships']],
+        'p': [
+            {
+                'x': proj.x,
+                'y': proj.y,
+                'sprite_name': proj.__class__.__name__.lower(),
+                **({'angle': proj.angle} if proj.__class__.__name__.lower() != 'bullet' else {})
+            }
+            for proj in game_state['projectiles'] if proj.alive
+        ],
+        'a': {f"{sector[0]},{sector[1]}": ast_list for sector, ast_list in nearby_asteroids.items()},
+        'e': game_state['explosions'],
+        'ts': game_state['timestamp'],
+        'c': [{'player_id': str(event['player_id']), 'collision_type': event['collision_type']}
+              for event in game_state['collision_events']],
+    }
+    round_coordinates(state_to_send)
+    return gzip.compress(json.dumps(state_to_send).encode())
+
+
+def decode_json(data):
+    return json.loads(gzip.decompress(data).decode('utf-8'))
+
+
+def build_tables(game_state):
+    return build_snapshot_tables(
+        game_state['ships'],
+        [proj for proj in game_state['projectiles'] if proj.alive],
+        get_nearby_asteroids(game_state['asteroids'], game_state['ships']),
+        game_state['tick'],
+    )
+
+
+def encode_binary(encoder, game_state, tables, baseline=None):
+    return encoder.encode(1, game_state['tick'], game_state['timestamp'], tables,
+                          game_state['explosions'], game_state['collision_events'], baseline)
+
+
+def average_delta_size(encoder, game_state, ticks):
+    """Steady state delta size when every snapshot is acknowledged"""
+    baseline = build_tables(game_state)
+    total = 0
+    for _ in range(ticks):
+        advance(game_state)
+        tables = build_tables(game_state)
+        total += len(encode_binary(encoder, game_state, tables, baseline))
+        baseline = tables
+    return total / ticks
+
+
+def time_per_call(function, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main(number_of_ships=10, number_of_projectiles=200, iterations=500):
+    random.seed(42)
+
+    game_state = build_game_state(number_of_ships, number_of_projectiles)
+    encoder = SnapshotEncoder()
+
+    tables = build_tables(game_state)
+    json_message = encode_json(game_state)
+    keyframe = encode_binary(encoder, game_state, tables)
+    history = SnapshotHistory()
+
+    results = [
+        ("json+gzip", len(json_message),
+         time_per_call(lambda: encode_json(game_state), iterations),
+         time_per_call(lambda: decode_json(json_message), iterations)),
+        ("keyframe", len(keyframe),
+         time_per_call(lambda: encode_binary(encoder, game_state, build_tables(game_state)), iterations),
+         time_per_call(lambda: decode_snapshot(keyframe, history), iterations)),
+    ]
+
+    average_size = average_delta_size(encoder, game_state, 60)
+
+    # Time a delta against the previous tick, the usual case with a responsive client
+    baseline = build_tables(game_state)
+    advance(game_state)
+    tables = build_tables(game_state)
+    delta = encoder.encode(2, game_state['tick'], game_state['timestamp'], tables,
+                           game_state['explosions'], game_state['collision_events'], baseline, 1)
+    history.add(1, baseline)
+    results.append(
+        ("delta", int(average_size),
+         time_per_call(lambda: encode_binary(encoder, game_state, build_tables(game_state), baseline), iterations),
+         time_per_call(lambda: decode_snapshot(delta, history), iterations)))
+
+    print(f"{number_of_ships} ships, {number_of_projectiles} projectiles, {iterations} iterations")
+    print(f"{'codec':<10} {'bytes':>8} {'encode us':>10} {'decode us':>10}")
+    for name, size, encode_us, decode_us in results:
+        print(f"{name:<10} {size:>8} {encode_us:>10.1f} {decode_us:>10.1f}")
+
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:4]))
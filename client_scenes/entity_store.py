@@ -0,0 +1,198 @@
+from entities.ships.ship import Ship
+from game.settings import *
+from networking.snapshot_codec import SHIP_TYPES, PROJECTILE_TYPES, VELOCITY_SCALE, ANGLE_SCALE, extrapolate
+
+
+class RemoteProjectile:
+    __slots__ = ('net_id', 'x', 'y', 'angle', 'sprite_name')
+
+    def __init__(self, net_id):
+        self.net_id = net_id
+        self.x = 0
+        self.y = 0
+        self.angle = 0
+        self.sprite_name = None
+
+
+class RemoteAsteroid:
+    __slots__ = ('net_id', 'x', 'y', 'radius', 'sector')
+
+    def __init__(self, net_id):
+        self.net_id = net_id
+        self.x = 0
+        self.y = 0
+        self.radius = 0
+        self.sector = None
+
+
+def lerp(a, b, alpha):
+    return a + (b - a) * alpha
+
+
+def lerp_angle(a, b, alpha):
+    return a + ((b - a + 180) % 360 - 180) * alpha
+
+
+class EntityStore:
+    """Client side copies of the server's entities, keyed by net id. Entities are
+    updated in place every frame from the interpolation buffer, objects are only
+    created when an entity spawns."""
+
+    def __init__(self, max_extrapolation=MAX_EXTRAPOLATION, tick_rate=SERVER_TICK_RATE):
+        self.ships = {}
+        self.projectiles = {}
+        self.asteroids = {}
+
+        # The shapes MainScene and the renderer want, kept up to date on spawn/removal
+        self.ship_list = []
+        self.projectile_list = []
+        self.asteroid_sectors = {}
+
+        # Server's latest copy of our own ship, never delayed
+        self.viewer_id = None
+        self.viewer = None
+
+        self.max_extrapolation_ticks = max_extrapolation * tick_rate
+
+    def update_viewer(self, viewer_id, ship_table):
+        self.viewer_id = viewer_id
+        record = ship_table.get(viewer_id)
+        if record is None:
+            self.viewer = None
+            return
+        if self.viewer is None:
+            self.viewer = Ship(record[0], record[1], viewer_id, None)
+            self.viewer.net_id = viewer_id
+        set_ship_record(self.viewer, record)
+
+    def viewer_ship(self):
+        """The server's copy of our own ship, None while spectating"""
+        return self.viewer
+
+    def apply(self, older, newer, render_tick):
+        """Place remote entities at render_tick. older and newer are (tick, tables)
+        around it, older may be None when the render clock is behind the buffer."""
+        if older is None:
+            older = newer
+        older_tick, older_tables = older
+        newer_tick, newer_tables = newer
+
+        # Past the newest snapshot keep things moving, but only for a moment
+        render_tick = min(render_tick, newer_tick + self.max_extrapolation_ticks)
+        if newer_tick > older_tick:
+            alpha = max(0.0, min(1.0, (render_tick - older_tick) / (newer_tick - older_tick)))
+        else:
+            alpha = None
+
+        self.apply_ships(older_tables['s'], newer_tables['s'], alpha, max(0.0, render_tick - older_tick))
+        self.apply_projectiles(older_tables['p'], newer_tables['p'], render_tick)
+        self.apply_asteroids(older_tables['a'], newer_tables['a'], render_tick)
+
+    def apply_ships(self, table, newer_table, alpha, elapsed_ticks):
+        changed = self.remove_missing(self.ships, table)
+
+        for net_id, record in table.items():
+            if net_id == self.viewer_id:
+                continue
+            ship = self.ships.get(net_id)
+            if ship is None:
+                ship = Ship(record[0], record[1], net_id, None)
+                ship.net_id = net_id
+                self.ships[net_id] = ship
+                changed = True
+
+            set_ship_record(ship, record)
+            newer_record = newer_table.get(net_id)
+            if alpha is not None and newer_record is not None:
+                ship.x = lerp(record[0], newer_record[0], alpha)
+                ship.y = lerp(record[1], newer_record[1], alpha)
+                ship.facing_angle = lerp_angle(ship.facing_angle, newer_record[4] / ANGLE_SCALE, alpha)
+            else:
+                ship.x += ship.dx * elapsed_ticks
+                ship.y += ship.dy * elapsed_ticks
+
+        if self.viewer_id in self.ships:
+            del self.ships[self.viewer_id]
+            changed = True
+        if changed:
+            self.ship_list = list(self.ships.values())
+
+    def apply_projectiles(self, table, newer_table, render_tick):
+        changed = self.remove_missing(self.projectiles, table)
+
+        for net_id, record in table.items():
+            projectile = self.projectiles.get(net_id)
+            if projectile is None:
+                projectile = RemoteProjectile(net_id)
+                self.projectiles[net_id] = projectile
+                changed = True
+
+            # Linear motion, the newer anchor is just as valid and more accurate
+            ax, ay, vx, vy, anchor_tick, angle, projectile_type = newer_table.get(net_id, record)
+            projectile.x = extrapolate(ax, vx, anchor_tick, render_tick)
+            projectile.y = extrapolate(ay, vy, anchor_tick, render_tick)
+            projectile.angle = angle / ANGLE_SCALE
+            projectile.sprite_name = PROJECTILE_TYPES[projectile_type]
+
+        if changed:
+            self.projectile_list = list(self.projectiles.values())
+
+    def apply_asteroids(self, table, newer_table, render_tick):
+        for net_id in [net_id for net_id in self.asteroids if net_id not in table]:
+            self.move_to_sector(self.asteroids.pop(net_id), None)
+
+        for net_id, record in table.items():
+            asteroid = self.asteroids.get(net_id)
+            if asteroid is None:
+                asteroid = RemoteAsteroid(net_id)
+                self.asteroids[net_id] = asteroid
+
+            ax, ay, vx, vy, anchor_tick, radius = newer_table.get(net_id, record)
+            asteroid.x = extrapolate(ax, vx, anchor_tick, render_tick)
+            asteroid.y = extrapolate(ay, vy, anchor_tick, render_tick)
+            asteroid.radius = radius
+            self.move_to_sector(asteroid, (int(asteroid.x // SECTOR_SIZE), int(asteroid.y // SECTOR_SIZE)))
+
+    def move_to_sector(self, asteroid, sector):
+        if asteroid.sector == sector:
+            return
+        if asteroid.sector is not None:
+            sector_list = self.asteroid_sectors[asteroid.sector]
+            sector_list.remove(asteroid)
+            if not sector_list:
+                del self.asteroid_sectors[asteroid.sector]
+        if sector is not None:
+            if sector not in self.asteroid_sectors:
+                self.asteroid_sectors[sector] = []
+            self.asteroid_sectors[sector].append(asteroid)
+        asteroid.sector = sector
+
+    def remove_missing(self, entities, table):
+        missing = [net_id for net_id in entities if net_id not in table]
+        for net_id in missing:
+            del entities[net_id]
+        return bool(missing)
+
+    def clear(self):
+        self.ships.clear()
+        self.projectiles.clear()
+        self.asteroids.clear()
+        self.ship_list = []
+        self.projectile_list = []
+        self.asteroid_sectors.clear()
+        self.viewer_id = None
+        self.viewer = None
+
+
+def set_ship_record(ship, record):
+    x, y, dx, dy, angle, shield, health, ship_type, name = record
+    ship.x = x
+    ship.y = y
+    ship.dx = dx / VELOCITY_SCALE
+    ship.dy = dy / VELOCITY_SCALE
+    ship.facing_angle = angle / ANGLE_SCALE
+    ship.shield = shield
+    ship.health = health
+    ship.owner_name = name
+    if SHIP_TYPES[ship_type] == 'battleship':
+        ship.sprite_name = 'battleship'
@@ -0,0 +1,55 @@
+from collections import deque
+from game.settings import *
+
+CLOCK_CORRECTION = 0.1  # Fraction of the render clock's drift corrected each frame
+CLOCK_RESET = 30  # Ticks of drift after which the render clock jumps instead
+
+
+class InterpolationBuffer:
+    """Recent snapshot tables indexed by server tick, and a render clock that
+    runs a fixed delay behind the newest one. Remote entities are drawn at the
+    render clock, between the two snapshots around it."""
+
+    def __init__(self, delay=INTERPOLATION_DELAY, tick_rate=SERVER_TICK_RATE, size=SNAPSHOT_HISTORY_SIZE):
+        self.snapshots = deque(maxlen=size)
+        self.tick_rate = tick_rate
+        self.delay_ticks = delay * tick_rate
+        self.render_tick = None
+        self.since_newest = 0  # Seconds since the newest snapshot arrived
+
+    def add(self, tick, tables):
+        if self.snapshots and tick <= self.snapshots[-1][0]:
+            return
+        self.snapshots.append((tick, tables))
+        self.since_newest = 0
+
+    def update(self, dt):
+        """Advance the render clock, returns (older, newer, render_tick) or None
+        before the first snapshot. older is None when there is nothing to blend from."""
+        if not self.snapshots:
+            return None
+
+        # Where the server is now, going by the newest snapshot and how long ago it came in
+        self.since_newest += dt
+        target_tick = self.snapshots[-1][0] + self.since_newest * self.tick_rate - self.delay_ticks
+        if self.render_tick is None or abs(target_tick - self.render_tick) > CLOCK_RESET:
+            self.render_tick = target_tick
+        else:
+            self.render_tick += dt * self.tick_rate
+            self.render_tick += (target_tick - self.render_tick) * CLOCK_CORRECTION
+
+        # Newest snapshot at or before the render clock, and the one after it
+        older = None
+        for snapshot in reversed(self.snapshots):
+            if snapshot[0] <= self.render_tick:
+                older = snapshot
+                break
+            newer = snapshot
+        if older is self.snapshots[-1]:
+            return older, older, self.render_tick
+        return older, newer, self.render_tick
+
+    def clear(self):
+        self.snapshots.clear()
+        self.render_tick = None
+        self.since_newest = 0
@@ -1,8 +1,10 @@
 import json
+import time
 
 from rendering.sprite_manager import SpriteManager
 from ui_components.button import Button
 from game.settings import *
+from networking.keepalive import Keepalive
 
 import pygame
 
@@ -27,6 +29,7 @@ class Lobby:
         self.init_components()
 
         self.start_game = False
+        self.keepalive = Keepalive(KEEPALIVE_INTERVAL)
 
     def set_players(self, players):
         self.players = players
@@ -35,6 +38,7 @@ class Lobby:
         self.render()
         self.handle_buttons(events)
         self.listen_for_messages()
+        self.keepalive.maybe_send(self.network_layer, self.server_address, time.time())
 
     def handle_buttons(self, events):
         mouse_pos = pygame.mouse.get_pos()
@@ -61,14 +65,14 @@ class Lobby:
             }
             message = json.dumps(message).encode()
             print("[LOBBY] Player readied, sending to server]")
-            self.network_layer.send_to(message, self.server_address)
+            self.network_layer.send_reliable(message, self.server_address)
 
     def listen_for_messages(self):
         message = self.network_layer.listen_for_messages()
         if message is not None:
             data, address = message
             try:
-                data = json.loads(data.decode())
+                data = json.loads(data)
                 print(f"[CLIENT LOBBY] Received message type: {data.get('type', 'UNKNOWN')}")
                 
                 if data["type"] == "PLAYERS_STATUS":
@@ -78,7 +82,7 @@ class Lobby:
                     if data.get("?", False):  # Server actually sends "?": True
                         print("[CLIENT] Setting start_game = True")
                         self.start_game = True
-            except json.JSONDecodeError:
+            except (ValueError, TypeError):  # Not JSON, or a snapshot that beat START_GAME here
                 print("[CLIENT] Invalid message format, discarding.")
 
 
@@ -4,6 +4,7 @@ from lookup_tables import precomputed_angles
 import random
 from ui_components.button import Button
 from entities.ships.ship import Ship
+from rendering.entity_sprites import EntitySprites
 import math
 import pygame
 from shared_util.os_path_routing import get_asset_path
@@ -77,8 +78,9 @@ class MainMenu:
 
     def render(self):
         for ship in self.ai_ships:
-            if ship.ship_sprite:
-                rotated_sprite = pygame.transform.rotate(ship.ship_sprite, ship.facing_angle)
+            ship_sprite = EntitySprites.get(ship.sprite_name)
+            if ship_sprite:
+                rotated_sprite = pygame.transform.rotate(ship_sprite, ship.facing_angle)
                 rect = rotated_sprite.get_rect(center=(int(ship.x), int(ship.y)))
                 self.screen.blit(rotated_sprite, rect)
             else:
@@ -10,10 +10,13 @@ from client_scenes.defeat_screen import DefeatScreen
 from rendering.world_render import WorldRender
 from rendering.sound_manager import SoundManager
 from entities.ships.battleship import BattleShip
+from client_scenes.entity_store import EntityStore
+from client_scenes.interpolation_buffer import InterpolationBuffer
+from client_scenes.ship_prediction import ShipPrediction
 
 
 class MainScene:
-    def __init__(self, screen, clock, connected, player_id=None):
+    def __init__(self, screen, clock, connected, player_id=None, tick_rate=SERVER_TICK_RATE):
         self.ship = None
         self.screen = screen
         self.clock = clock
@@ -33,13 +36,17 @@ class MainScene:
         self.all_projectiles = []
         self.all_asteroids = {}
         self.all_ships = []
+        # Server ticks are what snapshots are stamped with, so both run on the server's rate
+        self.entity_store = EntityStore(tick_rate=tick_rate)
+        self.interpolation_buffer = InterpolationBuffer(tick_rate=tick_rate)
+        self.prediction = ShipPrediction()
+        self.input_sequence = 0
         self.all_ai = []
         self.radar_signatures = []
         self.explosion_events = []
 
         # Network elements
         self.frame = 0
-        self.server_saw_collision = False
 
         # Rendering
         self.camera = Camera(self.screen)
@@ -110,6 +117,9 @@ class MainScene:
             self.update_game_objects()
             self.update_ai(dt)
 
+        if self.connected:
+            self.update_remote_entities(dt)
+
         if self.defeat and self.chosen_spectate:
             self.update_spectate_target()
 
@@ -118,6 +128,19 @@ class MainScene:
         self.handle_defeat_screen()
         self.world_render.draw_reticle(self.camera)
 
+    def update_remote_entities(self, dt):
+        """Place remote entities a little behind the newest snapshot so they move smoothly"""
+        frame = self.interpolation_buffer.update(dt)
+        if frame is None:
+            return
+
+        self.entity_store.apply(*frame)
+
+        # Our own ship first, the radar centers on all_ships[0]
+        self.all_ships = ([self.ship] if self.ship else []) + self.entity_store.ship_list
+        self.all_projectiles = self.entity_store.projectile_list
+        self.all_asteroids = self.entity_store.asteroid_sectors
+
     def update_ai(self, dt):
         """Update AI and remove dead ones"""
         for ai in self.all_ai[:]:  # Copy list to avoid modification during iteration
@@ -140,8 +163,12 @@ class MainScene:
 
     def update_player_ship(self, dt):
         """Update player ship and handle radar"""
-        self.ship.run(dt)
+        # Same order as the server's step, inputs first, so predicted inputs replay exactly
+        boost_fuel = self.ship.current_boost_fuel
         apply_inputs_to_ship(self.ship, self.inputs)
+        if self.connected:
+            self.prediction.record(self.input_sequence, self.inputs, boost_fuel, self.ship.dampening_active)
+        self.ship.run(dt)
         self.handle_sounds(self.inputs)
 
         if not self.connected and self.all_asteroids:
@@ -223,6 +250,9 @@ class MainScene:
         self.all_projectiles.clear()
         self.all_asteroids.clear()
         self.all_ships.clear()
+        self.entity_store.clear()
+        self.interpolation_buffer.clear()
+        self.prediction.clear()
         self.all_ai.clear()
         self.radar_signatures.clear()
         self.explosion_events.clear()
@@ -268,8 +298,9 @@ class MainScene:
                     self.chosen_spectate = False
                     self.spectate_ship_address = None
 
-    def inject_inputs(self, inputs):
-        """Receive input data from client"""
+    def inject_inputs(self, inputs, sequence=0):
+        """Receive input data from client, sequence is the number it was sent to the server with"""
+        self.input_sequence = sequence
         if isinstance(inputs, dict) and "type" in inputs:
             if inputs["type"] == "PLAYER_INPUT":
                 self.inputs = inputs["input_data"]  # Changed from "data" to "input_data"
@@ -280,135 +311,20 @@ class MainScene:
 
     def inject_server_data(self, message, dt):
         """Handle multiplayer server data"""
+        own_ship_id = message.get('viewer')
 
-        # We need to remove our ship from the server update, so we can use the lerp.
-        server_ships = message.get('s', [])  # Changed from 'ships' to 's'
-
-        # Update/add ships from server (convert from dict if needed)
-        for server_ship_data in server_ships:
-            if hasattr(server_ship_data, 'owner'):
-                server_ship = server_ship_data
-            else:
-                server_ship = Ship(server_ship_data['x'], server_ship_data['y'], server_ship_data['o'],
-                                   None)  # Changed 'owner' to 'o'
-                server_ship.dx = server_ship_data.get('dx', 0)
-                server_ship.dy = server_ship_data.get('dy', 0)
-                server_ship.health = server_ship_data.get('h', 100)  # Changed 'health' to 'h'
-                server_ship.shield = server_ship_data.get('s', 100)  # Changed 'shield' to 's'
-                server_ship.facing_angle = server_ship_data.get('a', 0)  # Changed 'angle' to 'a'
-                server_ship.owner_name = server_ship_data.get('n', None)
-
-            ship_owner = server_ship.owner if hasattr(server_ship, 'owner') else server_ship_data[
-                'o']  # Changed 'owner' to 'o'
-
-            if ship_owner != self.player_number:  # Compare addresses
-                found = False
-                for i, local_ship in enumerate(self.all_ships):
-                    if local_ship.owner == ship_owner:
-                        self.all_ships[i] = server_ship
-                        found = True
-                        break
-                if not found:
-                    self.all_ships.append(server_ship)
-
-        server_owners = {ship.owner if hasattr(ship, 'owner') else ship['o'] for ship in
-                         server_ships}  # Changed 'owner' to 'o'
-        server_owners.add(self.player_number)  # Keep your own ship
-        self.all_ships = [ship for ship in self.all_ships if ship.owner in server_owners]
-
-        # Handle projectiles - convert dict data to objects for rendering
-        if 'p' in message:
-            self.all_projectiles = message['p']  # Changed from 'projectiles' to 'p'
-
-        if 'a' in message:
-            asteroids = {}
-            for sector_str, asteroid_list in message['a'].items():  # Changed from 'asteroids' to 'a'
-                x, y = map(float, sector_str.split(','))
-                sector_key = (int(x), int(y))
-                asteroids[sector_key] = asteroid_list  # Just use the dicts directly
-            self.all_asteroids = asteroids
+        # Remote entities are drawn from the interpolation buffer, our own ship is predicted locally.
+        self.interpolation_buffer.add(message['tick'], message['tables'])
+        self.entity_store.update_viewer(own_ship_id, message['tables']['s'])
 
         self.explosion_events.extend(message.get('e', []))  # Changed from 'explosions' to 'e'
 
-        collision_events = message.get('c', [])  # Changed from 'collision_events' to 'c'
-        for collision_event in collision_events:
-            if collision_event['player_id'] == self.player_number:  # Compare with our player_id
-                print("Server saw a collision")
-                self.server_saw_collision = True
-                break
-
-        # Update our ship's health/shield from server
-        ships = message.get('s', [])
-        for ship_data in ships:
-            ship_owner = ship_data.owner if hasattr(ship_data, 'owner') else ship_data['o']  # Changed 'owner' to 'o'
-            if ship_owner == self.player_number:  # Find our ship
-                if self.ship:  # Make sure we have a ship
-                    self.ship.shield = ship_data.shield if hasattr(ship_data, 'shield') else ship_data.get('s',
-                                                                                                           100)  # Changed 'shield' to 's'
-                    self.ship.health = ship_data.health if hasattr(ship_data, 'health') else ship_data.get('h',
-                                                                                                           100)  # Changed 'health' to 'h'
-                    self.interpolate(ship_data, dt)
-                break
-
-    def interpolate(self, ship_data, dt):
-        """Interpolate player ship position for multiplayer with smooth predictive correction."""
-        # Base parameters
-        position_error_margin = 75
-        velocity_error_margin = 50
-        correction_strength = 0.025
-        periodic_correction_strength = 0.05
-
-        # Extract values from ship data (could be dict or object)
-        ship_x = ship_data.x if hasattr(ship_data, 'x') else ship_data['x']
-        ship_y = ship_data.y if hasattr(ship_data, 'y') else ship_data['y']
-        ship_dx = ship_data.dx if hasattr(ship_data, 'dx') else ship_data.get('dx', 0)
-        ship_dy = ship_data.dy if hasattr(ship_data, 'dy') else ship_data.get('dy', 0)
-
-        # Predict server position based on velocity
-        predicted_x = ship_x + ship_dx * dt
-        predicted_y = ship_y + ship_dy * dt
-
-        # Periodic stronger correction every 120 frames
-        if self.frame % 120 == 0:
-            x_error = predicted_x - self.ship.x
-            y_error = predicted_y - self.ship.y
-            self.ship.x += x_error * periodic_correction_strength
-            self.ship.y += y_error * periodic_correction_strength
-
-        x_error = predicted_x - self.ship.x
-        y_error = predicted_y - self.ship.y
-        dx_error = ship_dx - self.ship.dx
-        dy_error = ship_dy - self.ship.dy
-
-        x_diff = abs(x_error)
-        y_diff = abs(y_error)
-        dx_diff = abs(dx_error)
-        dy_diff = abs(dy_error)
-
-        if x_diff > position_error_margin or y_diff > position_error_margin:
-            # print("Correcting pos")
-            scale = min(1.0, max(x_diff, y_diff) / position_error_margin)
-            self.ship.x += x_error * correction_strength * scale
-            self.ship.y += y_error * correction_strength * scale
-        else:
-            self.ship.x += x_error * correction_strength
-            self.ship.y += y_error * correction_strength
-
-        # Velocity correction
-        if dx_diff > velocity_error_margin or dy_diff > velocity_error_margin:
-            # print("Correcting vel")
-            scale = min(1.0, max(dx_diff, dy_diff) / velocity_error_margin)
-            self.ship.dx += dx_error * correction_strength * scale
-            self.ship.dy += dy_error * correction_strength * scale
-        else:
-            self.ship.dx += dx_error * correction_strength
-            self.ship.dy += dy_error * correction_strength
-
-        if self.server_saw_collision:
-            print("Accepting dx dy from server state.")
-            self.ship.dx = ship_dx
-            self.ship.dy = ship_dy
-            self.server_saw_collision = False
+        # Take the server's word for our ship and replay the inputs it hasn't seen yet
+        server_ship = self.entity_store.viewer_ship()
+        if server_ship is not None and self.ship:
+            self.ship.shield = server_ship.shield
+            self.ship.health = server_ship.health
+            self.prediction.reconcile(self.ship, server_ship, message['input_ack'])
 
     def handle_sounds(self, inputs):
         if inputs.get('mouse_left'):
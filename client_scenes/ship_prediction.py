@@ -0,0 +1,41 @@
+import math
+from collections import deque
+from game.settings import *
+from shared_util.ship_logic import apply_thrust
+
+
+class ShipPrediction:
+    """Inputs applied to our own ship that the server hasn't acknowledged yet.
+    On every snapshot the ship is reset to the server's state and these are
+    replayed on top, so the prediction only ever differs by what's in flight."""
+
+    def __init__(self, size=PREDICTION_BUFFER_SIZE):
+        self.pending = deque(maxlen=size)
+        self.last_error = 0  # How far the prediction was off at the last snapshot
+
+    def record(self, sequence, input_data, boost_fuel, dampening_active):
+        """boost_fuel from before the input, dampening_active as the ship moved with it"""
+        self.pending.append((sequence, input_data, boost_fuel, dampening_active))
+
+    def reconcile(self, ship, server_ship, acked_sequence):
+        while self.pending and self.pending[0][0] <= acked_sequence:
+            self.pending.popleft()
+
+        predicted_x, predicted_y = ship.x, ship.y
+        ship.x, ship.y = server_ship.x, server_ship.y
+        ship.dx, ship.dy = server_ship.dx, server_ship.dy
+
+        # Replay movement only, firing and toggles already happened locally
+        boost_fuel, dampening_active = ship.current_boost_fuel, ship.dampening_active
+        for sequence, input_data, recorded_boost_fuel, recorded_dampening in self.pending:
+            ship.current_boost_fuel = recorded_boost_fuel
+            ship.dampening_active = recorded_dampening
+            apply_thrust(ship, input_data)
+            ship.move()
+        ship.current_boost_fuel, ship.dampening_active = boost_fuel, dampening_active
+
+        self.last_error = math.hypot(ship.x - predicted_x, ship.y - predicted_y)
+
+    def clear(self):
+        self.pending.clear()
+        self.last_error = 0
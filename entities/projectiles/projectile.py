@@ -1,6 +1,10 @@
 class Projectile:
     def __init__(self):
-        pass
+        # Network identity, assigned by the server
+        self.net_id = None
+        self.net_anchor = None
+        # Ticks the shooter's view was behind the server, hits are checked against ships that far back
+        self.rewind_ticks = 0
 
     def run(self):
         pass
@@ -1,6 +1,4 @@
 from game.settings import *
-import pygame
-from rendering.sprite_manager import SpriteManager
 import random
 from entities.ships.ship import Ship
 
@@ -14,19 +12,7 @@ class BattleShip(Ship):
         self.dy = random.uniform(-1, 1)
         self.shield = 500
         self.health = 1000
-
-        screen_width, screen_height = pygame.display.get_desktop_sizes()[0]
-        scale_x = screen_width / CAMERA_VIEW_WIDTH
-        scale_y = screen_height / CAMERA_VIEW_HEIGHT
-        sprite_name = 'battleship'
-        original_sprite = SpriteManager.get_sprite(sprite_name)
-        if original_sprite:
-            scaled_width = int(original_sprite.get_width() * scale_x)
-            scaled_height = int(original_sprite.get_height() * scale_y)
-            self.ship_sprite = pygame.transform.scale(original_sprite, (scaled_width, scaled_height))
-        else:
-            print("no sprite found")
-            self.ship_sprite = None
+        self.sprite_name = 'battleship'
 
     def run(self, dt=None):
         self.move()
@@ -1,6 +1,4 @@
 import random
-import pygame
-from rendering.sprite_manager import SpriteManager
 from shared_util.ship_logic import *
 
 
@@ -11,6 +9,8 @@ class Ship:
         self.owner = owner
         self.owner_name = None
         self.camera = camera
+        self.net_id = None
+        self.view_tick = None  # Server tick its player was looking at, for lag compensation
 
         # Ship movement parameters
         self.dx = 0
@@ -82,25 +82,11 @@ class Ship:
         self.alive = True
         self.dampening_active = True
 
-        screen_width, screen_height = pygame.display.get_desktop_sizes()[0]
-        scale_x = screen_width / CAMERA_VIEW_WIDTH
-        scale_y = screen_height / CAMERA_VIEW_HEIGHT
-
-        self.ai_ships = ["aiShip", "aiShip2", "aiShip3", "aiShip4"]
-
+        # Only the name, the client view layer (rendering/entity_sprites.py) owns the surfaces
         if owner == -1:
-            sprite_name = random.choice(self.ai_ships)
-        else:
-            sprite_name = "ship1"
-
-        # Get original sprite and scale it once
-        original_sprite = SpriteManager.get_sprite(sprite_name)
-        if original_sprite:
-            scaled_width = int(original_sprite.get_width() * scale_x)
-            scaled_height = int(original_sprite.get_height() * scale_y)
-            self.ship_sprite = pygame.transform.scale(original_sprite, (scaled_width, scaled_height))
+            self.sprite_name = random.choice(AI_SHIP_SPRITES)
         else:
-            self.ship_sprite = None
+            self.sprite_name = "ship1"
 
         self.current_weapon = "rocket"
         self.rocket_ammo = MAX_ROCKETS
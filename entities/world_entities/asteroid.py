@@ -14,6 +14,10 @@ class Asteroid:
 
         self.alive = True
 
+        # Network identity, assigned by the server
+        self.net_id = None
+        self.net_anchor = None
+
     def float_on(self):
         self.x += self.dx
         self.y += self.dy
@@ -1,23 +1,38 @@
 from client_scenes.main_scene import MainScene
 from client_scenes.pause_menu import PauseMenu
+from networking.snapshot_codec import decode_snapshot, encode_snapshot_ack, is_snapshot, peek_sequence, keyframe_size
+from networking.network_stats import format_rates
+from networking.snapshot_history import SnapshotHistory
+from networking.input_packet import InputHistory
+from networking.congestion_control import ReceivedSequences
+from networking.keepalive import Keepalive
+from game.settings import KEEPALIVE_INTERVAL, SERVER_TICK_RATE
 
 import pygame
-import json
 import time
-import gzip
 
 
 class Client:
-    def __init__(self, screen, clock, connected, network_layer, server_address, client_address):
+    def __init__(self, screen, clock, connected, network_layer, server_address, client_address,
+                 tick_rate=SERVER_TICK_RATE):
         self.prev_inputs = None
         self.connected = connected
         self.network_layer = network_layer
         self.server_address = server_address
-        self.main_scene = MainScene(screen, clock, connected, client_address)
+        self.main_scene = MainScene(screen, clock, connected, client_address, tick_rate)
         self.ui_font = pygame.font.SysFont('microsoftyahei', 20)
         self.pause_menu = PauseMenu(screen, self.ui_font)
         self.server_data = None
+        self.snapshot_history = SnapshotHistory()
+        self.input_history = InputHistory()
+        self.received_sequences = ReceivedSequences()
         self.paused = False
+        self.keepalive = Keepalive(KEEPALIVE_INTERVAL)
+
+        # Snapshot receive stats
+        self.last_snapshot_sequence = 0
+        self.dropped_snapshots = 0  # Superseded by a newer one that arrived in the same frame
+        self.out_of_order_snapshots = 0  # Arrived after a newer one was already applied
 
     def run(self, dt, events):
         for event in events:
@@ -27,40 +42,88 @@ class Client:
         if self.paused:
             self.pause_menu.render()
             pygame.mouse.set_visible(True)
+            # No inputs go out while paused, keep the server from timing us out
+            if self.connected:
+                self.keepalive.maybe_send(self.network_layer, self.server_address, time.time())
             return
         else:
             pygame.mouse.set_visible(False)
 
         inputs = self.collect_inputs()
 
-        self.main_scene.inject_inputs(inputs)
+        # Send first so the local prediction knows the sequence number this input went out with
+        if self.connected:
+            self.send_inputs_to_server(inputs)
+
+        self.main_scene.inject_inputs(inputs, self.input_history.sequence)
         self.main_scene.run(dt)
 
         if self.connected:
-            self.send_inputs_to_server(inputs)
             self.listen_for_server_data(dt)
+            self.report_network_stats()
+
+    def report_network_stats(self):
+        stats = self.network_layer.stats
+        if stats.roll(time.time()):
+            rates = stats.report().get(self.server_address)
+            if rates is not None:
+                print(f"[CLIENT] Net server: {format_rates(rates)}")
 
     def listen_for_server_data(self, dt):
-        message = self.network_layer.listen_for_messages()
+        # Drain everything that queued up since last frame, only the newest snapshot is worth decoding
+        newest_data = None
+        newest_sequence = self.last_snapshot_sequence
+        stats = self.network_layer.stats.peer(self.server_address)
+        while True:
+            message = self.network_layer.listen_for_messages()
+            if message is None:
+                break
 
-        if message is not None:
             data, address = message
+            if isinstance(data, dict):
+                sequence = data['seq']  # Already decoded, from the server in this process
+            elif is_snapshot(data):
+                sequence = peek_sequence(data)
+            else:
+                continue
+
+            if sequence > self.received_sequences.newest:
+                # Sequences skipped on the way count as lost, if they turn up later they're out of order instead
+                stats.lost += sequence - self.received_sequences.newest - 1
+                stats.delivered += 1
+            self.received_sequences.add(sequence)
+            if sequence <= newest_sequence:
+                self.out_of_order_snapshots += 1
+                stats.out_of_order += 1
+                continue
+            if newest_data is not None:
+                self.dropped_snapshots += 1
+            newest_data = data
+            newest_sequence = sequence
+
+        if isinstance(newest_data, dict):
+            self.last_snapshot_sequence = newest_data['seq']
+            self.main_scene.inject_server_data(newest_data, dt)
+        elif newest_data is not None:
             try:
-                # Decompress and parse
-                decompressed_data = gzip.decompress(data)
-                json_str = decompressed_data.decode('utf-8')
-                message = json.loads(json_str)
-
-                if message['t'] == "gu":
-                    self.main_scene.inject_server_data(message, dt)  # Pass parsed dict
-                else:
-                    pass
+                decode_start = time.perf_counter()
+                message = decode_snapshot(newest_data, self.snapshot_history)
+                stats.record_snapshot(len(newest_data), keyframe_size(message['tables'], len(message['e']),
+                                                                      len(message['c'])),
+                                      time.perf_counter() - decode_start)
+                self.last_snapshot_sequence = message['seq']
+                self.snapshot_history.add(message['seq'], message['tables'])
+                ack = encode_snapshot_ack(message['seq'], self.received_sequences.bits_before(message['seq']))
+                self.network_layer.send_to(ack, self.server_address)
+                self.main_scene.inject_server_data(message, dt)
             except Exception as e:
                 print(f"[CLIENT] Error processing message: {e}")
 
     def send_inputs_to_server(self, inputs=None):
         if inputs and self.server_address:
-            message = json.dumps(inputs).encode()
+            # Lets the server judge our shots against what we were looking at
+            view_tick = self.main_scene.interpolation_buffer.render_tick
+            message = self.input_history.encode(inputs["input_data"], view_tick)
             self.network_layer.send_to(message, self.server_address)
 
     def collect_inputs(self):
@@ -0,0 +1,40 @@
+# python -m game.dedicated_server --port 4242 --tick-rate 60 --send-rate 30
+import argparse
+from game.settings import *
+from game.server import Server
+from networking.network_layer import NetworkLayer
+from shared_util.fixed_rate_loop import FixedRateLoop
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run a headless Against All Odds server")
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--tick-rate', type=int, default=SERVER_TICK_RATE, help="simulation ticks per second")
+    parser.add_argument('--send-rate', type=int, default=SERVER_SEND_RATE, help="most snapshots per second any client gets")
+    parser.add_argument('--stats-interval', type=float, default=TICK_STATS_INTERVAL,
+                        help="seconds between tick timing and network stats log lines, 0 to disable")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    network_layer = NetworkLayer(bind_socket=True, port=args.port)
+    network_layer.start()
+    network_layer.stats.interval = args.stats_interval
+    server = Server(network_layer, args.tick_rate, args.send_rate)
+    loop = FixedRateLoop(args.tick_rate, stats_interval=args.stats_interval)
+
+    print(f"[SERVER] Dedicated server on port {args.port}, "
+          f"{args.tick_rate} ticks/s, up to {server.send_rate} snapshots/s")
+    try:
+        loop.run(server.run)
+    except KeyboardInterrupt:
+        print("[SERVER] Shutting down")
+    finally:
+        print(f"[SERVER] Tick stats @ {loop.tick_rate} Hz: {loop.stats.summary()}")
+        network_layer.socket.close()
+
+
+if __name__ == "__main__":
+    main()
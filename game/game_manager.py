@@ -5,9 +5,12 @@ from client_scenes.main_menu import MainMenu
 from client_scenes.lobby_scene import Lobby
 from game.client import Client
 from game.server import Server
+from game.hosted_server import HostedServer
 from shared_util.os_path_routing import get_asset_path
+from game.settings import SNAPSHOT_RATE, SERVER_TICK_RATE
 
 import pygame
+import socket
 import time
 import json
 
@@ -35,6 +38,7 @@ class GameManager:
         self.waiting_for_server = False
         self.connection_attempt_time = None
         self.server_ip_address = None
+        self.server_tick_rate = SERVER_TICK_RATE
 
         # Input tracking
         self.prev_inputs = None
@@ -55,9 +59,6 @@ class GameManager:
         elif self.game_state == "in_mp_game":
             self.run_multiplayer(dt, events)
 
-        if self.server:
-            self.server.run(dt)
-
     # Scene run
 
     def run_join_screen(self, dt, events):
@@ -89,21 +90,24 @@ class GameManager:
         if self.lobby.start_game:
             print("Switching to game")
             self.game_state = "in_mp_game"
-            self.client = Client(self.screen, self.clock, True, self.network_layer, self.server_address, self.client_address)
+            self.client = Client(self.screen, self.clock, True, self.network_layer, self.server_address,
+                                 self.client_address, self.server_tick_rate)
 
     # Network Stuff
 
     def attempt_connection(self, server_ip, player_name):
-        self.server_address = (server_ip, 4242)
+        # Resolved so replies, which come from an IP, match the address we send to
+        self.server_address = (socket.gethostbyname(server_ip), 4242)
         print(f"[CLIENT] Attempting connection to {self.server_address} as {player_name}")
 
         message = {
             "type": "CONNECTION_ATTEMPT",
             "player_name": player_name,
             "ready": False,
+            "snapshot_rate": SNAPSHOT_RATE,
         }
         message = json.dumps(message).encode()
-        self.network_layer.send_to(message, self.server_address)
+        self.network_layer.send_reliable(message, self.server_address)
         self.connection_attempt_time = time.time()
 
         self.waiting_for_server = True
@@ -113,18 +117,22 @@ class GameManager:
         if message is not None:
             data, address = message
             try:
-                data = json.loads(data.decode())
+                data = json.loads(data)
                 if data["type"] == "CONNECTION_CONFIRMATION":
                     server_message = data["message"]
                     print(f"[CLIENT] Connection successful, server says {server_message}")
+                    print(f"[CLIENT] Server ticks at {data.get('tick_rate')} Hz, "
+                          f"sends {data.get('snapshot_rate')} snapshots per second")
                     self.client_address = data["player_address"]
+                    self.server_tick_rate = data.get("tick_rate", SERVER_TICK_RATE)
                     self.lobby = Lobby(self.screen, self.network_layer, self.server_address)
                     self.game_state = "lobby"
-            except json.decoder.JSONDecodeError:
+            except ValueError:  # Not JSON, or not text at all
                 print("[CLIENT] Invalids message format, discarding.")
 
         if time.time() > self.connection_attempt_time + 60:
             print("[CLIENT] Connection timed out.")
+            self.stop_hosting()
             self.game_state = "menu"
             self.main_menu.game_state = "menu"
 
@@ -141,17 +149,23 @@ class GameManager:
         # Server gets its own dedicated network layer
         server_network_layer = NetworkLayer(bind_socket=True, port=4242)
         server_network_layer.start()
-        self.server = Server(server_network_layer)  # Server uses dedicated layer
-
-        # Host's client operations use a separate network layer
-        self.network_layer = NetworkLayer()  # No binding - regular client
-        self.network_layer.start()
+        # Host's client talks to the server in memory, no second socket and no encoding
+        self.network_layer = server_network_layer.local_client()
 
-        # Start host's client
+        # Ticks on its own thread, a slow frame here no longer holds up the remote players
+        self.server = HostedServer(Server(server_network_layer))
+        self.server.start()
 
         self.is_host = True
         self.game_state = "joining"
 
+    def stop_hosting(self):
+        """Stop the hosted server's thread and free its port, when leaving the game or quitting"""
+        if self.server:
+            self.server.stop()
+            self.server = None
+        self.is_host = False
+
     def setup_on_join_server(self):
         self.join_window = JoinLobbyWindow(self.screen)
 
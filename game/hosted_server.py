@@ -0,0 +1,43 @@
+import threading
+from game.settings import *
+from shared_util.fixed_rate_loop import FixedRateLoop
+
+
+class HostedServer:
+    """The server of a hosted game, ticking on its own thread at its own fixed rate
+    so the host's frames and everyone's ticks don't hold each other up. All it shares
+    with the host's client is the in-memory link from NetworkLayer.local_client()."""
+
+    def __init__(self, server, stats_interval=TICK_STATS_INTERVAL):
+        self.server = server
+        # Sleep the whole wait, a thread spinning on the GIL would slow down the host's rendering
+        self.loop = FixedRateLoop(server.tick_rate, spin_time=0, stats_interval=stats_interval)
+        self.thread = threading.Thread(target=self.serve, name="hosted-server", daemon=True)
+
+    def start(self):
+        print(f"[SERVER] Hosting at {self.loop.tick_rate} ticks/s on a separate thread")
+        self.thread.start()
+
+    def serve(self):
+        try:
+            self.loop.run(self.server.run)
+        finally:
+            # Closed by the thread that reads from it, never under a tick that's still running
+            self.close_socket()
+
+    def stop(self, timeout=1.0):
+        self.loop.stop()
+        if self.thread.is_alive():
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                print(f"[SERVER] Tick still running after {timeout}s, the socket closes once it ends")
+        else:
+            self.close_socket()
+        print(f"[SERVER] Tick stats @ {self.loop.tick_rate} Hz: {self.loop.stats.summary()}")
+
+    def close_socket(self):
+        if self.server.network_layer.socket:
+            self.server.network_layer.socket.close()
+
+    def is_running(self):
+        return self.thread.is_alive()
@@ -42,6 +42,7 @@ if __name__ == "__main__":
     try:
         main()
     finally:
+        game_manager.stop_hosting()
         pr.disable()
         stats = pstats.Stats(pr)
         stats.sort_stats('tottime')
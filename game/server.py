@@ -1,57 +1,81 @@
-import gzip
-
 from server_scenes.server_main_scene import ServerMainScene
+from server_scenes.interest_manager import InterestManager
+from networking.snapshot_codec import SnapshotEncoder, SnapshotRecords, is_snapshot_ack, decode_snapshot_ack, keyframe_size
+from networking.network_stats import format_rates
+from networking.snapshot_history import SnapshotHistory
+from networking.input_packet import is_input_packet, decode_input, peek_input_sequence
+from server_scenes.player_input_buffer import PlayerInputBuffer
+from server_scenes.priority_accumulator import PriorityAccumulator
+from networking.congestion_control import CongestionControl
+from networking.keepalive import is_keepalive
+from game.settings import *
 import json
 import time
 
-from shared_util.asteroid_logic import get_nearby_asteroids
-
 
 class Server:
-    def __init__(self, network_layer):
+    def __init__(self, network_layer, tick_rate=SERVER_TICK_RATE, send_rate=SERVER_SEND_RATE,
+                 client_timeout=CLIENT_TIMEOUT):
         self.network_layer = network_layer
         self.sock = None
         self.state = "lobby"
         self.connected_players = {}
 
         self.message_queue = []
-        self.input_message_queue = []
         self.player_names = []
 
         self.server_main_scene = None
 
-        self.last_heartbeat = time.time()
-        self.heartbeat_interval = 1
+        self.snapshot_encoder = SnapshotEncoder()
+        self.interest_manager = InterestManager()
+
+        # Each client gets a snapshot every few ticks at the rate it asked for, at most send_rate
+        self.tick_rate = tick_rate
+        self.send_rate = min(send_rate, tick_rate)
 
-        self.number_of_messages = 0
-        self.running_average = 0
+        # Clients silent for longer than this are dropped
+        self.client_timeout = client_timeout
+
+        # Per client traffic, counted by the network layer
+        self.stats = network_layer.stats
 
     def run(self, dt):
         self.listen_for_all_messages()
         self.parse_messages()
+        self.drop_timed_out_players(time.time())
+        self.report_network_stats(time.time())
 
+        # Lobby messages go over the reliable channel, so status is only sent when it changes
         if self.state == "lobby":
-            current_time = time.time()
-
-            if current_time - self.last_heartbeat > self.heartbeat_interval:
-                self.broadcast_player_ready_status()
-                self.last_heartbeat = current_time
-
-                if self.check_if_players_ready():
-                    self.server_main_scene = ServerMainScene(self.connected_players)
-                    self.state = "in_game"
+            if self.check_if_players_ready():
+                self.server_main_scene = ServerMainScene(self.connected_players)
+                self.state = "in_game"
 
         if self.state == "in_game":
             self.handle_game(dt)
 
     def handle_game(self, dt):
-        # Use input messages from the dedicated input queue
-        input_messages = self.input_message_queue.copy()
-        self.input_message_queue.clear()
+        # Exactly one input per player per tick, the buffers smooth out bursty arrival
+        input_messages = []
+        for address, player in self.connected_players.items():
+            input_frame = player["input_buffer"].next_input()
+            if input_frame is not None:
+                input_messages.append((address, input_frame))
 
         game_state = self.server_main_scene.step(input_messages, dt)
 
-        self.broadcast_game_state(game_state)
+        # Events from the ticks between a client's snapshots are held until its next one
+        due_players = []
+        for address, player in self.connected_players.items():
+            player["pending_explosions"].extend(game_state['explosions'])
+            for event in game_state['collision_events']:
+                if event['player_id'] == address:
+                    player["pending_collision_events"].append(event)
+            if game_state['tick'] % player["send_interval"] == player["send_phase"]:
+                due_players.append((address, player))
+
+        if due_players:
+            self.broadcast_game_state(game_state, due_players)
 
     # State management
 
@@ -68,49 +92,109 @@ class Server:
 
     # Listen for messages
 
+    def report_network_stats(self, now):
+        if not self.stats.roll(now):
+            return
+        for address, rates in self.stats.report().items():
+            player = self.connected_players.get(address)
+            if player is not None:
+                print(f"[SERVER] Net {player['player_name']}: {format_rates(rates)}")
+
+    def drop_timed_out_players(self, now):
+        timed_out = [address for address, player in self.connected_players.items()
+                     if now - player["last_seen"] > self.client_timeout]
+        for address in timed_out:
+            print(f"[SERVER] {self.connected_players[address]['player_name']} at {address} timed out")
+            self.remove_player(address)
+
+    def remove_player(self, address):
+        """Free everything held for a client, its ship included"""
+        del self.connected_players[address]
+        self.network_layer.forget(address)
+
+        if self.state == "lobby":
+            self.broadcast_player_ready_status()
+        elif self.state == "in_game":
+            self.server_main_scene.remove_player(address)
+            if not self.connected_players:
+                # Nobody left to simulate for
+                print("[SERVER] Everyone left, back to the lobby")
+                self.server_main_scene = None
+                self.state = "lobby"
+
     def listen_for_all_messages(self):
+        now = time.time()
         while True:
             message = self.network_layer.listen_for_messages()
             if message is not None:
+                player = self.connected_players.get(message[1])
+                if player is not None:
+                    player["last_seen"] = now
                 self.message_queue.append(message)
             else:
                 break
 
     def parse_messages(self):
         for message in self.message_queue:
-            if message is not None:
+            if message is not None and not is_keepalive(message[0]):
                 if self.state == "lobby":
                     self.look_for_connection_attempts(message)
                     self.look_for_ready_up(message)
                 elif self.state == "in_game":
-                    self.look_for_player_input(message)
+                    if not self.look_for_snapshot_ack(message):
+                        self.look_for_player_input(message)
         self.message_queue = []
 
     def look_for_connection_attempts(self, message):
         data, address = message
         try:
-            data = json.loads(data.decode())
+            data = json.loads(data)
             if data["type"] == "CONNECTION_ATTEMPT":
                 player_name = data["player_name"]
                 ready = data["ready"]
+                snapshot_rate, send_interval = self.negotiate_snapshot_rate(data.get("snapshot_rate"))
                 return_message = {
                     "type": "CONNECTION_CONFIRMATION",
                     "message": f"Server says Hello to {player_name}",
                     "player_address": str(address),
+                    "snapshot_rate": snapshot_rate,
+                    "tick_rate": self.tick_rate,
                 }
                 return_message = json.dumps(return_message).encode()
-                self.network_layer.send_to(return_message, address)
+                self.network_layer.send_reliable(return_message, address)
                 self.connected_players[address] = {
                     "player_name": player_name,
                     "ready": ready,
+                    "snapshot_history": SnapshotHistory(),
+                    "snapshot_sequence": 0,
+                    "acked_sequence": None,
+                    "input_buffer": PlayerInputBuffer(),
+                    "snapshot_rate": snapshot_rate,
+                    "send_interval": send_interval,
+                    # Spread clients on the same rate over different ticks so encoding cost stays flat
+                    "send_phase": len(self.connected_players) % send_interval,
+                    "pending_explosions": [],
+                    "pending_collision_events": [],
+                    "congestion": CongestionControl(),
+                    "priority": PriorityAccumulator(),
+                    "last_seen": time.time(),
                 }
-        except json.decoder.JSONDecodeError:
+                self.broadcast_player_ready_status()
+        except ValueError:  # Not JSON, binary packets from clients already in the game too
             print("[CLIENT] Invalids message format, discarding.")
 
+    def negotiate_snapshot_rate(self, requested_rate):
+        """Snapshot rate granted to a client and the ticks between its snapshots"""
+        snapshot_rate = self.send_rate
+        if isinstance(requested_rate, (int, float)) and requested_rate > 0:
+            snapshot_rate = min(requested_rate, self.send_rate)
+        send_interval = max(1, round(self.tick_rate / snapshot_rate))
+        return self.tick_rate / send_interval, send_interval
+
     def look_for_ready_up(self, message):
         data, address = message
         try:
-            data = json.loads(data.decode())
+            data = json.loads(data)
             if data["type"] == "READY":
                 print("[SERVER] Saw ready up")
                 # Update the player's ready status
@@ -118,22 +202,41 @@ class Server:
                     self.connected_players[address]["ready"] = data["status"]
                     print(f"[SERVER] Player at {address} is now ready: {data['status']}")
                 self.broadcast_player_ready_status()
-        except json.decoder.JSONDecodeError:
+        except ValueError:
             pass
 
+    def look_for_snapshot_ack(self, message):
+        data, address = message
+        if not is_snapshot_ack(data):
+            return False
+
+        if address in self.connected_players:
+            player = self.connected_players[address]
+            sequence, received_bits = decode_snapshot_ack(data)
+            if player["acked_sequence"] is None or sequence > player["acked_sequence"]:
+                player["acked_sequence"] = sequence
+            peer = self.stats.peer(address)
+            peer.delivered += player["congestion"].on_ack(sequence, received_bits, time.time())
+            peer.rtt = player["congestion"].srtt
+        return True
+
     def look_for_player_input(self, message):
         """Handle player input during game"""
         data, address = message
-        try:
-            data = json.loads(data.decode())
-            if data["type"] == "PLAYER_INPUT":
-                self.input_message_queue.append({
-                    'player_id': address,
-                    'input_data': data['input_data'],
-                    'timestamp': data.get('timestamp', time.time())
-                })
-        except json.decoder.JSONDecodeError:
-            pass
+        if not is_input_packet(data) or address not in self.connected_players:
+            return
+
+        # Each packet repeats the last few frames, only buffer the ones we haven't seen yet
+        input_buffer = self.connected_players[address]["input_buffer"]
+        input_frames = decode_input(data, input_buffer.newest_sequence)
+        if not input_frames:
+            # Everything in it already arrived, either overtaken by a newer packet or a copy of the newest
+            if peek_input_sequence(data) < input_buffer.newest_sequence:
+                self.stats.peer(address).out_of_order += 1
+            else:
+                self.stats.peer(address).duplicates += 1
+        for input_frame in input_frames:
+            input_buffer.add(input_frame)
 
     # Send messages
 
@@ -150,7 +253,7 @@ class Server:
 
         message = json.dumps(lobby_message).encode()
         for address in self.connected_players:
-            self.network_layer.send_to(message, address)
+            self.network_layer.send_reliable(message, address)
 
     def broadcast_start_game(self):
         print("[SERVER] Starting game")
@@ -161,60 +264,82 @@ class Server:
         }
         message = json.dumps(message).encode()
         for address in self.connected_players:
+            self.network_layer.send_reliable(message, address)
+
+    def broadcast_game_state(self, game_state, players):
+        live_projectiles = [proj for proj in game_state['projectiles'] if proj.alive]
+        self.interest_manager.rebuild(game_state['ships'], live_projectiles, game_state['asteroids'])
+
+        records = SnapshotRecords(game_state['tick'])
+        entity_registry = self.server_main_scene.entity_registry
+
+        for address, player in players:
+            encode_start = time.perf_counter()
+
+            # Every client gets its own view of the world, centered on its own ship
+            viewer = entity_registry.ship_for_owner(address)
+            ships, projectiles, asteroids, explosions = self.interest_manager.relevant_entities(
+                viewer, player["pending_explosions"])
+            tables = records.tables(ships, projectiles, asteroids)
+            collision_events = player["pending_collision_events"]
+            player["snapshot_sequence"] += 1
+            viewer_id = viewer.net_id if viewer else None
+
+            if self.network_layer.is_local(address):
+                self.send_local_snapshot(address, player, game_state, tables, viewer_id, explosions)
+                continue
+
+            # Delta against the newest snapshot this client acknowledged, keyframe if it fell out of the history
+            history = player["snapshot_history"]
+            baseline = history.get(player["acked_sequence"])
+
+            # Whatever doesn't fit this client's budget waits for a later snapshot, events included
+            deferred_explosions = explosions[MAX_SNAPSHOT_EVENTS:]
+            deferred_collision_events = collision_events[MAX_SNAPSHOT_EVENTS:]
+            explosions = explosions[:MAX_SNAPSHOT_EVENTS]
+            collision_events = collision_events[:MAX_SNAPSHOT_EVENTS]
+            congestion = player["congestion"]
+            budget = congestion.snapshot_budget(player["snapshot_rate"])
+            tables, limited = player["priority"].fit(tables, baseline, budget, viewer_id,
+                                                     explosions, collision_events)
+
+            message = self.snapshot_encoder.encode(
+                player["snapshot_sequence"],
+                game_state['tick'],
+                game_state['timestamp'],
+                tables,
+                explosions,
+                collision_events,
+                baseline,
+                player["acked_sequence"] or 0,
+                viewer_id,
+                player["input_buffer"].consumed_sequence,
+            )
+            history.add(player["snapshot_sequence"], tables)
+            encode_time = time.perf_counter() - encode_start
+
+            peer = self.stats.peer(address)
+            peer.lost += congestion.on_sent(player["snapshot_sequence"], time.time(), limited)
+            peer.record_snapshot(len(message), keyframe_size(tables, len(explosions), len(collision_events)),
+                                 encode_time)
+            player["pending_explosions"] = deferred_explosions
+            player["pending_collision_events"] = deferred_collision_events
+
             self.network_layer.send_to(message, address)
 
-    def broadcast_game_state(self, game_state):
-        # Get only nearby asteroids
-        nearby_asteroids = get_nearby_asteroids(game_state['asteroids'], game_state['ships'])
-
-        state_to_send = {
-            't': 'gu',
-            's': [ship.to_dict() for ship in game_state['ships']],
-            'p': [
-                {
-                    'x': proj.x,
-                    'y': proj.y,
-                    'sprite_name': proj.__class__.__name__.lower(),
-                    **({'angle': proj.angle} if proj.__class__.__name__.lower() != 'bullet' else {})
-                }
-                for proj in game_state['projectiles'] if proj.alive
-            ],
-            # ensure string keys
-            'a': {f"{sector[0]},{sector[1]}": ast_list for sector, ast_list in nearby_asteroids.items()},
-            'e': game_state['explosions'],
+    def send_local_snapshot(self, address, player, game_state, tables, viewer_id, explosions):
+        """The host's own client gets the snapshot as decode_snapshot would have returned it.
+        Nothing is lost in memory, so no baseline, budget or encoding, and the tables are shared."""
+        message = {
+            'seq': player["snapshot_sequence"],
+            'tick': game_state['tick'],
             'ts': game_state['timestamp'],
-            'c': game_state['collision_events'],
+            'viewer': viewer_id,
+            'input_ack': player["input_buffer"].consumed_sequence,
+            'tables': tables,
+            'e': explosions,
+            'c': player["pending_collision_events"],
         }
-
-        self.round_coordinates(state_to_send)
-
-        message = json.dumps(state_to_send)
-        compressed_message = gzip.compress(message.encode())
-
-        # size = len(compressed_message)
-        # self.number_of_messages += 1
-        # if self.number_of_messages == 1:
-        #     self.running_average = size
-        # else:
-        #     self.running_average = ((self.running_average * (
-        #             self.number_of_messages - 1)) + size) / self.number_of_messages
-        #
-        # # print(f"[SERVER] Running average: {self.running_average:.1f} bytes")
-
-        for address in self.connected_players:
-            self.network_layer.send_to(compressed_message, address)
-
-    # Compression
-    def round_coordinates(self, obj):
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                if key in ['x', 'y', 'dx', 'dy', 'a'] and isinstance(value, (int, float)):
-                    obj[key] = int(round(value))
-                elif isinstance(value, (dict, list)):
-                    self.round_coordinates(value)
-
-
-
-        elif isinstance(obj, list):
-            for item in obj:
-                self.round_coordinates(item)
+        player["pending_explosions"] = []
+        player["pending_collision_events"] = []
+        self.network_layer.send_local(message, address)
@@ -91,6 +91,7 @@ ROTATION_SPEED = 6
 BOOST_THRUST = 5
 BOOST_FUEL = 5
 PARRY_RANGE = 45
+AI_SHIP_SPRITES = ["aiShip", "aiShip2", "aiShip3", "aiShip4"]
 
 # Battleship stuff
 BS_THRUST = 3
@@ -111,7 +112,45 @@ MAX_ROCKETS = 20
 MAX_BULLETS = 300
 BULLET_SPEED = 30
 
+# Network stuff
+SNAPSHOT_HISTORY_SIZE = 32  # Delta baselines kept per client, older acks fall back to a keyframe
+INTEREST_MARGIN = 300  # Sent beyond a client's view and radar so entities don't pop in at the edges
+INPUT_REDUNDANCY = 4  # Input frames repeated in every input packet, covers this many lost packets in a row
+INPUT_BUFFER_MIN = 1  # Input frames the server holds per player before consuming one per tick
+INPUT_BUFFER_MAX = 6
+INPUT_BUFFER_WINDOW = 120  # Ticks without running dry before the buffer tries to get shallower
+INPUT_REPEAT_LIMIT = 6  # Ticks held buttons are repeated for while a player's input is late, then they're let go
+INTERPOLATION_DELAY = 0.1  # Seconds remote entities are drawn behind the newest snapshot, about two snapshots at 20 Hz
+PREDICTION_BUFFER_SIZE = 120  # Unacknowledged inputs kept for replay, two seconds at 60 Hz
+SNAPSHOT_RATE = 30  # Snapshots per second clients ask the server for
+MAX_EXTRAPOLATION = 0.25  # Seconds remote entities keep moving past the newest snapshot when snapshots stop arriving
+SNAPSHOT_MTU = 1200  # Largest snapshot in bytes, one datagram that fits about any path without IP fragmentation
+BANDWIDTH_START = 32000  # Bytes per second a new client's snapshots may use
+BANDWIDTH_MIN = 8000
+BANDWIDTH_MAX = 256000
+BANDWIDTH_INCREASE = 4000  # Added each congestion window without loss while snapshots were cut short by the budget
+CONGESTION_WINDOW = 0.5  # Seconds between bandwidth adjustments
+LOSS_THRESHOLD = 0.05  # Fraction of snapshots lost in a window that halves the bandwidth
+RTT_THRESHOLD = 0.05  # Seconds the round trip can grow over its minimum before it counts as queueing
+LOSS_TIMEOUT = 0.25  # Shortest wait before an unacknowledged snapshot counts as lost
+PRIORITY_DISTANCE = 1000  # An entity this far from the viewer builds up priority half as fast
+MAX_SNAPSHOT_EVENTS = 8  # Explosions, and collision events, per snapshot, the rest wait so they can't eat the budget
+MAX_DATAGRAM = 1200  # Bigger messages are sent as fragments of at most this many bytes
+FRAGMENT_TIMEOUT = 0.5  # Seconds a partly received message waits for its missing fragments
+MAX_PARTIAL_MESSAGES = 64  # Partly received messages kept at once, the oldest is dropped beyond this
+RELIABLE_RESEND_TIME = 0.2  # Seconds before an unacked control message is resent, doubling each time
+RELIABLE_MAX_RESEND_TIME = 2.0
+RELIABLE_WINDOW = 32  # Control messages a receiver holds past a gap, later ones wait for a resend
+KEEPALIVE_INTERVAL = 1.0  # Seconds between keepalives from a client that has nothing else to send
+CLIENT_TIMEOUT = 5.0  # Seconds of silence before the server drops a client and despawns its ship
+RELIABLE_IDLE_TIMEOUT = 2 * CLIENT_TIMEOUT  # Seconds of silence before a server drops a reliable channel, players time out first
+NETWORK_STATS_INTERVAL = 10  # Seconds between network stats log lines, 0 to disable
 
-
-
-
+# Server loop stuff
+SERVER_TICK_RATE = 60  # Simulation ticks per second on a dedicated server
+SERVER_SEND_RATE = 60  # Most snapshots per second a client can ask for, at most the tick rate
+SERVER_PORT = 4242
+SPIN_TIME = 0.002  # Final stretch before a tick is busy-waited, sleep() overshoots by about this much
+MAX_TICKS_BEHIND = 5  # Past this the loop drops ticks instead of trying to catch up
+TICK_STATS_INTERVAL = 10  # Seconds between tick timing log lines
+LAG_COMPENSATION_TICKS = 15  # Furthest back hits are checked against the shooter's view, 250 ms at 60 Hz
@@ -0,0 +1,103 @@
+from game.settings import *
+
+
+class ReceivedSequences:
+    """Client side. Which of the last 33 snapshot sequences arrived, decoded or not,
+    so the server can tell real loss from snapshots the client skipped."""
+
+    def __init__(self):
+        self.newest = 0
+        self.bits = 0  # bit i set when newest - i arrived
+
+    def add(self, sequence):
+        if sequence > self.newest:
+            self.bits = ((self.bits << (sequence - self.newest)) | 1) & 0x1FFFFFFFF
+            self.newest = sequence
+        elif self.newest - sequence < 33:
+            self.bits |= 1 << (self.newest - sequence)
+
+    def bits_before(self, sequence):
+        """Ack bits for sequence, bit i set when sequence - 1 - i arrived"""
+        shift = self.newest - sequence
+        if shift < 0 or shift > 32:
+            return 0
+        return (self.bits >> (shift + 1)) & 0xFFFFFFFF
+
+    def clear(self):
+        self.newest = 0
+        self.bits = 0
+
+
+class CongestionControl:
+    """Server side, one per client. Snapshot bandwidth grows by a fixed step each
+    window the client could have used more, and halves when snapshots get lost or
+    the round trip climbs above its floor (AIMD)."""
+
+    def __init__(self, bandwidth=BANDWIDTH_START):
+        self.bandwidth = bandwidth  # Bytes per second
+        self.in_flight = {}  # sequence -> send time
+        self.srtt = None
+        self.min_rtt = None
+
+        # Current window
+        self.window_start = None
+        self.delivered = 0
+        self.lost = 0
+        self.limited = False
+
+    def snapshot_budget(self, snapshot_rate):
+        """Bytes one snapshot may use at the given snapshots per second"""
+        return int(min(SNAPSHOT_MTU, self.bandwidth / snapshot_rate))
+
+    def on_sent(self, sequence, now, limited=False):
+        """limited is whether the budget held back entities from this snapshot.
+        Returns how many earlier snapshots were found lost."""
+        self.in_flight[sequence] = now
+        self.limited = self.limited or limited
+
+        if self.window_start is None:
+            self.window_start = now
+        elif now - self.window_start >= CONGESTION_WINDOW:
+            return self.adjust(now)
+        return 0
+
+    def on_ack(self, sequence, received_bits, now):
+        """Returns how many snapshots this ack confirmed for the first time"""
+        delivered = self.delivered
+        sent_time = self.in_flight.pop(sequence, None)
+        if sent_time is not None:
+            self.delivered += 1
+            rtt = now - sent_time
+            self.srtt = rtt if self.srtt is None else self.srtt + (rtt - self.srtt) * 0.125
+            self.min_rtt = rtt if self.min_rtt is None else min(self.min_rtt, rtt)
+
+        sequence -= 1
+        while received_bits:
+            if received_bits & 1 and self.in_flight.pop(sequence, None) is not None:
+                self.delivered += 1
+            received_bits >>= 1
+            sequence -= 1
+        return self.delivered - delivered
+
+    def adjust(self, now):
+        """Apply this window's verdict to the bandwidth, returns the snapshots found lost"""
+        timeout = max(LOSS_TIMEOUT, 2 * self.srtt) if self.srtt is not None else LOSS_TIMEOUT
+        lost = [sequence for sequence, sent_time in self.in_flight.items() if now - sent_time > timeout]
+        for sequence in lost:
+            del self.in_flight[sequence]
+        self.lost += len(lost)
+
+        total = self.delivered + self.lost
+        loss = self.lost / total if total else 0
+        queueing = self.srtt is not None and self.srtt - self.min_rtt > RTT_THRESHOLD
+
+        if loss > LOSS_THRESHOLD or queueing:
+            self.bandwidth = max(BANDWIDTH_MIN, self.bandwidth / 2)
+        elif self.limited:
+            self.bandwidth = min(BANDWIDTH_MAX, self.bandwidth + BANDWIDTH_INCREASE)
+
+        self.window_start = now
+        self.delivered = 0
+        self.lost = 0
+        self.limited = False
+        return len(lost)
@@ -0,0 +1,86 @@
+import struct
+import time
+from game.settings import *
+
+FRAGMENT_MAGIC = 0xAA
+# magic, message id, fragment index, fragment count
+FRAGMENT_HEADER = struct.Struct('<BHBB')
+FRAGMENT_PAYLOAD = MAX_DATAGRAM - FRAGMENT_HEADER.size
+MAX_FRAGMENTS = 255
+
+
+def is_fragment(data):
+    return len(data) > FRAGMENT_HEADER.size and data[0] == FRAGMENT_MAGIC
+
+
+class Fragmenter:
+    """Splits messages too big for one datagram into numbered fragments"""
+
+    def __init__(self):
+        self.message_id = 0
+
+    def split(self, message):
+        """Datagrams to send for message, just the message itself when it fits"""
+        if len(message) <= MAX_DATAGRAM:
+            return [message]
+
+        count = -(-len(message) // FRAGMENT_PAYLOAD)
+        if count > MAX_FRAGMENTS:
+            raise ValueError(f"Message of {len(message)} bytes needs more than {MAX_FRAGMENTS} fragments")
+
+        self.message_id = (self.message_id + 1) & 0xFFFF
+        fragments = []
+        with memoryview(message) as view:
+            for index in range(count):
+                chunk = view[index * FRAGMENT_PAYLOAD:(index + 1) * FRAGMENT_PAYLOAD]
+                fragments.append(FRAGMENT_HEADER.pack(FRAGMENT_MAGIC, self.message_id, index, count) + chunk)
+        return fragments
+
+
+class Reassembler:
+    """Puts fragments back together per sender. A message missing a fragment for
+    longer than FRAGMENT_TIMEOUT is dropped as a whole, newer ones don't wait on it."""
+
+    def __init__(self, timeout=FRAGMENT_TIMEOUT, max_partial=MAX_PARTIAL_MESSAGES):
+        self.timeout = timeout
+        self.max_partial = max_partial
+        self.partial = {}  # (address, message id) -> [first seen, fragments, fragments still missing]
+        self.dropped_messages = 0
+
+    def add(self, data, address, now=None):
+        """The whole message once its last fragment arrives, otherwise None"""
+        if now is None:
+            now = time.time()
+        _, message_id, index, count = FRAGMENT_HEADER.unpack_from(data, 0)
+        if index >= count:
+            return None
+
+        key = (address, message_id)
+        entry = self.partial.get(key)
+        if entry is None or len(entry[1]) != count:
+            self.expire(now)
+            entry = [now, [None] * count, count]
+            self.partial[key] = entry
+
+        fragments = entry[1]
+        if fragments[index] is None:
+            fragments[index] = bytes(data[FRAGMENT_HEADER.size:])  # data may be a view of a reused buffer
+            entry[2] -= 1
+        if entry[2]:
+            return None
+
+        del self.partial[key]
+        return b''.join(fragments)
+
+    def expire(self, now):
+        for key in [key for key, entry in self.partial.items() if now - entry[0] > self.timeout]:
+            del self.partial[key]
+            self.dropped_messages += 1
+
+        # Dicts keep insertion order, the oldest goes first when there are too many
+        while len(self.partial) >= self.max_partial:
+            del self.partial[next(iter(self.partial))]
+            self.dropped_messages += 1
+
+    def clear(self):
+        self.partial.clear()
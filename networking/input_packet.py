@@ -0,0 +1,105 @@
+import struct
+from collections import deque
+from game.settings import *
+
+INPUT_MAGIC = 0xA9
+
+# Bit order of the button mask, held keys first then the one-frame presses
+BUTTONS = ('w', 'a', 's', 'd', 'shift', 'space', 'l', 'mouse_left',
+           'r_pressed', 't_pressed', '1_pressed', '2_pressed', 'x_pressed', 'alt_pressed')
+BUTTON_BITS = {name: 1 << index for index, name in enumerate(BUTTONS)}
+PRESS_MASK = sum(bit for name, bit in BUTTON_BITS.items() if name.endswith('_pressed'))
+HELD_MASK = sum(BUTTON_BITS.values()) & ~PRESS_MASK
+
+# magic, sequence of the newest frame, frame count, server tick the client was looking at, then the frames oldest first
+INPUT_HEADER = struct.Struct('<BIBI')
+# buttons, aim x, aim y
+INPUT_FRAME = struct.Struct('<Hhh')
+
+
+def clamp_aim(value):
+    return max(-32768, min(32767, int(round(value))))
+
+
+class InputFrame:
+    """One frame of player input as decoded from the wire. Reads like the
+    input dict apply_inputs_to_ship expects without building one."""
+    __slots__ = ('sequence', 'buttons', 'aim_x', 'aim_y', 'view_tick')
+
+    def __init__(self, sequence, buttons, aim_x, aim_y, view_tick=None):
+        self.sequence = sequence
+        self.buttons = buttons
+        self.aim_x = aim_x
+        self.aim_y = aim_y
+        self.view_tick = view_tick  # Server tick of the remote entities on the player's screen, None before any
+
+    def get(self, key, default=None):
+        bit = BUTTON_BITS.get(key)
+        if bit is not None:
+            return bool(self.buttons & bit)
+        if key == 'mouse_world_pos':
+            return self.aim_x, self.aim_y
+        return default
+
+    def __contains__(self, key):
+        return key in BUTTON_BITS or key == 'mouse_world_pos'
+
+    def __getitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        return self.get(key)
+
+
+def pack_buttons(input_data):
+    buttons = 0
+    for name, bit in BUTTON_BITS.items():
+        if input_data.get(name):
+            buttons |= bit
+    return buttons
+
+
+def is_input_packet(data):
+    if len(data) < INPUT_HEADER.size or data[0] != INPUT_MAGIC:
+        return False
+    return len(data) == INPUT_HEADER.size + data[5] * INPUT_FRAME.size
+
+
+class InputHistory:
+    """Client side. Every packet repeats the last few frames so the server can
+    recover the ones lost on the way, one-frame presses included."""
+
+    def __init__(self, size=INPUT_REDUNDANCY):
+        self.frames = deque(maxlen=size)
+        self.sequence = 0
+
+    def encode(self, input_data, view_tick=None):
+        aim_x, aim_y = input_data.get('mouse_world_pos', (0, 0))
+        self.sequence += 1
+        self.frames.append(INPUT_FRAME.pack(pack_buttons(input_data), clamp_aim(aim_x), clamp_aim(aim_y)))
+
+        header = INPUT_HEADER.pack(INPUT_MAGIC, self.sequence & 0xFFFFFFFF, len(self.frames),
+                                   max(0, int(view_tick or 0)) & 0xFFFFFFFF)  # 0 on the wire for None
+        return header + b''.join(self.frames)
+
+    def clear(self):
+        self.frames.clear()
+        self.sequence = 0
+
+
+def peek_input_sequence(data):
+    """Sequence of the newest frame in the packet"""
+    return INPUT_HEADER.unpack_from(data)[1]
+
+
+def decode_input(data, last_sequence=0):
+    """Frames newer than last_sequence, oldest first"""
+    magic, sequence, count, view_tick = INPUT_HEADER.unpack_from(data)
+    first_sequence = sequence - count + 1
+    frames = []
+    for index in range(max(0, last_sequence - first_sequence + 1), count):
+        buttons, aim_x, aim_y = INPUT_FRAME.unpack_from(data, INPUT_HEADER.size + index * INPUT_FRAME.size)
+        # Older frames were sent one tick earlier each, server ticks start at 1 so 0 means no view yet
+        age = count - 1 - index
+        frame_view_tick = view_tick - age if view_tick > age else None
+        frames.append(InputFrame(first_sequence + index, buttons, aim_x, aim_y, frame_view_tick))
+    return frames
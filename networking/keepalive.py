@@ -0,0 +1,20 @@
+KEEPALIVE_MAGIC = 0xAC
+KEEPALIVE = bytes([KEEPALIVE_MAGIC])
+
+
+def is_keepalive(data):
+    return len(data) == 1 and data[0] == KEEPALIVE_MAGIC
+
+
+class Keepalive:
+    """Sends a keepalive when nothing else has gone to the server for a while,
+    so quiet clients in the lobby or pause menu aren't timed out."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.last_sent = None
+
+    def maybe_send(self, network_layer, address, now):
+        if self.last_sent is None or now - self.last_sent >= self.interval:
+            network_layer.send_to(KEEPALIVE, address)
+            self.last_sent = now
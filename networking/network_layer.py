@@ -1,4 +1,14 @@
 import socket
+import time
+from collections import deque
+from networking.fragmentation import Fragmenter, Reassembler, is_fragment
+from networking.reliable_channel import ReliableChannel, is_reliable
+from networking.network_stats import NetworkStats
+from networking.local_transport import LocalNetworkLayer, LOCAL_ADDRESS
+from game.settings import RELIABLE_IDLE_TIMEOUT
+
+RESEND_CHECK_INTERVAL = 0.02
+RECEIVE_BUFFER_SIZE = 65536  # Largest UDP datagram, anything bigger would be truncated
 
 
 class NetworkLayer:
@@ -7,6 +17,23 @@ class NetworkLayer:
         self.bind_socket = bind_socket
         self.port = port
         self.host = host
+        self.fragmenter = Fragmenter()
+        self.reassembler = Reassembler()
+
+        # Reliable ordered control messages, multiplexed on the same socket
+        self.channels = {}  # address -> ReliableChannel
+        self.delivered = deque()  # Reliable messages that became deliverable together
+        self.next_resend_check = 0
+
+        self.stats = NetworkStats()
+
+        # The host's own client, when there is one in this process
+        self.local_peer = None
+        self.local_inbox = deque()
+
+        # Datagrams are received into this one buffer, instead of a fresh bytes object each
+        self.receive_buffer = bytearray(RECEIVE_BUFFER_SIZE)
+        self.receive_view = memoryview(self.receive_buffer)
 
     def start(self):
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -25,20 +52,113 @@ class NetworkLayer:
         else:
             print("Client socket created (no binding)")
 
-        self.socket.settimeout(0.001)
+        # An empty poll returns straight away instead of waiting out a timeout
+        self.socket.setblocking(False)
+
+    def local_client(self):
+        """Network layer for a client in this same process, see LocalNetworkLayer"""
+        self.local_peer = LocalNetworkLayer(self)
+        return self.local_peer
+
+    def is_local(self, address):
+        return address == LOCAL_ADDRESS and self.local_peer is not None
+
+    def send_local(self, message, address):
+        """Hand an object to the local client as is, for snapshots it would otherwise decode"""
+        self.local_peer.inbox.append((message, (self.host, self.port)))
 
     def send_to(self, message, address):
+        if self.is_local(address):
+            self.send_local(message, address)
+            return
+        if self.socket:
+            # Split here rather than leave it to IP, losing one of our fragments only loses this message
+            for datagram in self.fragmenter.split(message):
+                try:
+                    self.socket.sendto(datagram, address)
+                except BlockingIOError:
+                    continue  # Send buffer full, lost like any other datagram
+                self.stats.sent(address, len(datagram))
+
+    def send_reliable(self, message, address):
+        """Sent once and resent until the peer acks it, delivered in order"""
+        if self.is_local(address):
+            self.send_local(message, address)
+            return
         if self.socket:
-            self.socket.sendto(message, address)
+            self.send_to(self.channel(address).send(message, time.time()), address)
+
+    def channel(self, address):
+        channel = self.channels.get(address)
+        if channel is None:
+            channel = self.channels[address] = ReliableChannel()
+            channel.last_heard = time.time()
+        return channel
+
+    def forget(self, address):
+        """Drop the reliable channel to a peer that went away"""
+        self.channels.pop(address, None)
+        self.stats.forget(address)
+
+    def resend_reliable(self):
+        now = time.time()
+        if now < self.next_resend_check:
+            return
+        self.next_resend_check = now + RESEND_CHECK_INTERVAL
+        if self.bind_socket:
+            self.drop_idle_channels(now)
+        for address, channel in self.channels.items():
+            for packet in channel.resends(now):
+                self.send_to(packet, address)
+
+    def drop_idle_channels(self, now):
+        """Any address that sends a reliable packet gets a channel, a server drops the
+        ones it stops hearing from. Clients keep theirs, the server can be quiet for long."""
+        idle = [address for address, channel in self.channels.items()
+                if now - channel.last_heard > RELIABLE_IDLE_TIMEOUT]
+        for address in idle:
+            self.forget(address)
 
     def listen_for_messages(self):
+        if self.local_inbox:
+            return self.local_inbox.popleft()
         if not self.socket:
             return None
-        try:
-            data, address = self.socket.recvfrom(65536)
-            return data, address
-        except socket.timeout:
-            return None  # No data available
-        except socket.error as e:
-            print(f"Socket error: {e}")
-            return None
+        if self.delivered:
+            return self.delivered.popleft()
+        if self.channels:
+            self.resend_reliable()
+
+        # Drain what's ready, fragments and acks are dealt with here until there's a message to hand out
+        view = self.receive_view
+        now = time.time()
+        while True:
+            try:
+                size, address = self.socket.recvfrom_into(self.receive_buffer)
+            except (BlockingIOError, socket.timeout):
+                return None  # Nothing waiting
+            except socket.error as e:
+                print(f"Socket error: {e}")
+                return None
+            self.stats.received(address, size)
+            channel = self.channels.get(address)
+            if channel is not None:
+                channel.last_heard = now
+
+            # The buffer is reused on the next receive, whatever is kept gets copied out of it
+            data = view[:size]
+            if is_fragment(data):
+                data = self.reassembler.add(data, address)
+                if data is None:
+                    continue
+
+            if not is_reliable(data):
+                return bytes(data), address
+            if channel is None:
+                channel = self.channel(address)
+            messages, ack = channel.receive(data)
+            if ack is not None:
+                self.send_to(ack, address)
+            if messages:
+                self.delivered.extend((message, address) for message in messages)
+                return self.delivered.popleft()
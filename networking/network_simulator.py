@@ -1,78 +1,196 @@
-import time
+import heapq
 import random
+import socket
+import time
+
+# One way delay ranges in seconds, measured from Austin
+LATENCY_PROFILES = {
+    "Denver": (0.010, 0.015),
+    "Victoria": (0.030, 0.036),
+    "Austin": (0.023, 0.030),
+    "Berlin": (0.121, 0.151),
+    "Tokyo": (0.153, 0.200),
+}
+
+
+class LinkConditions:
+    """What one direction of a link does to datagrams.
+
+    latency plus jitter, drawn 'uniform' within +-jitter or 'normal' with jitter as
+    the standard deviation. Random loss, plus loss bursts: a burst starts with
+    probability burst_chance per datagram and drops everything for burst_length
+    datagrams on average. reorder holds a datagram back by reorder_delay so later
+    ones overtake it, duplicate delivers a second copy. bandwidth in bytes per
+    second queues datagrams behind each other, and drops them once that queue is
+    longer than queue_limit seconds.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, distribution='uniform', loss=0.0, burst_chance=0.0,
+                 burst_length=5, reorder=0.0, reorder_delay=0.05, duplicate=0.0, bandwidth=None,
+                 queue_limit=0.5):
+        if distribution not in ('uniform', 'normal'):
+            raise ValueError(f"Unknown latency distribution {distribution}")
+        if burst_length < 1:
+            raise ValueError(f"burst_length is an average number of datagrams, at least 1, got {burst_length}")
+        self.latency = latency
+        self.jitter = jitter
+        self.distribution = distribution
+        self.loss = loss
+        self.burst_chance = burst_chance
+        self.burst_length = burst_length
+        self.reorder = reorder
+        self.reorder_delay = reorder_delay
+        self.duplicate = duplicate
+        self.bandwidth = bandwidth
+        self.queue_limit = queue_limit
+
+    @classmethod
+    def from_profile(cls, name, **overrides):
+        low, high = LATENCY_PROFILES[name]
+        overrides.setdefault('latency', (low + high) / 2)
+        overrides.setdefault('jitter', (high - low) / 2)
+        return cls(**overrides)
+
+
+class ImpairedLink:
+    """Applies LinkConditions to a stream of datagrams, in virtual or real time"""
+
+    def __init__(self, conditions, rng):
+        self.conditions = conditions
+        self.rng = rng
+        self.pending = []  # heap of (delivery time, order, data, address)
+        self.order = 0
+        self.in_burst = False
+        self.link_free = 0.0
+
+        self.sent = 0
+        self.dropped = 0
+        self.duplicated = 0
+
+    def push(self, data, address, now):
+        conditions = self.conditions
+        rng = self.rng
+        self.sent += 1
+
+        # Two state loss model, bursts of loss on top of the random kind
+        if self.in_burst:
+            self.in_burst = rng.random() >= 1 / conditions.burst_length
+        elif conditions.burst_chance and rng.random() < conditions.burst_chance:
+            self.in_burst = True
+        if self.in_burst or (conditions.loss and rng.random() < conditions.loss):
+            self.dropped += 1
+            return
+
+        departure = now
+        if conditions.bandwidth:
+            start = max(now, self.link_free)
+            if start - now > conditions.queue_limit:
+                self.dropped += 1
+                return
+            self.link_free = start + len(data) / conditions.bandwidth
+            departure = self.link_free
+
+        self.schedule(data, address, departure)
+        if conditions.duplicate and rng.random() < conditions.duplicate:
+            self.duplicated += 1
+            self.schedule(data, address, departure)
+
+    def schedule(self, data, address, departure):
+        conditions = self.conditions
+        if conditions.distribution == 'normal':
+            delay = self.rng.gauss(conditions.latency, conditions.jitter)
+        else:
+            delay = conditions.latency + self.rng.uniform(-conditions.jitter, conditions.jitter)
+        if conditions.reorder and self.rng.random() < conditions.reorder:
+            delay += conditions.reorder_delay
+
+        self.order += 1
+        heapq.heappush(self.pending, (departure + max(0.0, delay), self.order, data, address))
+
+    def pop_due(self, now):
+        """Next datagram whose time has come as (data, address), or None"""
+        if self.pending and self.pending[0][0] <= now:
+            _, _, data, address = heapq.heappop(self.pending)
+            return data, address
+        return None
+
+
+class SimulatedSocket:
+    """Stands in for a NetworkLayer's UDP socket. Datagrams still go over the real
+    socket, but only once the outgoing link lets them through, and received ones
+    are held back by the incoming link before NetworkLayer sees them."""
+
+    def __init__(self, inner, outgoing, incoming, clock):
+        self.inner = inner
+        self.outgoing = outgoing
+        self.incoming = incoming
+        self.clock = clock
+
+    def sendto(self, data, address):
+        self.outgoing.push(bytes(data), address, self.clock())
+        self.flush()
+        return len(data)
+
+    def flush(self):
+        now = self.clock()
+        while True:
+            due = self.outgoing.pop_due(now)
+            if due is None:
+                break
+            try:
+                self.inner.sendto(*due)
+            except BlockingIOError:
+                self.outgoing.dropped += 1  # Send buffer full, the link lost it after all
+
+    def recvfrom(self, buffer_size):
+        self.flush()
+
+        # Everything the real socket has goes through the incoming link first
+        while True:
+            try:
+                data, address = self.inner.recvfrom(buffer_size)
+            except (socket.timeout, BlockingIOError):
+                break
+            self.incoming.push(data, address, self.clock())
+
+        due = self.incoming.pop_due(self.clock())
+        if due is None:
+            raise BlockingIOError()  # Like the real non-blocking socket with nothing waiting
+        return due
+
+    def recvfrom_into(self, buffer, nbytes=0):
+        data, address = self.recvfrom(nbytes or len(buffer))
+        size = min(len(data), len(buffer))
+        buffer[:size] = data[:size]
+        return size, address
+
+    def close(self):
+        self.inner.close()
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
 
 
 class NetworkSimulator:
-    def __init__(self):
-        self.pending_server_messages = []
-        self.pending_client_messages = []
-        self.chance_to_packet_loss = 0.0001
-        self.chance_to_drop_connection = 0.00001
-
-        self.connecting_from = "Austin"
-
-        if self.connecting_from == "Denver":
-            self.delay_low = 0.01  # 10ms
-            self.delay_high = 0.015  # 15ms
-        if self.connecting_from == "Victoria":
-            self.delay_low = 0.030  # 30ms
-            self.delay_high = 0.036  # 36ms
-        if self.connecting_from == "Austin":
-            self.delay_low = 0.023  # 35ms
-            self.delay_high = 0.03  # 45ms
-        if self.connecting_from == "Berlin":
-            self.delay_low = 0.121  # 121ms
-            self.delay_high = 0.151  # 151ms
-        if self.connecting_from == "Tokyo":
-            self.delay_low = 0.153  # 153ms
-            self.delay_high = 0.200  # 200ms
-
-    def packet_loss(self):
-        pass
-
-    def send_to_server(self, message):
-        jitter = 0.005
-        delay = random.uniform(self.delay_low, self.delay_high)
-        delivery_time = time.time() + delay + random.uniform(-jitter, jitter)
-        self.pending_server_messages.append((message, delivery_time))
-
-    def get_server_messages(self):
-        # Connection drop check (rare)
-        if random.random() < self.chance_to_drop_connection:
-            self.pending_server_messages = []
-            return []
-
-        current_time = time.time()
-        ready_messages = []
-        still_pending = []
-
-        for message, delivery_time in self.pending_server_messages:
-            if random.random() < self.chance_to_packet_loss:
-                continue
-
-            if current_time >= delivery_time:
-                ready_messages.append(message)
-            else:
-                still_pending.append((message, delivery_time))
-
-        self.pending_server_messages = still_pending
-        return ready_messages
-
-    def send_to_client(self, message):
-        delay = random.uniform(self.delay_low, self.delay_high)
-        delivery_time = time.time() + delay
-        self.pending_client_messages.append((message, delivery_time))
-
-    def get_client_messages(self):
-        current_time = time.time()
-        ready_messages = []
-        still_pending = []
-
-        for message, delivery_time in self.pending_client_messages:
-            if current_time >= delivery_time:
-                ready_messages.append(message)
-            else:
-                still_pending.append((message, delivery_time))
-
-        self.pending_client_messages = still_pending
-        return ready_messages
+    """Seeded bad network for NetworkLayer. Wrap a started layer and the real
+    Server and Client code runs over it unchanged. The same seed, conditions and
+    clock give the same drops, delays and duplicates every run.
+
+        simulator = NetworkSimulator(seed=1, outgoing=LinkConditions.from_profile("Berlin", loss=0.02))
+        simulator.wrap(network_layer)
+    """
+
+    def __init__(self, seed=0, outgoing=None, incoming=None, clock=time.time):
+        self.clock = clock
+        # A random stream per direction, so one side's traffic doesn't change what happens to the other's
+        self.outgoing = ImpairedLink(outgoing or LinkConditions(), random.Random(seed * 2))
+        self.incoming = ImpairedLink(incoming or LinkConditions(), random.Random(seed * 2 + 1))
+
+    def wrap(self, network_layer):
+        network_layer.socket = SimulatedSocket(network_layer.socket, self.outgoing, self.incoming, self.clock)
+        return network_layer
+
+    def summary(self):
+        return (f"out {self.outgoing.sent} sent {self.outgoing.dropped} dropped {self.outgoing.duplicated} duplicated | "
+                f"in {self.incoming.sent} received {self.incoming.dropped} dropped "
+                f"{self.incoming.duplicated} duplicated")
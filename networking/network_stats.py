@@ -0,0 +1,120 @@
+from game.settings import *
+
+
+class PeerStats:
+    """Traffic to and from one peer over the current stats window"""
+
+    def __init__(self):
+        self.reset()
+        self.rtt = None  # Smoothed, kept across windows
+
+    def reset(self):
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self.packets_received = 0
+        self.bytes_received = 0
+
+        self.snapshots = 0
+        self.snapshot_bytes = 0  # As sent, delta encoded and cut to the budget
+        self.keyframe_bytes = 0  # What the same snapshots would have been as keyframes
+        self.codec_time = 0  # Encoding on the server, decoding on the client
+        self.max_codec_time = 0
+
+        self.delivered = 0
+        self.lost = 0
+        self.out_of_order = 0
+        self.duplicates = 0
+
+    def record_snapshot(self, size, keyframe_size, codec_time):
+        self.snapshots += 1
+        self.snapshot_bytes += size
+        self.keyframe_bytes += keyframe_size
+        self.codec_time += codec_time
+        self.max_codec_time = max(self.max_codec_time, codec_time)
+
+    def rates(self, elapsed):
+        """Per second figures and averages for a window of elapsed seconds"""
+        snapshots = self.snapshots or 1
+        total = self.delivered + self.lost
+        return {
+            'packets_sent': self.packets_sent / elapsed,
+            'bytes_sent': self.bytes_sent / elapsed,
+            'packets_received': self.packets_received / elapsed,
+            'bytes_received': self.bytes_received / elapsed,
+            'snapshots': self.snapshots / elapsed,
+            'snapshot_size': self.snapshot_bytes / snapshots,
+            'keyframe_size': self.keyframe_bytes / snapshots,
+            'codec_time': self.codec_time / snapshots,
+            'max_codec_time': self.max_codec_time,
+            'rtt': self.rtt,
+            'loss': self.lost / total if total else 0.0,
+            'out_of_order': self.out_of_order,
+            'duplicates': self.duplicates,
+        }
+
+
+def format_rates(rates):
+    rtt = f"{rates['rtt'] * 1000:.1f} ms" if rates['rtt'] is not None else "n/a"
+    return (f"out {rates['packets_sent']:.0f} pkt/s {rates['bytes_sent'] / 1024:.1f} KB/s | "
+            f"in {rates['packets_received']:.0f} pkt/s {rates['bytes_received'] / 1024:.1f} KB/s | "
+            f"snapshots {rates['snapshots']:.0f}/s avg {rates['snapshot_size']:.0f} B "
+            f"(keyframe {rates['keyframe_size']:.0f} B) | "
+            f"codec avg {rates['codec_time'] * 1000:.2f} ms max {rates['max_codec_time'] * 1000:.2f} ms | "
+            f"rtt {rtt} | loss {rates['loss'] * 100:.1f}% | out of order {rates['out_of_order']} | "
+            f"duplicates {rates['duplicates']}")
+
+
+class NetworkStats:
+    """Per peer network counters. NetworkLayer counts every datagram, the server
+    and client add what they know about snapshots. Every interval seconds the
+    window closes and its figures become available from report()."""
+
+    def __init__(self, interval=NETWORK_STATS_INTERVAL):
+        self.interval = interval
+        self.peers = {}  # address -> PeerStats
+        self.window_start = None
+        self.last_report = {}  # address -> rates of the last complete window
+
+    def peer(self, address):
+        peer = self.peers.get(address)
+        if peer is None:
+            peer = self.peers[address] = PeerStats()
+        return peer
+
+    def sent(self, address, size):
+        peer = self.peer(address)
+        peer.packets_sent += 1
+        peer.bytes_sent += size
+
+    def received(self, address, size):
+        peer = self.peer(address)
+        peer.packets_received += 1
+        peer.bytes_received += size
+
+    def roll(self, now):
+        """Close the window once interval has passed, returns whether it did"""
+        if not self.interval:
+            return False
+        if self.window_start is None:
+            self.window_start = now
+            return False
+        elapsed = now - self.window_start
+        if elapsed < self.interval:
+            return False
+
+        # Every datagram makes an entry, one that went a whole window without traffic either way is dropped
+        self.peers = {address: peer for address, peer in self.peers.items()
+                      if peer.packets_sent or peer.packets_received}
+        self.last_report = {address: peer.rates(elapsed) for address, peer in self.peers.items()}
+        for peer in self.peers.values():
+            peer.reset()
+        self.window_start = now
+        return True
+
+    def report(self):
+        """Rates per peer over the last complete window"""
+        return self.last_report
+
+    def forget(self, address):
+        self.peers.pop(address, None)
+        self.last_report.pop(address, None)
@@ -0,0 +1,88 @@
+import struct
+from game.settings import *
+
+RELIABLE_MAGIC = 0xAB
+RELIABLE_DATA = 0
+RELIABLE_ACK = 1
+
+# magic, kind, sequence, then the message
+RELIABLE_HEADER = struct.Struct('<BBI')
+# magic, kind, next sequence expected, bit i set when next + 1 + i already arrived
+RELIABLE_ACK_PACKET = struct.Struct('<BBII')
+
+
+def is_reliable(data):
+    return len(data) >= RELIABLE_HEADER.size and data[0] == RELIABLE_MAGIC
+
+
+class ReliableChannel:
+    """Reliable, ordered messages to one peer, for control traffic that must arrive
+    exactly once. Every data packet is acked right away with the next sequence
+    expected plus a bitfield of what arrived past a gap, so only the missing
+    messages get resent. Resends back off from RELIABLE_RESEND_TIME."""
+
+    def __init__(self):
+        # Sending
+        self.next_sequence = 0
+        self.unacked = {}  # sequence -> [packet, next resend time, resend interval]
+
+        # Receiving
+        self.expected = 0
+        self.early = {}  # sequence -> message that arrived ahead of a gap
+
+        self.last_heard = 0.0  # Last datagram of any kind from the peer, kept up by NetworkLayer
+
+    def send(self, message, now):
+        """The packet to put on the wire, kept for resending until acked"""
+        sequence = self.next_sequence
+        self.next_sequence += 1
+        packet = RELIABLE_HEADER.pack(RELIABLE_MAGIC, RELIABLE_DATA, sequence) + message
+        self.unacked[sequence] = [packet, now + RELIABLE_RESEND_TIME, RELIABLE_RESEND_TIME]
+        return packet
+
+    def receive(self, data):
+        """Returns (messages now deliverable in order, ack packet to reply with or None)"""
+        if data[1] == RELIABLE_ACK:
+            if len(data) == RELIABLE_ACK_PACKET.size:
+                _, _, expected, received_bits = RELIABLE_ACK_PACKET.unpack(data)
+                self.on_ack(expected, received_bits)
+            return [], None
+
+        _, _, sequence = RELIABLE_HEADER.unpack_from(data, 0)
+        if self.expected <= sequence < self.expected + RELIABLE_WINDOW:
+            self.early.setdefault(sequence, bytes(data[RELIABLE_HEADER.size:]))  # data may be a view of a reused buffer
+
+        messages = []
+        while self.expected in self.early:
+            messages.append(self.early.pop(self.expected))
+            self.expected += 1
+
+        # Acked even when it was a duplicate, our previous ack may be the one that got lost
+        return messages, self.ack_packet()
+
+    def ack_packet(self):
+        received_bits = 0
+        for sequence in self.early:
+            received_bits |= 1 << (sequence - self.expected - 1)
+        return RELIABLE_ACK_PACKET.pack(RELIABLE_MAGIC, RELIABLE_ACK, self.expected, received_bits)
+
+    def on_ack(self, expected, received_bits):
+        for sequence in [sequence for sequence in self.unacked if sequence < expected]:
+            del self.unacked[sequence]
+
+        sequence = expected + 1
+        while received_bits:
+            if received_bits & 1:
+                self.unacked.pop(sequence, None)
+            received_bits >>= 1
+            sequence += 1
+
+    def resends(self, now):
+        """Packets whose ack is overdue, oldest first"""
+        packets = []
+        for entry in self.unacked.values():
+            if now >= entry[1]:
+                entry[2] = min(entry[2] * 2, RELIABLE_MAX_RESEND_TIME)
+                entry[1] = now + entry[2]
+                packets.append(entry[0])
+        return packets
@@ -0,0 +1,459 @@
+import struct
+
+# Wire format
+SNAPSHOT_MAGIC = 0xA7
+SNAPSHOT_ACK_MAGIC = 0xA8
+PROTOCOL_VERSION = 5
+KEYFRAME_FLAG = 0x01
+NO_ENTITY = 0xFFFFFFFF  # Viewer id of clients without a ship
+
+# Quantization
+VELOCITY_SCALE = 64  # 1/64 world unit per frame
+MOTION_SCALE = 256  # Anchored velocities, 1/256 world unit per tick, drifts under 1 unit in MAX_ANCHOR_AGE ticks
+MOTION_TOLERANCE = 1.0  # Re-anchor once extrapolation drifts further than this
+MAX_ANCHOR_AGE = 255  # Ticks an anchor is kept, its age relative to the snapshot tick is sent as one byte
+ANGLE_SCALE = 65536 / 360
+
+# Enumerations, index on the wire
+SHIP_TYPES = ('ship', 'battleship')
+PROJECTILE_TYPES = ('bullet', 'rocket')
+COLLISION_TYPES = ('asteroid',)
+
+# magic, version, flags, sequence, baseline sequence, tick, timestamp, viewer ship id, last input sequence applied,
+# ship updates/removals, projectile updates/removals, asteroid updates/removals, explosions, collisions
+HEADER = struct.Struct('<BBBIIIdIIHHHHHHHH')
+# slot, generation, see EntityRegistry
+ENTITY_ID = struct.Struct('<HB')
+# x, y, r, g, b, radius
+EXPLOSION = struct.Struct('<hhBBBH')
+# type (+ ship id)
+COLLISION = struct.Struct('<B')
+STRING_LENGTH = struct.Struct('<B')
+# magic, newest sequence decoded, bit i set when sequence - 1 - i arrived too
+SNAPSHOT_ACK = struct.Struct('<BII')
+
+
+class EntityLayout:
+    """Field layout of one entity type. Numeric fields first, 's' marks a length prefixed string.
+    anchor_field is a tick that goes on the wire as its age, snapshot tick minus the tick."""
+
+    def __init__(self, fields, mask_format, anchor_field=None):
+        self.fields = fields
+        self.anchor_field = anchor_field
+        self.field_structs = [struct.Struct('<' + field) if field != 's' else None for field in fields]
+        self.numeric = struct.Struct('<' + ''.join(field for field in fields if field != 's'))
+        self.numeric_count = len(fields) - fields.count('s')
+        self.mask = struct.Struct('<' + mask_format)
+        self.full_mask = (1 << len(fields)) - 1
+
+        # A whole entity's id, mask and numbers packed in one call. Keyframes leave the mask out, it's always full.
+        numeric_format = self.numeric.format.lstrip('<')
+        self.full_entry = struct.Struct(ENTITY_ID.format + mask_format + numeric_format)
+        self.keyframe_entry = struct.Struct(ENTITY_ID.format + numeric_format)
+
+
+# x, y, dx, dy, angle, shield, health, type, name
+SHIP_LAYOUT = EntityLayout(('h', 'h', 'h', 'h', 'H', 'h', 'h', 'B', 's'), 'H')
+# anchor x, anchor y, velocity x, velocity y, anchor age, angle, type
+PROJECTILE_LAYOUT = EntityLayout(('h', 'h', 'h', 'h', 'B', 'H', 'B'), 'B', anchor_field=4)
+# anchor x, anchor y, velocity x, velocity y, anchor age, radius
+ASTEROID_LAYOUT = EntityLayout(('h', 'h', 'h', 'h', 'B', 'H'), 'B', anchor_field=4)
+
+# Table keys, in wire order
+TABLE_LAYOUTS = (('s', SHIP_LAYOUT), ('p', PROJECTILE_LAYOUT), ('a', ASTEROID_LAYOUT))
+
+
+def quantize(value, scale=1):
+    """Round to a signed 16 bit field, clamping instead of overflowing"""
+    return max(-32768, min(32767, int(round(value * scale))))
+
+
+def quantize_motion(value):
+    return quantize(value, MOTION_SCALE)
+
+
+def quantize_angle(angle):
+    return int(round((angle % 360) * ANGLE_SCALE)) & 0xFFFF
+
+
+def extrapolate(anchor, velocity, anchor_tick, tick):
+    return anchor + velocity / MOTION_SCALE * (tick - anchor_tick)
+
+
+def is_snapshot(data):
+    return len(data) >= HEADER.size and data[0] == SNAPSHOT_MAGIC
+
+
+def is_snapshot_ack(data):
+    return len(data) == SNAPSHOT_ACK.size and data[0] == SNAPSHOT_ACK_MAGIC
+
+
+def encode_snapshot_ack(sequence, received_bits=0):
+    return SNAPSHOT_ACK.pack(SNAPSHOT_ACK_MAGIC, sequence & 0xFFFFFFFF, received_bits & 0xFFFFFFFF)
+
+
+def decode_snapshot_ack(data):
+    """(sequence, received_bits). Only sequence made it into the client's history,
+    the bits just tell the server which of the ones before it got through."""
+    return SNAPSHOT_ACK.unpack_from(data, 0)[1:]
+
+
+# Quantization of live entities into records
+
+def _anchored_motion(entity, x, y, velocity_x, velocity_y, tick):
+    """Linear motion since the entity's anchor, re-anchored when extrapolation drifts
+    or the anchor gets too old for its age to fit on the wire"""
+    anchor = entity.net_anchor
+    if anchor is not None:
+        anchor_x, anchor_y, anchor_vx, anchor_vy, anchor_tick = anchor
+        if (0 <= tick - anchor_tick <= MAX_ANCHOR_AGE and
+                abs(extrapolate(anchor_x, anchor_vx, anchor_tick, tick) - x) <= MOTION_TOLERANCE and
+                abs(extrapolate(anchor_y, anchor_vy, anchor_tick, tick) - y) <= MOTION_TOLERANCE):
+            return anchor
+
+    anchor = (quantize(x), quantize(y), quantize_motion(velocity_x), quantize_motion(velocity_y), tick)
+    entity.net_anchor = anchor
+    return anchor
+
+
+def quantize_ship(ship):
+    return (quantize(ship.x), quantize(ship.y),
+            quantize(ship.dx, VELOCITY_SCALE), quantize(ship.dy, VELOCITY_SCALE),
+            quantize_angle(ship.facing_angle), quantize(ship.shield), quantize(ship.health),
+            SHIP_TYPES.index(ship.__class__.__name__.lower()), ship.owner_name)
+
+
+def quantize_projectile(projectile, tick):
+    motion = _anchored_motion(projectile, projectile.x, projectile.y,
+                              projectile.x - projectile.prev_x, projectile.y - projectile.prev_y, tick)
+    return motion + (quantize_angle(projectile.angle), PROJECTILE_TYPES.index(projectile.name))
+
+
+def quantize_asteroid(asteroid, tick):
+    motion = _anchored_motion(asteroid, asteroid.x, asteroid.y, asteroid.dx, asteroid.dy, tick)
+    return motion + (int(round(asteroid.radius)),)
+
+
+class SnapshotRecords:
+    """Quantized records for one tick, computed on first use and shared by every client's tables"""
+
+    def __init__(self, tick):
+        self.tick = tick
+        self.ships = {}
+        self.projectiles = {}
+        self.asteroids = {}
+
+    def tables(self, ships, projectiles, asteroids):
+        """Records keyed by net id. Never mutated afterwards, so histories can share them."""
+        return {
+            's': {ship.net_id: self._ship(ship) for ship in ships},
+            'p': {projectile.net_id: self._projectile(projectile) for projectile in projectiles},
+            'a': {asteroid.net_id: self._asteroid(asteroid) for asteroid in asteroids},
+        }
+
+    def _ship(self, ship):
+        record = self.ships.get(ship.net_id)
+        if record is None:
+            record = self.ships[ship.net_id] = quantize_ship(ship)
+        return record
+
+    def _projectile(self, projectile):
+        record = self.projectiles.get(projectile.net_id)
+        if record is None:
+            record = self.projectiles[projectile.net_id] = quantize_projectile(projectile, self.tick)
+        return record
+
+    def _asteroid(self, asteroid):
+        record = self.asteroids.get(asteroid.net_id)
+        if record is None:
+            record = self.asteroids[asteroid.net_id] = quantize_asteroid(asteroid, self.tick)
+        return record
+
+
+def change_mask(layout, record, previous_record):
+    """Fields of record that differ from previous_record, every field for a new entity"""
+    if previous_record is None:
+        return layout.full_mask
+    mask = 0
+    for i in range(len(record)):
+        if record[i] != previous_record[i]:
+            mask |= 1 << i
+    return mask
+
+
+def entry_size(layout, record, previous_record, keyframe=False):
+    """Bytes the encoder writes for one entity, 0 when it is unchanged"""
+    if previous_record == record:
+        return 0
+    mask = change_mask(layout, record, previous_record)
+    size = ENTITY_ID.size + (0 if keyframe else layout.mask.size)
+    for i, field_struct in enumerate(layout.field_structs):
+        if mask & (1 << i):
+            if field_struct is None:
+                size += STRING_LENGTH.size
+                if record[i] is not None:
+                    size += min(255, len(str(record[i]).encode()))
+            else:
+                size += field_struct.size
+    return size
+
+
+def fixed_size(removals, explosions, collision_events):
+    """Bytes of a snapshot that are always sent, everything but the entity updates"""
+    return (HEADER.size + removals * ENTITY_ID.size + explosions * EXPLOSION.size +
+            collision_events * (COLLISION.size + ENTITY_ID.size))
+
+
+def keyframe_size(tables, explosions, collision_events):
+    """Bytes the tables would take as a keyframe, to weigh what delta encoding saves"""
+    size = fixed_size(0, explosions, collision_events)
+    for key, layout in TABLE_LAYOUTS:
+        table = tables[key]
+        size += len(table) * layout.keyframe_entry.size
+        if layout.numeric_count < len(layout.fields):
+            for record in table.values():
+                for text in record[layout.numeric_count:]:
+                    size += STRING_LENGTH.size
+                    if text is not None:
+                        size += min(255, len(str(text).encode()))
+    return size
+
+
+def build_snapshot_tables(ships, projectiles, asteroids, tick):
+    return SnapshotRecords(tick).tables(ships, projectiles, asteroids)
+
+
+class SnapshotEncoder:
+    def __init__(self, initial_size=4096):
+        # Reused between ticks, only ever grows
+        self.buffer = bytearray(initial_size)
+        self.offset = 0
+
+    def encode(self, sequence, tick, timestamp, tables, explosions, collision_events,
+               baseline=None, baseline_sequence=0, viewer_id=None, input_sequence=0):
+        """Encode tables as a delta against baseline, or as a keyframe when there is none.
+
+        viewer_id is the net id of the receiving client's own ship, input_sequence the
+        newest of its inputs already applied to that ship, for client side prediction.
+        """
+        self.offset = 0
+        self._reserve(HEADER.size)
+        self.offset = HEADER.size
+
+        keyframe = baseline is None
+        counts = []
+        for key, layout in TABLE_LAYOUTS:
+            current = tables[key]
+            previous = baseline[key] if baseline is not None else {}
+
+            updates = 0
+            for net_id, record in current.items():
+                previous_record = previous.get(net_id)
+                if previous_record == record:
+                    continue
+                self._write_entity(layout, net_id, record, change_mask(layout, record, previous_record), tick,
+                                   keyframe)
+                updates += 1
+
+            removals = 0
+            for net_id in previous:
+                if net_id not in current:
+                    self._write_id(net_id)
+                    removals += 1
+
+            counts.append(updates)
+            counts.append(removals)
+
+        for explosion in explosions:
+            self._write_explosion(explosion)
+        for collision_event in collision_events:
+            self._write_collision(collision_event)
+
+        flags = KEYFRAME_FLAG if keyframe else 0
+        HEADER.pack_into(self.buffer, 0, SNAPSHOT_MAGIC, PROTOCOL_VERSION, flags, sequence & 0xFFFFFFFF,
+                         baseline_sequence & 0xFFFFFFFF if baseline is not None else 0, tick & 0xFFFFFFFF,
+                         timestamp, viewer_id if viewer_id is not None else NO_ENTITY, input_sequence & 0xFFFFFFFF,
+                         *counts, len(explosions), len(collision_events))
+
+        with memoryview(self.buffer) as view:
+            return bytes(view[:self.offset])
+
+    def _reserve(self, size):
+        if self.offset + size > len(self.buffer):
+            self.buffer.extend(bytes(max(size, len(self.buffer))))
+
+    def _write(self, packer, *values):
+        self._reserve(packer.size)
+        packer.pack_into(self.buffer, self.offset, *values)
+        self.offset += packer.size
+
+    def _write_string(self, text):
+        encoded = str(text).encode()[:255] if text is not None else b''
+        self._write(STRING_LENGTH, len(encoded))
+        self._reserve(len(encoded))
+        self.buffer[self.offset:self.offset + len(encoded)] = encoded
+        self.offset += len(encoded)
+
+    def _write_id(self, net_id):
+        self._write(ENTITY_ID, net_id & 0xFFFF, net_id >> 16)
+
+    def _write_entity(self, layout, net_id, record, mask, tick, keyframe=False):
+        anchor = layout.anchor_field
+        if anchor is not None:
+            record = record[:anchor] + (tick - record[anchor],) + record[anchor + 1:]
+
+        if mask == layout.full_mask:
+            numbers = record[:layout.numeric_count]
+            if keyframe:
+                self._write(layout.keyframe_entry, net_id & 0xFFFF, net_id >> 16, *numbers)
+            else:
+                self._write(layout.full_entry, net_id & 0xFFFF, net_id >> 16, mask, *numbers)
+            for text in record[layout.numeric_count:]:
+                self._write_string(text)
+            return
+
+        self._write_id(net_id)
+        self._write(layout.mask, mask)
+        for i, field_struct in enumerate(layout.field_structs):
+            if mask & (1 << i):
+                if field_struct is None:
+                    self._write_string(record[i])
+                else:
+                    self._write(field_struct, record[i])
+
+    def _write_explosion(self, explosion):
+        x, y, color, radius = explosion
+        self._write(EXPLOSION, quantize(x), quantize(y), color[0], color[1], color[2], int(radius))
+
+    def _write_collision(self, collision_event):
+        self._write(COLLISION, COLLISION_TYPES.index(collision_event['collision_type']))
+        self._write_id(collision_event['ship_id'])
+
+
+def _read_id(data, offset):
+    slot, generation = ENTITY_ID.unpack_from(data, offset)
+    return (generation << 16) | slot, offset + ENTITY_ID.size
+
+
+def _read_string(data, offset):
+    length = data[offset]
+    offset += STRING_LENGTH.size
+    if length == 0:
+        return None, offset
+    return bytes(data[offset:offset + length]).decode(), offset + length
+
+
+def _read_keyframe_entity(data, offset, layout, tick):
+    """(net id, record, offset) of a whole entity in a keyframe, id and numbers in one unpack"""
+    values = layout.keyframe_entry.unpack_from(data, offset)
+    offset += layout.keyframe_entry.size
+    record = list(values[2:])
+    for _ in range(len(layout.fields) - layout.numeric_count):
+        text, offset = _read_string(data, offset)
+        record.append(text)
+    if layout.anchor_field is not None:
+        record[layout.anchor_field] = tick - record[layout.anchor_field]
+    return (values[1] << 16) | values[0], tuple(record), offset
+
+
+def _read_entity(data, offset, layout, previous_record, tick):
+    mask, = layout.mask.unpack_from(data, offset)
+    offset += layout.mask.size
+    anchor = layout.anchor_field
+
+    if mask == layout.full_mask:
+        record = list(layout.numeric.unpack_from(data, offset))
+        offset += layout.numeric.size
+        for _ in range(len(layout.fields) - layout.numeric_count):
+            text, offset = _read_string(data, offset)
+            record.append(text)
+        if anchor is not None:
+            record[anchor] = tick - record[anchor]
+        return tuple(record), offset
+
+    if previous_record is None:
+        raise ValueError("Partial update for an entity missing from the baseline")
+
+    record = list(previous_record)
+    for i, field_struct in enumerate(layout.field_structs):
+        if mask & (1 << i):
+            if field_struct is None:
+                record[i], offset = _read_string(data, offset)
+            else:
+                record[i], = field_struct.unpack_from(data, offset)
+                offset += field_struct.size
+    if anchor is not None and mask & (1 << anchor):
+        record[anchor] = tick - record[anchor]
+    return tuple(record), offset
+
+
+def peek_sequence(data):
+    return HEADER.unpack_from(data, 0)[3]
+
+
+def decode_snapshot(data, history):
+    """Decode a snapshot against the client's own history of decoded tables.
+
+    Returns the message dict MainScene.inject_server_data consumes. Its 'tables'
+    entry should go back into the history so later deltas can build on it, and is
+    what the client's EntityStore applies in place.
+    """
+    if not is_snapshot(data):
+        raise ValueError("Not a snapshot")
+
+    header = HEADER.unpack_from(data, 0)
+    _, version, flags, sequence, baseline_sequence, tick, timestamp, viewer_id, input_sequence = header[:9]
+    counts = header[9:]
+    if version != PROTOCOL_VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}")
+
+    if flags & KEYFRAME_FLAG:
+        baseline = None
+    else:
+        baseline = history.get(baseline_sequence)
+        if baseline is None:
+            raise ValueError(f"Baseline {baseline_sequence} no longer available")
+    offset = HEADER.size
+
+    tables = {}
+    for i, (key, layout) in enumerate(TABLE_LAYOUTS):
+        table = dict(baseline[key]) if baseline is not None else {}
+
+        if baseline is None:
+            for _ in range(counts[i * 2]):
+                net_id, record, offset = _read_keyframe_entity(data, offset, layout, tick)
+                table[net_id] = record
+        else:
+            for _ in range(counts[i * 2]):
+                net_id, offset = _read_id(data, offset)
+                table[net_id], offset = _read_entity(data, offset, layout, table.get(net_id), tick)
+
+        for _ in range(counts[i * 2 + 1]):
+            net_id, offset = _read_id(data, offset)
+            table.pop(net_id, None)
+
+        tables[key] = table
+
+    explosions = []
+    for _ in range(counts[6]):
+        x, y, r, g, b, radius = EXPLOSION.unpack_from(data, offset)
+        offset += EXPLOSION.size
+        explosions.append((x, y, (r, g, b), radius))
+
+    collision_events = []
+    for _ in range(counts[7]):
+        collision_type, = COLLISION.unpack_from(data, offset)
+        offset += COLLISION.size
+        ship_id, offset = _read_id(data, offset)
+        collision_events.append({'ship_id': ship_id, 'collision_type': COLLISION_TYPES[collision_type]})
+
+    return {
+        'seq': sequence,
+        'tick': tick,
+        'ts': timestamp,
+        'viewer': viewer_id if viewer_id != NO_ENTITY else None,
+        'input_ack': input_sequence,
+        'tables': tables,
+        'e': explosions,
+        'c': collision_events,
+    }
@@ -0,0 +1,29 @@
+from collections import deque
+
+from game.settings import SNAPSHOT_HISTORY_SIZE
+
+
+class SnapshotHistory:
+    """The last few snapshot tables by sequence, used as delta baselines"""
+
+    def __init__(self, size=SNAPSHOT_HISTORY_SIZE):
+        self.size = size
+        self.snapshots = {}
+        self.order = deque()
+
+    def add(self, sequence, tables):
+        if sequence in self.snapshots:
+            return
+        self.snapshots[sequence] = tables
+        self.order.append(sequence)
+        while len(self.order) > self.size:
+            del self.snapshots[self.order.popleft()]
+
+    def get(self, sequence):
+        if sequence is None:
+            return None
+        return self.snapshots.get(sequence)
+
+    def clear(self):
+        self.snapshots.clear()
+        self.order.clear()
@@ -0,0 +1,38 @@
+import pygame
+from game.settings import *
+from rendering.sprite_manager import SpriteManager
+
+
+class EntitySprites:
+    """Client side view of the simulation entities. Maps a sprite name to a
+    surface scaled for the current display, scaling each one only once."""
+    _scaled = {}
+    _sized = {}
+
+    @classmethod
+    def get(cls, sprite_name):
+        """Sprite scaled from the camera view to the desktop resolution"""
+        if sprite_name not in cls._scaled:
+            original_sprite = SpriteManager.get_sprite(sprite_name)
+            if original_sprite:
+                screen_width, screen_height = pygame.display.get_desktop_sizes()[0]
+                scaled_width = int(original_sprite.get_width() * screen_width / CAMERA_VIEW_WIDTH)
+                scaled_height = int(original_sprite.get_height() * screen_height / CAMERA_VIEW_HEIGHT)
+                cls._scaled[sprite_name] = pygame.transform.scale(original_sprite, (scaled_width, scaled_height))
+            else:
+                cls._scaled[sprite_name] = None
+        return cls._scaled[sprite_name]
+
+    @classmethod
+    def get_sized(cls, sprite_name, size):
+        """Sprite scaled to a fixed pixel size"""
+        key = (sprite_name, size)
+        if key not in cls._sized:
+            original_sprite = SpriteManager.get_sprite(sprite_name)
+            cls._sized[key] = pygame.transform.scale(original_sprite, size) if original_sprite else None
+        return cls._sized[key]
+
+    @classmethod
+    def clear(cls):
+        cls._scaled.clear()
+        cls._sized.clear()
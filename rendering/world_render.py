@@ -4,6 +4,8 @@ import math
 import random
 from entities.ships.battleship import BattleShip
 from entities.projectiles.rocket import Rocket
+from rendering.entity_sprites import EntitySprites
+from rendering.sprite_manager import SpriteManager
 
 
 def generate_star_tiles():
@@ -159,7 +161,7 @@ class WorldRender:
             else:
                 x, y = projectile.x, projectile.y
                 angle = projectile.angle
-                sprite_name = projectile.__class__.__name__.lower()
+                sprite_name = getattr(projectile, 'sprite_name', None) or projectile.__class__.__name__.lower()
 
             if camera.is_visible(x, y):
                 screen_x, screen_y = camera.world_to_screen(x, y)
@@ -169,20 +171,9 @@ class WorldRender:
                     pygame.draw.circle(self.screen, YELLOW, (screen_x, screen_y), 3)
                 else:
                     # Handle other projectiles with sprites and rotation
-                    from rendering.sprite_manager import SpriteManager
-                    base_sprite = SpriteManager.get_sprite(sprite_name)
-
-                    if base_sprite:
-                        if sprite_name == 'rocket':
-                            # Keep original aspect ratio, just scale proportionally
-                            original_size = base_sprite.get_size()
-                            scale_factor = 0.8  # Adjust this to make it bigger/smaller
-                            size = (int(original_size[0] * scale_factor), int(original_size[1] * scale_factor))
-                            sprite = pygame.transform.scale(base_sprite, size)
-                        else:
-                            # Other projectiles
-                            sprite = pygame.transform.scale(base_sprite, (8, 4))
+                    sprite = self._get_projectile_sprite(sprite_name)
 
+                    if sprite:
                         rotated_sprite = pygame.transform.rotate(sprite, angle)
                         rotated_rect = rotated_sprite.get_rect(center=(screen_x, screen_y))
                         self.screen.blit(rotated_sprite, rotated_rect)
@@ -216,9 +207,9 @@ class WorldRender:
             if camera.is_visible(ship.x, ship.y):
                 screen_x, screen_y = camera.world_to_screen(ship.x, ship.y)
 
-                # Use cached sprite if available
-                if hasattr(ship, 'ship_sprite') and ship.ship_sprite:
-                    sprite = ship.ship_sprite
+                # Use the ship's own sprite if it has one
+                if hasattr(ship, 'sprite_name'):
+                    sprite = EntitySprites.get(ship.sprite_name)
                 else:
                     sprite = self._get_ship_sprite(ship.__class__.__name__.lower(), getattr(ship, 'owner', None))
 
@@ -267,10 +258,22 @@ class WorldRender:
                     name_rect = name_surface.get_rect(center=(screen_x, screen_y - 20))  # 20px above ship
                     self.screen.blit(name_surface, name_rect)
 
+    def _get_projectile_sprite(self, sprite_name):
+        """Get the cached sprite for a projectile type"""
+        if sprite_name == 'rocket':
+            # Keep original aspect ratio, just scale proportionally
+            base_sprite = SpriteManager.get_sprite(sprite_name)
+            if not base_sprite:
+                return None
+            original_size = base_sprite.get_size()
+            scale_factor = 0.8  # Adjust this to make it bigger/smaller
+            size = (int(original_size[0] * scale_factor), int(original_size[1] * scale_factor))
+            return EntitySprites.get_sized(sprite_name, size)
+        # Other projectiles
+        return EntitySprites.get_sized(sprite_name, (8, 4))
+
     def _get_ship_sprite(self, ship_type, owner):
         """Get appropriate sprite for ship type and owner"""
-        from rendering.sprite_manager import SpriteManager
-
         if ship_type == 'battleship':
             sprite_name = 'battleship'
             size = (80, 80)
@@ -281,8 +284,7 @@ class WorldRender:
             sprite_name = 'ship1'
             size = (40, 40)
 
-        base_sprite = SpriteManager.get_sprite(sprite_name)
-        return pygame.transform.scale(base_sprite, size) if base_sprite else None
+        return EntitySprites.get_sized(sprite_name, size)
 
     def _draw_ship_fallback(self, screen_x, screen_y, ship_type, owner):
         """Fallback circle rendering when sprite fails"""
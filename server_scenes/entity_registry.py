@@ -0,0 +1,62 @@
+from collections import deque
+
+# Net ids are (generation << INDEX_BITS) | slot
+INDEX_BITS = 16
+INDEX_MASK = (1 << INDEX_BITS) - 1
+GENERATION_MASK = 0xFF
+
+
+class EntityRegistry:
+    """Hands out small net ids for ships, projectiles and asteroids.
+
+    Slots are recycled oldest first and bump their generation on every reuse,
+    so an id a client still remembers never aliases a newer entity.
+    """
+
+    def __init__(self):
+        self.generations = []
+        self.free_slots = deque()
+        self.entities = {}
+        self.ships_by_owner = {}
+
+    def register(self, entity, owner=None):
+        if self.free_slots:
+            slot = self.free_slots.popleft()
+        else:
+            slot = len(self.generations)
+            if slot > INDEX_MASK:
+                raise RuntimeError("Out of net ids")
+            self.generations.append(0)
+
+        net_id = (self.generations[slot] << INDEX_BITS) | slot
+        entity.net_id = net_id
+        self.entities[net_id] = entity
+        if owner is not None:
+            self.ships_by_owner[owner] = entity
+        return net_id
+
+    def release(self, entity):
+        net_id = entity.net_id
+        if self.entities.get(net_id) is not entity:
+            return
+
+        del self.entities[net_id]
+        owner = getattr(entity, 'owner', None)
+        if self.ships_by_owner.get(owner) is entity:
+            del self.ships_by_owner[owner]
+
+        slot = net_id & INDEX_MASK
+        self.generations[slot] = (self.generations[slot] + 1) & GENERATION_MASK
+        self.free_slots.append(slot)
+
+    def release_dead(self):
+        """Free the ids of everything that died this tick"""
+        dead = [entity for entity in self.entities.values() if not entity.alive]
+        for entity in dead:
+            self.release(entity)
+
+    def get(self, net_id):
+        return self.entities.get(net_id)
+
+    def ship_for_owner(self, owner):
+        return self.ships_by_owner.get(owner)
@@ -0,0 +1,84 @@
+from game.settings import *
+
+
+def view_rect(x, y, margin=INTEREST_MARGIN):
+    """The world rectangle a client's camera shows when following (x, y), clamped like Camera.follow_target"""
+    left = max(0, min(x - CAMERA_VIEW_WIDTH / 2, WORLD_WIDTH - CAMERA_VIEW_WIDTH))
+    top = max(0, min(y - CAMERA_VIEW_HEIGHT / 2, WORLD_HEIGHT - CAMERA_VIEW_HEIGHT))
+    return left - margin, top - margin, left + CAMERA_VIEW_WIDTH + margin, top + CAMERA_VIEW_HEIGHT + margin
+
+
+def scan_rect(x, y, margin=INTEREST_MARGIN):
+    """View rectangle grown to cover what the radar can pick up"""
+    left, top, right, bottom = view_rect(x, y, margin)
+    reach = RADAR_PULSE_RANGE + margin
+    return min(left, x - reach), min(top, y - reach), max(right, x + reach), max(bottom, y + reach)
+
+
+def in_rect(x, y, rect):
+    return rect[0] <= x <= rect[2] and rect[1] <= y <= rect[3]
+
+
+class InterestManager:
+    """Picks the entities relevant to each client out of sector grids, rather than one list for everyone"""
+
+    def __init__(self):
+        self.ships = []
+        self.asteroids = {}
+        self.projectile_grid = {}
+        self.spectator_view = None
+
+    def rebuild(self, ships, projectiles, asteroids):
+        """Index this tick's entities. Asteroids are already kept by sector."""
+        self.ships = ships
+        self.asteroids = asteroids
+        self.spectator_view = None
+
+        self.projectile_grid = {}
+        for projectile in projectiles:
+            sector = (int(projectile.x // SECTOR_SIZE), int(projectile.y // SECTOR_SIZE))
+            if sector not in self.projectile_grid:
+                self.projectile_grid[sector] = []
+            self.projectile_grid[sector].append(projectile)
+
+    def relevant_entities(self, viewer, explosions):
+        """Ships, projectiles, asteroids and explosions the viewer's client should hear about"""
+        if viewer is None:
+            return self.spectator_entities(explosions)
+
+        view = view_rect(viewer.x, viewer.y)
+        scan = scan_rect(viewer.x, viewer.y)
+
+        # There are only ever a few dozen ships, a plain scan beats keeping a grid for them
+        ships = [ship for ship in self.ships if ship is viewer or in_rect(ship.x, ship.y, scan)]
+        projectiles = self._query(self.projectile_grid, view)
+        asteroids = self._query(self.asteroids, scan)
+        explosions = [explosion for explosion in explosions if in_rect(explosion[0], explosion[1], view)]
+
+        return ships, projectiles, asteroids, explosions
+
+    def spectator_entities(self, explosions):
+        """Clients without a ship spectate somebody else, so they get what any ship can see"""
+        if self.spectator_view is None:
+            projectiles = {}
+            asteroids = {}
+            for ship in self.ships:
+                _, ship_projectiles, ship_asteroids, _ = self.relevant_entities(ship, ())
+                for projectile in ship_projectiles:
+                    projectiles[projectile.net_id] = projectile
+                for asteroid in ship_asteroids:
+                    asteroids[asteroid.net_id] = asteroid
+            self.spectator_view = (self.ships, list(projectiles.values()), list(asteroids.values()))
+
+        ships, projectiles, asteroids = self.spectator_view
+        return ships, projectiles, asteroids, explosions
+
+    def _query(self, grid, rect):
+        left, top, right, bottom = rect
+        found = []
+        for sector_x in range(int(left // SECTOR_SIZE), int(right // SECTOR_SIZE) + 1):
+            for sector_y in range(int(top // SECTOR_SIZE), int(bottom // SECTOR_SIZE) + 1):
+                for entity in grid.get((sector_x, sector_y), ()):
+                    if entity.alive and left <= entity.x <= right and top <= entity.y <= bottom:
+                        found.append(entity)
+        return found
@@ -0,0 +1,102 @@
+from collections import deque
+from game.settings import *
+from networking.input_packet import InputFrame, HELD_MASK, PRESS_MASK
+
+
+class PlayerInputBuffer:
+    """Feeds one input frame per tick to a player's ship. Holds a few frames
+    back to absorb arrival jitter, deepening when it runs dry and getting
+    shallower again once the link has been steady for a while."""
+
+    def __init__(self, min_depth=INPUT_BUFFER_MIN, max_depth=INPUT_BUFFER_MAX, window=INPUT_BUFFER_WINDOW,
+                 repeat_limit=INPUT_REPEAT_LIMIT):
+        self.frames = deque()
+        self.newest_sequence = 0
+        self.last_input = None
+        self.consumed_sequence = 0  # Newest frame applied to the ship, acked back to the client
+
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self.target_depth = min_depth
+        self.filling = True
+
+        self.repeat_limit = repeat_limit
+        self.repeated_ticks = 0  # In a row since the last real frame
+
+        self.window = window
+        self.window_ticks = 0
+        self.window_lowest_depth = None
+        self.window_starved = False
+
+        self.starved_ticks = 0
+        self.dropped_frames = 0
+
+    def add(self, frame):
+        if frame.sequence <= self.newest_sequence:
+            return
+        self.frames.append(frame)
+        self.newest_sequence = frame.sequence
+
+        # A burst after a stall, don't let it turn into permanent latency
+        while len(self.frames) > self.max_depth * 2:
+            self.drop_oldest()
+
+    def next_input(self):
+        if self.filling:
+            if len(self.frames) < self.target_depth:
+                return self.repeat_last_input()
+            self.filling = False
+
+        self.adapt()
+
+        if not self.frames:
+            # Late input, keep doing what the player was doing and build up more slack
+            self.starved_ticks += 1
+            self.window_starved = True
+            self.target_depth = min(self.max_depth, self.target_depth + 1)
+            self.filling = True
+            return self.repeat_last_input()
+
+        self.last_input = self.frames.popleft()
+        self.repeated_ticks = 0
+        self.consumed_sequence = self.last_input.sequence
+        return self.last_input
+
+    def adapt(self):
+        depth = len(self.frames)
+        if self.window_lowest_depth is None or depth < self.window_lowest_depth:
+            self.window_lowest_depth = depth
+
+        self.window_ticks += 1
+        if self.window_ticks < self.window:
+            return
+
+        # Frames that sat in the buffer the whole window are just added latency
+        for _ in range(self.window_lowest_depth - self.target_depth):
+            self.drop_oldest()
+        if not self.window_starved and self.target_depth > self.min_depth:
+            self.target_depth -= 1
+
+        self.window_ticks = 0
+        self.window_lowest_depth = None
+        self.window_starved = False
+
+    def drop_oldest(self):
+        dropped = self.frames.popleft()
+        self.dropped_frames += 1
+        # Presses only exist for one frame, carry them over so they aren't lost
+        if self.frames:
+            self.frames[0].buttons |= dropped.buttons & PRESS_MASK
+
+    def repeat_last_input(self):
+        if self.last_input is None:
+            return None
+        last_input = self.last_input
+        # A stalled or paused client shouldn't keep thrusting and firing, only bridge short gaps
+        self.repeated_ticks += 1
+        buttons = last_input.buttons & HELD_MASK if self.repeated_ticks <= self.repeat_limit else 0
+        # The player's screen kept moving on meanwhile, don't let the rewind grow every repeated tick
+        view_tick = last_input.view_tick
+        if view_tick is not None:
+            view_tick += self.repeated_ticks
+        return InputFrame(last_input.sequence, buttons, last_input.aim_x, last_input.aim_y, view_tick)
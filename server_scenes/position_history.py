@@ -0,0 +1,46 @@
+from array import array
+from game.settings import *
+
+
+class PositionHistory:
+    """Where every ship was over the last few ticks, for lag compensated hits.
+    One ring of ticks shared by all ships, and two floats per ship per slot."""
+
+    def __init__(self, size=LAG_COMPENSATION_TICKS + 1):
+        self.size = size
+        self.ticks = array('I', [0] * size)
+        self.positions = {}  # net id -> array of x, y per slot
+        self.first_ticks = {}  # net id -> first tick recorded
+        self.tick = 0
+
+    def record(self, tick, ships):
+        slot = tick % self.size
+        self.ticks[slot] = tick
+        self.tick = tick
+        index = slot * 2
+
+        for ship in ships:
+            positions = self.positions.get(ship.net_id)
+            if positions is None:
+                positions = array('f', [0.0] * (self.size * 2))
+                self.positions[ship.net_id] = positions
+                self.first_ticks[ship.net_id] = tick
+            positions[index] = ship.x
+            positions[index + 1] = ship.y
+
+    def position_at(self, ship, rewind_ticks):
+        """Ship position rewind_ticks before the last recorded tick, clamped to what we have"""
+        positions = self.positions.get(ship.net_id)
+        if positions is None or rewind_ticks <= 0:
+            return ship.x, ship.y
+
+        rewind_ticks = min(rewind_ticks, self.size - 1)
+        tick = max(self.tick - rewind_ticks, self.first_ticks[ship.net_id])
+        slot = tick % self.size
+        if self.ticks[slot] != tick:
+            return ship.x, ship.y
+        return positions[slot * 2], positions[slot * 2 + 1]
+
+    def forget(self, ship):
+        self.positions.pop(ship.net_id, None)
+        self.first_ticks.pop(ship.net_id, None)
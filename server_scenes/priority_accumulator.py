@@ -0,0 +1,89 @@
+from game.settings import *
+from networking.snapshot_codec import TABLE_LAYOUTS, entry_size, fixed_size
+
+# How fast each kind of entity builds up priority, projectiles by type
+SHIP_PRIORITY = 4.0
+PROJECTILE_PRIORITY = (1.0, 2.0)  # bullet, rocket
+ASTEROID_PRIORITY = 0.5
+
+
+class PriorityAccumulator:
+    """Server side, one per client. Fits a snapshot into a byte budget by sending
+    the changed entities with the most accumulated priority first. Entities that
+    don't fit keep what they built up and go out in a later snapshot.
+
+    Priority grows with type and closeness to the viewer each snapshot an entity
+    is held back, so even far away asteroids get their turn eventually.
+    """
+
+    def __init__(self):
+        self.accumulated = {}  # net id -> priority built up while held back
+
+    def fit(self, tables, baseline, budget, viewer_id, explosions, collision_events):
+        """Returns (tables, limited). Held back entities keep their baseline record,
+        or are left out if the client doesn't have them yet, so the returned tables
+        are exactly what the client will have once it decodes the snapshot."""
+        previous_tables = baseline if baseline is not None else {'s': {}, 'p': {}, 'a': {}}
+
+        removals = 0
+        changed = []
+        total = 0
+        for key, layout in TABLE_LAYOUTS:
+            current = tables[key]
+            previous = previous_tables[key]
+            removals += sum(1 for net_id in previous if net_id not in current)
+            for net_id, record in current.items():
+                size = entry_size(layout, record, previous.get(net_id), baseline is None)
+                if size:
+                    changed.append((key, net_id, record, size))
+                    total += size
+
+        budget -= fixed_size(removals, len(explosions), len(collision_events))
+        if total <= budget:
+            self.accumulated = {}
+            return tables, False
+
+        # Prediction reconciles against the viewer's own ship every snapshot, it goes whatever the budget says
+        for entry in changed:
+            if entry[0] == 's' and entry[1] == viewer_id:
+                changed.remove(entry)
+                budget -= entry[3]
+                break
+
+        viewer = tables['s'].get(viewer_id)
+        accumulated = {}
+        for key, net_id, record, size in changed:
+            accumulated[net_id] = self.accumulated.get(net_id, 0) + self.priority(key, record, viewer)
+        changed.sort(key=lambda entry: accumulated[entry[1]], reverse=True)
+
+        fitted = {key: dict(table) for key, table in tables.items()}
+        for key, net_id, record, size in changed:
+            if size <= budget:
+                budget -= size
+                del accumulated[net_id]
+                continue
+
+            previous_record = previous_tables[key].get(net_id)
+            if previous_record is None:
+                del fitted[key][net_id]
+            else:
+                fitted[key][net_id] = previous_record
+
+        self.accumulated = accumulated
+        return fitted, True
+
+    def priority(self, key, record, viewer):
+        if key == 's':
+            priority = SHIP_PRIORITY
+        elif key == 'p':
+            priority = PROJECTILE_PRIORITY[record[6]]
+        else:
+            priority = ASTEROID_PRIORITY
+
+        if viewer is not None:
+            distance = ((record[0] - viewer[0]) ** 2 + (record[1] - viewer[1]) ** 2) ** 0.5
+            priority /= 1 + distance / PRIORITY_DISTANCE
+        return priority
+
+    def clear(self):
+        self.accumulated.clear()
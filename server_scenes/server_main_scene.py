@@ -5,6 +5,8 @@ from shared_util.ship_logic import *
 from shared_util.asteroid_logic import *
 from shared_util.projectile_logic import *
 from entities.ships.battleship import BattleShip
+from server_scenes.entity_registry import EntityRegistry
+from server_scenes.position_history import PositionHistory
 
 
 class ServerMainScene:
@@ -13,7 +15,13 @@ class ServerMainScene:
         self.all_ships = []
         self.all_projectiles = []
         self.explosion_events = []
+        self.tick = 0
+        self.entity_registry = EntityRegistry()
+        self.position_history = PositionHistory()
         self.all_asteroids = generate_some_asteroids(MAX_ASTEROIDS)
+        for asteroid_list in self.all_asteroids.values():
+            for asteroid in asteroid_list:
+                self.entity_registry.register(asteroid)
         self.current_asteroids = MAX_ASTEROIDS
         if self.connected_players:
             self.create_player_ships()
@@ -28,21 +36,30 @@ class ServerMainScene:
                 None
             )
             ship.owner_name = player_info['player_name']  # get the name from the dict
+            self.entity_registry.register(ship, owner=address)
             self.all_ships.append(ship)
 
+    def remove_player(self, address):
+        """Despawn a player's ship without an explosion, for clients that left"""
+        ship = self.entity_registry.ship_for_owner(address)
+        if ship is None:
+            return
+        ship.alive = False
+        self.all_ships.remove(ship)
+        self.position_history.forget(ship)
+        self.entity_registry.release(ship)
+
     def step(self, input_messages, dt):
+        self.tick += 1
         collision_events = []
 
         # Apply inputs to ships
-        for message in input_messages:
-            player_id = message.get('player_id')  # This is the network address
-            input_data = message.get('input_data')
-
+        for player_id, input_data in input_messages:  # player_id is the network address
             # Find player's ship and apply inputs
-            for ship in self.all_ships:
-                if ship.owner == player_id:  # Match network address
-                    apply_inputs_to_ship(ship, input_data)
-                    break
+            ship = self.entity_registry.ship_for_owner(player_id)
+            if ship:
+                ship.view_tick = input_data.view_tick
+                apply_inputs_to_ship(ship, input_data)
 
         # Update all ships
         for ship in self.all_ships:
@@ -51,15 +68,21 @@ class ServerMainScene:
             if check_ship_collisions(ship, self.all_asteroids):
                 collision_events.append({
                     'player_id': ship.owner,
+                    'ship_id': ship.net_id,
                     'collision_type': 'asteroid',
                 })
 
-            # Collect new projectiles
+            # Collect new projectiles, judged against the ships as the shooter saw them
+            for projectile in ship.all_projectiles:
+                self.entity_registry.register(projectile)
+                if ship.view_tick is not None:
+                    projectile.rewind_ticks = max(0, min(LAG_COMPENSATION_TICKS, self.tick - 1 - ship.view_tick))
             self.all_projectiles.extend(ship.all_projectiles)
             ship.all_projectiles.clear()
 
         # Update game objects
-        handle_projectile(self.all_projectiles, self.all_ships, self.all_asteroids, self.explosion_events)
+        handle_projectile(self.all_projectiles, self.all_ships, self.all_asteroids, self.explosion_events,
+                          self.position_history)
 
         # Handle asteroids
         asteroid_diff = handle_asteroids(self.all_asteroids)
@@ -67,10 +90,15 @@ class ServerMainScene:
 
         if self.current_asteroids < MAX_ASTEROIDS:
             for _ in range(asteroid_diff):
-                spawn_single_asteroid(self.all_asteroids)
+                self.entity_registry.register(spawn_single_asteroid(self.all_asteroids))
                 self.current_asteroids += 1
 
+        for ship in self.all_ships:
+            if not ship.alive:
+                self.position_history.forget(ship)
         self.all_ships = [ship for ship in self.all_ships if ship.alive]
+        self.position_history.record(self.tick, self.all_ships)
+        self.entity_registry.release_dead()
 
         # Send state to clients
         game_state = {
@@ -79,6 +107,7 @@ class ServerMainScene:
             'asteroids': self.all_asteroids,
             'explosions': self.explosion_events.copy(),
             'timestamp': time.time(),
+            'tick': self.tick,
             'collision_events': collision_events
         }
         self.explosion_events.clear()
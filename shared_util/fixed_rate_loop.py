@@ -0,0 +1,99 @@
+import time
+from game.settings import *
+
+
+class TickStats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.ticks = 0
+        self.total_work = 0
+        self.max_work = 0
+        self.total_interval = 0
+        self.max_interval = 0
+        self.overruns = 0
+        self.dropped_ticks = 0
+
+    def record(self, work_time, interval, tick_interval):
+        self.ticks += 1
+        self.total_work += work_time
+        self.max_work = max(self.max_work, work_time)
+        self.total_interval += interval
+        self.max_interval = max(self.max_interval, interval)
+        if work_time > tick_interval:
+            self.overruns += 1
+
+    def summary(self):
+        if not self.ticks:
+            return "no ticks"
+        return (f"{self.ticks} ticks | "
+                f"work avg {self.total_work / self.ticks * 1000:.2f} ms max {self.max_work * 1000:.2f} ms | "
+                f"interval avg {self.total_interval / self.ticks * 1000:.2f} ms "
+                f"max {self.max_interval * 1000:.2f} ms | "
+                f"overruns {self.overruns} | dropped {self.dropped_ticks}")
+
+
+class FixedRateLoop:
+    """Calls step(dt) at a fixed rate with a constant dt. Sleeps for most of the
+    wait and spins the last SPIN_TIME, since sleep() alone can't hit 60 Hz evenly.
+    clock and sleep can be swapped for fake ones to run it without real waiting."""
+
+    def __init__(self, tick_rate=SERVER_TICK_RATE, spin_time=SPIN_TIME, stats_interval=TICK_STATS_INTERVAL,
+                 clock=time.perf_counter, sleep=time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self.tick_rate = tick_rate
+        self.tick_interval = 1 / tick_rate
+        self.spin_time = spin_time
+        self.stats_interval = stats_interval
+        self.stats = TickStats()
+        self.running = False
+        self.next_tick = None
+        self.last_tick = None
+        self.last_report = None
+
+    def run(self, step, max_ticks=None):
+        self.running = True
+        self.next_tick = self.clock()
+        self.last_tick = self.next_tick
+        self.last_report = self.next_tick
+        ticks = 0
+
+        while self.running and (max_ticks is None or ticks < max_ticks):
+            self.wait_for_next_tick()
+
+            tick_start = self.clock()
+            step(self.tick_interval)
+            tick_end = self.clock()
+
+            self.stats.record(tick_end - tick_start, tick_start - self.last_tick, self.tick_interval)
+            self.last_tick = tick_start
+            self.schedule_next_tick(tick_end)
+            self.report(tick_end)
+            ticks += 1
+
+    def stop(self):
+        self.running = False
+
+    def wait_for_next_tick(self):
+        remaining = self.next_tick - self.clock()
+        if remaining > self.spin_time:
+            self.sleep(remaining - self.spin_time)
+        while self.clock() < self.next_tick:
+            pass
+
+    def schedule_next_tick(self, now):
+        self.next_tick += self.tick_interval
+
+        # A long stall shouldn't make us run a burst of back to back ticks, start the schedule over instead
+        ticks_behind = int((now - self.next_tick) / self.tick_interval)
+        if ticks_behind > MAX_TICKS_BEHIND:
+            self.stats.dropped_ticks += ticks_behind + 1
+            self.next_tick = now + self.tick_interval
+
+    def report(self, now):
+        if self.stats_interval and now - self.last_report >= self.stats_interval:
+            print(f"[SERVER] Tick stats @ {self.tick_rate} Hz: {self.stats.summary()}")
+            self.stats.reset()
+            self.last_report = now
@@ -5,12 +5,12 @@ from entities.projectiles.rocket import Rocket
 from entities.projectiles.bullet import Bullet
 
 
-def handle_projectile(all_projectiles, all_ships, all_asteroids, explosion_events):
+def handle_projectile(all_projectiles, all_ships, all_asteroids, explosion_events, position_history=None):
     projectiles_to_remove = []
 
     for projectile in all_projectiles:
         projectile.run()
-        check_projectile_collisions(projectile, all_ships, all_asteroids)
+        check_projectile_collisions(projectile, all_ships, all_asteroids, position_history)
 
         if not projectile.alive:
             projectiles_to_remove.append(projectile)
@@ -21,12 +21,14 @@ def handle_projectile(all_projectiles, all_ships, all_asteroids, explosion_event
                 explosion_events.append((projectile.x, projectile.y, CYAN, 50))
 
         if projectile.x < -100 or projectile.x > WORLD_WIDTH + 100 or projectile.y < -100 or projectile.y > WORLD_HEIGHT + 100:
+            projectile.alive = False
             projectiles_to_remove.append(projectile)
 
     remove_objects(projectiles_to_remove, all_projectiles)
 
 
-def check_projectile_collisions(projectile, ships, asteroids):
+def check_projectile_collisions(projectile, ships, asteroids, position_history=None):
+    """position_history lets the server rewind ships to where the shooter saw them"""
     # Damage values for different projectile types
     DAMAGE_VALUES = {
         "rocket": 40,
@@ -46,9 +48,14 @@ def check_projectile_collisions(projectile, ships, asteroids):
         else:
             ship_collision_radius_squared = (SHIP_HIT_BOX + COLLISION_BUFFER) ** 2
 
+        if position_history is not None and projectile.rewind_ticks:
+            ship_x, ship_y = position_history.position_at(ship, projectile.rewind_ticks)
+        else:
+            ship_x, ship_y = ship.x, ship.y
+
         if hasattr(ship, 'is_parrying'):
             if ship.is_parrying:
-                if _check_collision(projectile, ship.x, ship.y, parry_collision_radius_squared):
+                if _check_collision(projectile, ship_x, ship_y, parry_collision_radius_squared):
                     projectile.true_dx *= -1
                     projectile.true_dy *= -1
                     projectile.dx *= -1
@@ -56,7 +63,7 @@ def check_projectile_collisions(projectile, ships, asteroids):
                     projectile.owner = ship.owner
                     return
 
-        if _check_collision(projectile, ship.x, ship.y, ship_collision_radius_squared):
+        if _check_collision(projectile, ship_x, ship_y, ship_collision_radius_squared):
             _apply_ship_damage(ship, damage)
             projectile.alive = False
             return
@@ -77,7 +77,8 @@ def fire_weapon(ship, weapon_type):
         ship.all_projectiles.append(new_bullet)
 
 
-def apply_inputs_to_ship(ship, input_data):
+def apply_thrust(ship, input_data):
+    """Movement part of the inputs, also replayed on its own by client side prediction"""
     thrust = BOOST_THRUST if input_data.get('shift') and ship.current_boost_fuel > 0 else THRUST
 
     if input_data.get('w'):
@@ -91,6 +92,10 @@ def apply_inputs_to_ship(ship, input_data):
     if input_data.get('space'):
         ship.brake()
 
+
+def apply_inputs_to_ship(ship, input_data):
+    apply_thrust(ship, input_data)
+
     # Handle boost fuel
     if input_data.get('shift') and ship.current_boost_fuel > 0:
         ship.current_boost_fuel -= 1
@@ -0,0 +1,48 @@
+import unittest
+from types import SimpleNamespace
+from server_scenes.entity_registry import *
+
+
+def make_entity(owner=None):
+    return SimpleNamespace(net_id=None, owner=owner, alive=True)
+
+
+class TestEntityRegistry(unittest.TestCase):
+
+    # python -m unittest tests.test_entity_registry -v
+
+    def setUp(self):
+        self.registry = EntityRegistry()
+
+    def test_ids_are_small_and_unique(self):
+        entities = [make_entity() for _ in range(10)]
+        ids = [self.registry.register(entity) for entity in entities]
+
+        self.assertEqual(ids, list(range(10)))
+        self.assertIs(self.registry.get(4), entities[4])
+
+    def test_reused_slot_gets_new_generation(self):
+        first = make_entity()
+        old_id = self.registry.register(first)
+        self.registry.release(first)
+
+        second = make_entity()
+        new_id = self.registry.register(second)
+
+        self.assertEqual(new_id & INDEX_MASK, old_id & INDEX_MASK)
+        self.assertNotEqual(new_id, old_id)
+        self.assertIsNone(self.registry.get(old_id))
+
+    def test_owner_lookup(self):
+        ship = make_entity(owner=('127.0.0.1', 5000))
+        self.registry.register(ship, owner=ship.owner)
+        self.assertIs(self.registry.ship_for_owner(('127.0.0.1', 5000)), ship)
+
+        ship.alive = False
+        self.registry.release_dead()
+        self.assertIsNone(self.registry.ship_for_owner(('127.0.0.1', 5000)))
+        self.assertEqual(self.registry.entities, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+from client_scenes.entity_store import EntityStore
+from client_scenes.interpolation_buffer import InterpolationBuffer
+from networking.snapshot_codec import VELOCITY_SCALE, MOTION_SCALE, ANGLE_SCALE
+from game.settings import *
+
+
+def ship_record(x, y, angle=0):
+    return (x, y, VELOCITY_SCALE, 0, int(angle * ANGLE_SCALE) % 65536, 100, 10, 0, "pilot")
+
+
+def tables(ships, projectiles=None, asteroids=None):
+    return {'s': ships, 'p': projectiles or {}, 'a': asteroids or {}}
+
+
+class TestEntityStore(unittest.TestCase):
+
+    # python -m unittest tests.test_entity_store -v
+
+    def setUp(self):
+        self.store = EntityStore(max_extrapolation=0.25, tick_rate=60)
+        self.older = (10, tables({1: ship_record(100, 200), 2: ship_record(300, 400, 350)},
+                                 {3: (10, 20, MOTION_SCALE * 2, 0, 10, 0, 1)},
+                                 {4: (SECTOR_SIZE - 10, 50, MOTION_SCALE * 5, 0, 10, 80)}))
+        self.newer = (12, tables({2: ship_record(310, 400, 10), 5: ship_record(0, 0)},
+                                 self.older[1]['p'], self.older[1]['a']))
+
+    def test_updates_in_place(self):
+        self.store.apply(self.older, self.older, 10)
+        ship = self.store.ships[2]
+        projectile = self.store.projectiles[3]
+        asteroid = self.store.asteroids[4]
+
+        self.store.apply(self.older, self.newer, 11)
+
+        self.assertIs(self.store.ships[2], ship)
+        self.assertIs(self.store.projectiles[3], projectile)
+        self.assertIs(self.store.asteroids[4], asteroid)
+
+    def test_interpolates_between_snapshots(self):
+        self.store.apply(self.older, self.newer, 11)
+        ship = self.store.ships[2]
+        self.assertEqual((ship.x, ship.y), (305, 400))
+        self.assertAlmostEqual(ship.facing_angle, 360, places=2)  # Across the wrap, not through 180
+
+        self.assertEqual(self.store.projectiles[3].x, 12)
+        self.assertEqual(self.store.asteroids[4].x, SECTOR_SIZE - 5)
+        # Ship 5 only exists in the newer snapshot, it appears once the render clock gets there
+        self.assertNotIn(5, self.store.ships)
+
+    def test_extrapolates_briefly_on_loss(self):
+        self.store.apply(self.newer, self.newer, 14)
+        self.assertEqual(self.store.ships[2].x, 312)
+
+        self.store.apply(self.newer, self.newer, 100)
+        self.assertEqual(self.store.ships[2].x, 310 + 15)
+        self.assertEqual(list(self.store.asteroid_sectors), [(1, 0)])
+
+    def test_viewer_is_kept_out_of_the_ship_list(self):
+        self.store.update_viewer(1, self.older[1]['s'])
+        self.store.apply(self.older, self.older, 10)
+        self.assertEqual([ship.net_id for ship in self.store.ship_list], [2])
+        self.assertEqual(self.store.viewer_ship().x, 100)
+
+        self.store.update_viewer(None, self.older[1]['s'])
+        self.store.apply(self.older, self.older, 10)
+        self.assertEqual(len(self.store.ship_list), 2)
+        self.assertIsNone(self.store.viewer_ship())
+
+    def test_removal(self):
+        self.store.apply(self.older, self.older, 10)
+        self.store.apply((13, tables({})), (13, tables({})), 13)
+        self.assertEqual(self.store.asteroid_sectors, {})
+        self.assertEqual(self.store.ship_list, [])
+        self.assertEqual(self.store.projectile_list, [])
+
+
+class TestInterpolationBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.buffer = InterpolationBuffer(delay=0.1, tick_rate=60)
+
+    def test_renders_behind_the_newest_snapshot(self):
+        self.assertIsNone(self.buffer.update(1 / 60))
+
+        for tick in (3, 6, 9, 12):
+            self.buffer.add(tick, tables({}))
+        older, newer, render_tick = self.buffer.update(1 / 60)
+        self.assertAlmostEqual(render_tick, 7)
+        self.assertEqual((older[0], newer[0]), (6, 9))
+
+        older, newer, render_tick = self.buffer.update(2 / 60)
+        self.assertAlmostEqual(render_tick, 9)
+        self.assertEqual((older[0], newer[0]), (9, 12))
+
+    def test_runs_past_the_newest_snapshot_when_they_stop(self):
+        self.buffer.add(3, tables({}))
+        self.buffer.add(6, tables({}))
+        self.buffer.update(1 / 60)
+        for _ in range(10):
+            older, newer, render_tick = self.buffer.update(1 / 60)
+        self.assertGreater(render_tick, 6)
+        self.assertIs(older, newer)
+
+    def test_ignores_stale_snapshots(self):
+        self.buffer.add(6, tables({}))
+        self.buffer.add(3, tables({}))
+        self.assertEqual(len(self.buffer.snapshots), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
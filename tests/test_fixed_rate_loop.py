@@ -0,0 +1,72 @@
+import unittest
+from shared_util.fixed_rate_loop import FixedRateLoop
+
+
+class FakeClock:
+    """Time only moves when the loop sleeps or a step says it took a while"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestFixedRateLoop(unittest.TestCase):
+
+    # python -m unittest tests.test_fixed_rate_loop -v
+
+    def setUp(self):
+        # 64 Hz keeps every tick time exact in floating point
+        self.clock = FakeClock()
+        self.loop = FixedRateLoop(tick_rate=64, spin_time=0, stats_interval=0, clock=self.clock,
+                                  sleep=self.clock.sleep)
+        self.ticks = []
+
+    def test_runs_at_fixed_rate_with_constant_dt(self):
+        dts = []
+
+        def step(dt):
+            dts.append(dt)
+            self.ticks.append(self.clock.now)
+
+        self.loop.run(step, max_ticks=20)
+
+        self.assertEqual(dts, [1 / 64] * 20)
+        self.assertEqual(self.ticks, [i / 64 for i in range(20)])
+        self.assertEqual(self.loop.stats.ticks, 20)
+        self.assertEqual(self.loop.stats.overruns, 0)
+        self.assertEqual(self.loop.stats.dropped_ticks, 0)
+
+    def test_work_comes_out_of_the_wait(self):
+        def step(dt):
+            self.ticks.append(self.clock.now)
+            self.clock.now += 1 / 128
+
+        self.loop.run(step, max_ticks=4)
+
+        self.assertEqual(self.ticks, [0, 1 / 64, 2 / 64, 3 / 64])
+        self.assertEqual(self.clock.sleeps, [1 / 128] * 3)
+        self.assertEqual(self.loop.stats.max_work, 1 / 128)
+
+    def test_drops_ticks_after_a_long_stall(self):
+        def step(dt):
+            self.ticks.append(self.clock.now)
+            if len(self.ticks) == 1:
+                self.clock.now += 10 / 64
+
+        self.loop.run(step, max_ticks=3)
+
+        self.assertEqual(self.loop.stats.overruns, 1)
+        self.assertEqual(self.loop.stats.dropped_ticks, 10)
+        # No burst of back to back catch-up ticks after the stall, the schedule starts over
+        self.assertEqual(self.ticks, [0, 11 / 64, 12 / 64])
+
+
+if __name__ == '__main__':
+    unittest.main()
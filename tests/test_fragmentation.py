@@ -0,0 +1,80 @@
+import os
+import random
+import unittest
+from networking.fragmentation import *
+
+
+class TestFragmentation(unittest.TestCase):
+
+    # python -m unittest tests.test_fragmentation -v
+
+    def setUp(self):
+        self.fragmenter = Fragmenter()
+        self.reassembler = Reassembler(timeout=0.5, max_partial=4)
+        self.address = ('127.0.0.1', 5000)
+
+    def test_small_messages_pass_through(self):
+        message = b'\xa7' * MAX_DATAGRAM
+        self.assertEqual(self.fragmenter.split(message), [message])
+        self.assertFalse(is_fragment(message))
+
+    def test_round_trip_out_of_order(self):
+        message = os.urandom(MAX_DATAGRAM * 5 + 17)
+        fragments = self.fragmenter.split(message)
+        self.assertEqual(len(fragments), 6)
+        self.assertTrue(all(len(fragment) <= MAX_DATAGRAM and is_fragment(fragment) for fragment in fragments))
+
+        random.Random(1).shuffle(fragments)
+        # A duplicate on the way doesn't confuse it
+        fragments.insert(2, fragments[0])
+        results = [self.reassembler.add(fragment, self.address, now=0) for fragment in fragments]
+        self.assertEqual(results[-1], message)
+        self.assertTrue(all(result is None for result in results[:-1]))
+        self.assertFalse(self.reassembler.partial)
+
+    def test_senders_are_kept_apart(self):
+        first = self.fragmenter.split(b'a' * 3000)
+        second = Fragmenter().split(b'b' * 3000)
+        other = ('127.0.0.1', 5001)
+        for fragment_a, fragment_b in zip(first, second):
+            result_a = self.reassembler.add(fragment_a, self.address, now=0)
+            result_b = self.reassembler.add(fragment_b, other, now=0)
+        self.assertEqual(result_a, b'a' * 3000)
+        self.assertEqual(result_b, b'b' * 3000)
+
+    def test_fragments_received_into_one_buffer(self):
+        # NetworkLayer hands in views of the same receive buffer, overwritten by each datagram
+        message = os.urandom(MAX_DATAGRAM * 2 + 5)
+        buffer = bytearray(2048)
+        view = memoryview(buffer)
+        for fragment in self.fragmenter.split(message):
+            buffer[:len(fragment)] = fragment
+            result = self.reassembler.add(view[:len(fragment)], self.address, now=0)
+        self.assertEqual(result, message)
+
+    def test_incomplete_messages_are_dropped(self):
+        lost = self.fragmenter.split(b'x' * 3000)
+        self.assertIsNone(self.reassembler.add(lost[0], self.address, now=0))
+
+        late = self.fragmenter.split(b'y' * 3000)
+        for fragment in late:
+            result = self.reassembler.add(fragment, self.address, now=1)
+        self.assertEqual(result, b'y' * 3000)
+        self.assertEqual(self.reassembler.dropped_messages, 1)
+
+        # The missing piece of an expired message starts over instead of completing it
+        self.assertIsNone(self.reassembler.add(lost[1], self.address, now=1))
+
+    def test_partial_messages_are_bounded(self):
+        for _ in range(10):
+            self.reassembler.add(self.fragmenter.split(b'z' * 3000)[0], self.address, now=0)
+        self.assertEqual(len(self.reassembler.partial), 4)
+        self.assertEqual(self.reassembler.dropped_messages, 6)
+
+    def test_too_big(self):
+        with self.assertRaises(ValueError):
+            self.fragmenter.split(bytes(FRAGMENT_PAYLOAD * MAX_FRAGMENTS + 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
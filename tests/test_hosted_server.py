@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+import unittest
+from game.server import Server
+from game.hosted_server import HostedServer
+from networking.network_layer import NetworkLayer
+
+
+class TestHostedServer(unittest.TestCase):
+
+    # python -m unittest tests.test_hosted_server -v
+
+    def setUp(self):
+        server_layer = NetworkLayer(bind_socket=True)
+        self.client_layer = server_layer.local_client()
+        self.server = Server(server_layer, tick_rate=100, send_rate=100)
+        self.hosted = HostedServer(self.server, stats_interval=0)
+
+    def tearDown(self):
+        self.hosted.stop()
+
+    def test_keeps_ticking_through_a_slow_frame(self):
+        self.hosted.start()
+        message = {"type": "CONNECTION_ATTEMPT", "player_name": "host", "ready": True}
+        self.client_layer.send_reliable(json.dumps(message).encode(), ('127.0.0.1', 4242))
+
+        # A frame that takes far longer than a tick, nothing on this thread runs the server
+        time.sleep(0.3)
+
+        snapshots = []
+        while True:
+            message = self.client_layer.listen_for_messages()
+            if message is None:
+                break
+            if isinstance(message[0], dict):
+                snapshots.append(message[0])
+
+        self.assertGreater(len(snapshots), 10)
+        sequences = [snapshot['seq'] for snapshot in snapshots]
+        self.assertEqual(sequences, list(range(1, len(snapshots) + 1)))
+
+    def test_stop_ends_the_thread(self):
+        self.hosted.start()
+        self.assertTrue(self.hosted.is_running())
+        self.hosted.stop()
+        self.assertFalse(self.hosted.is_running())
+
+    def test_stop_frees_the_port(self):
+        server_layer = NetworkLayer(bind_socket=True, port=0)
+        server_layer.start()
+        port = server_layer.socket.getsockname()[1]
+        hosted = HostedServer(Server(server_layer), stats_interval=0)
+        hosted.start()
+        hosted.stop()
+
+        # Hosting again on the same port works
+        again = NetworkLayer(bind_socket=True, port=port)
+        again.start()
+        again.socket.close()
+
+    def test_socket_outlives_a_tick_that_overruns_stop(self):
+        server_layer = NetworkLayer(bind_socket=True, port=0)
+        server_layer.start()
+        server = Server(server_layer)
+        release = threading.Event()
+        server.run = lambda dt: release.wait()
+        hosted = HostedServer(server, stats_interval=0)
+        hosted.start()
+        time.sleep(0.05)
+
+        hosted.stop(timeout=0.05)
+        self.assertTrue(hosted.is_running())
+        self.assertNotEqual(server_layer.socket.fileno(), -1)
+
+        release.set()
+        hosted.thread.join(1.0)
+        self.assertEqual(server_layer.socket.fileno(), -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from networking.input_packet import *
+from networking.snapshot_codec import is_snapshot_ack
+
+
+class TestInputPacket(unittest.TestCase):
+
+    # python -m unittest tests.test_input_packet -v
+
+    def setUp(self):
+        self.history = InputHistory(size=4)
+        self.input_data = {
+            'w': True, 'a': False, 's': False, 'd': True,
+            'shift': 1, 'space': 0, 'l': False, 'mouse_left': True,
+            'mouse_world_pos': (1234.6, 19999.2),
+            'r_pressed': False, 't_pressed': False, '1_pressed': False,
+            '2_pressed': True, 'x_pressed': False, 'alt_pressed': False,
+        }
+
+    def test_round_trip(self):
+        data = self.history.encode(self.input_data)
+        self.assertEqual(len(data), 16)
+        self.assertTrue(is_input_packet(data))
+
+        frame, = decode_input(data)
+        self.assertEqual(frame.sequence, 1)
+        for name in BUTTONS:
+            self.assertEqual(frame.get(name), bool(self.input_data[name]), name)
+        self.assertEqual(frame['mouse_world_pos'], (1235, 19999))
+        self.assertIn('mouse_world_pos', frame)
+
+    def test_unknown_keys_use_default(self):
+        frame, = decode_input(self.history.encode({}))
+        self.assertIsNone(frame.get('timestamp'))
+        self.assertEqual(frame.get('mouse_world_pos'), (0, 0))
+        self.assertNotIn('timestamp', frame)
+
+    def test_lost_packets_are_recovered_once(self):
+        packets = [self.history.encode({'x_pressed': sequence == 3}) for sequence in range(1, 7)]
+        self.assertEqual(len(packets[-1]), 10 + 4 * 6)
+
+        # Packets 3 to 5 are lost, 6 still carries frames 3 to 6
+        applied = decode_input(packets[0], 0) + decode_input(packets[1], 1)
+        applied += decode_input(packets[5], applied[-1].sequence)
+        self.assertEqual([frame.sequence for frame in applied], [1, 2, 3, 4, 5, 6])
+        self.assertEqual([frame.get('x_pressed') for frame in applied].count(True), 1)
+
+        # A duplicate or late packet adds nothing
+        self.assertEqual(decode_input(packets[5], 6), [])
+        self.assertEqual(decode_input(packets[3], 6), [])
+
+    def test_view_tick(self):
+        self.history.encode({}, 99.6)
+        frames = decode_input(self.history.encode({}, 100.4))
+        self.assertEqual([frame.view_tick for frame in frames], [99, 100])
+
+    def test_no_view_tick_yet(self):
+        self.history.encode({})
+        frames = decode_input(self.history.encode({}, 1))
+        self.assertEqual([frame.view_tick for frame in frames], [None, 1])
+
+    def test_other_messages_are_not_inputs(self):
+        data = self.history.encode(self.input_data)
+        self.assertFalse(is_input_packet(b'{"type": "READY", "status": true}'))
+        self.assertFalse(is_input_packet(data[:-1]))
+        self.assertFalse(is_snapshot_ack(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
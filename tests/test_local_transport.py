@@ -0,0 +1,56 @@
+import json
+import unittest
+from game.server import Server
+from networking.network_layer import NetworkLayer
+from networking.local_transport import LOCAL_ADDRESS
+
+
+class TestLocalTransport(unittest.TestCase):
+
+    # python -m unittest tests.test_local_transport -v
+
+    def setUp(self):
+        # Never started, everything here has to go through memory
+        self.server_layer = NetworkLayer(bind_socket=True)
+        self.client_layer = self.server_layer.local_client()
+        self.server = Server(self.server_layer, tick_rate=60, send_rate=60)
+
+        message = {"type": "CONNECTION_ATTEMPT", "player_name": "host", "ready": True}
+        self.client_layer.send_reliable(json.dumps(message).encode(), ('127.0.0.1', 4242))
+
+    def received(self):
+        messages = []
+        while True:
+            message = self.client_layer.listen_for_messages()
+            if message is None:
+                return messages
+            messages.append(message[0])
+
+    def test_host_joins_over_memory(self):
+        self.server.run(1 / 60)
+        self.assertEqual(list(self.server.connected_players), [LOCAL_ADDRESS])
+        self.assertEqual(self.server.state, "in_game")
+
+        types = [json.loads(message.decode())["type"] for message in self.received() if isinstance(message, bytes)]
+        self.assertIn("CONNECTION_CONFIRMATION", types)
+        self.assertIn("START_GAME", types)
+
+    def test_snapshots_arrive_decoded(self):
+        self.server.run(1 / 60)
+        self.received()
+        self.server.run(1 / 60)
+
+        snapshots = self.received()
+        self.assertEqual(len(snapshots), 1)
+        snapshot = snapshots[0]
+        self.assertEqual(set(snapshot), {'seq', 'tick', 'ts', 'viewer', 'input_ack', 'tables', 'e', 'c'})
+
+        ship = self.server.server_main_scene.entity_registry.ship_for_owner(LOCAL_ADDRESS)
+        self.assertEqual(snapshot['viewer'], ship.net_id)
+        self.assertIn(ship.net_id, snapshot['tables']['s'])
+        # Nothing kept around for deltas, the local client never needs a baseline
+        self.assertIsNone(self.server.connected_players[LOCAL_ADDRESS]["snapshot_history"].get(snapshot['seq']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import json
+import random
+import time
+import unittest
+from game.server import Server
+from networking.network_layer import NetworkLayer
+from networking.network_simulator import ImpairedLink, LinkConditions, NetworkSimulator, SimulatedSocket
+from networking.snapshot_codec import is_snapshot
+
+
+class TestImpairedLink(unittest.TestCase):
+
+    # python -m unittest tests.test_network_simulator -v
+
+    def run_link(self, conditions, seed=1, count=200, interval=0.01):
+        link = ImpairedLink(conditions, random.Random(seed))
+        delivered = []
+        now = 0.0
+        for i in range(count):
+            link.push(b'%d' % i, 'peer', now)
+            now += interval
+            while (due := link.pop_due(now)) is not None:
+                delivered.append((round(now, 6), int(due[0])))
+        while (due := link.pop_due(now + 10)) is not None:
+            delivered.append((now + 10, int(due[0])))
+        return link, delivered
+
+    def test_same_seed_same_network(self):
+        conditions = LinkConditions(latency=0.05, jitter=0.02, loss=0.1, reorder=0.1, duplicate=0.05)
+        self.assertEqual(self.run_link(conditions)[1], self.run_link(conditions)[1])
+        self.assertNotEqual(self.run_link(conditions)[1], self.run_link(conditions, seed=2)[1])
+
+    def test_loss_comes_in_bursts(self):
+        link, delivered = self.run_link(LinkConditions(burst_chance=0.02, burst_length=8), count=2000)
+        received = {i for _, i in delivered}
+        lost = [i for i in range(2000) if i not in received]
+        self.assertEqual(link.dropped, len(lost))
+        runs = sum(1 for i in lost if i - 1 not in lost)
+        self.assertGreater(len(lost) / runs, 4)
+
+    def test_reordering_and_duplicates(self):
+        link, delivered = self.run_link(LinkConditions(latency=0.02, reorder=0.2, duplicate=0.1))
+        order = [i for _, i in delivered]
+        self.assertNotEqual(order, sorted(order))
+        self.assertEqual(len(order), 200 + link.duplicated)
+        self.assertGreater(link.duplicated, 0)
+
+    def test_bandwidth_cap(self):
+        link = ImpairedLink(LinkConditions(bandwidth=10000, queue_limit=0.45), random.Random(1))
+        for _ in range(10):
+            link.push(bytes(1000), 'peer', 0.0)
+        self.assertEqual(link.dropped, 5)
+        self.assertIsNotNone(link.pop_due(0.1))
+        self.assertIsNone(link.pop_due(0.15))
+        self.assertIsNotNone(link.pop_due(0.2))
+
+    def test_burst_length_must_be_a_datagram_or_more(self):
+        with self.assertRaises(ValueError):
+            LinkConditions(burst_length=0)
+
+    def test_full_send_buffer_counts_as_a_drop(self):
+        class FullSocket:
+            def sendto(self, data, address):
+                raise BlockingIOError
+
+        link = ImpairedLink(LinkConditions(), random.Random(1))
+        simulated = SimulatedSocket(FullSocket(), link, None, lambda: 0.0)
+        simulated.sendto(b'state', 'peer')
+        self.assertEqual(link.dropped, 1)
+        self.assertIsNone(link.pop_due(10))
+
+    def test_city_profiles(self):
+        conditions = LinkConditions.from_profile("Berlin", loss=0.01)
+        self.assertAlmostEqual(conditions.latency, 0.136)
+        self.assertEqual(conditions.loss, 0.01)
+
+
+class TestNetworkSimulator(unittest.TestCase):
+
+    # python -m unittest tests.test_network_simulator -v
+
+    def test_real_server_over_a_lossy_link(self):
+        server_layer = NetworkLayer(bind_socket=True, port=0)
+        server_layer.start()
+        address = ('127.0.0.1', server_layer.socket.getsockname()[1])
+        client_layer = NetworkLayer()
+        client_layer.start()
+        simulator = NetworkSimulator(seed=3, outgoing=LinkConditions(loss=0.3), incoming=LinkConditions(loss=0.3))
+        simulator.wrap(client_layer)
+
+        try:
+            server = Server(server_layer)
+            message = {"type": "CONNECTION_ATTEMPT", "player_name": "bot", "ready": True}
+            client_layer.send_reliable(json.dumps(message).encode(), address)
+
+            snapshots = 0
+            deadline = time.time() + 5
+            while snapshots < 20 and time.time() < deadline:
+                server.run(1 / 60)
+                while (received := client_layer.listen_for_messages()) is not None:
+                    snapshots += is_snapshot(received[0])
+                time.sleep(0.005)
+
+            self.assertEqual(snapshots, 20)
+            self.assertGreater(simulator.incoming.dropped, 0)
+        finally:
+            server_layer.socket.close()
+            client_layer.socket.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from networking.network_stats import NetworkStats, format_rates
+
+
+class TestNetworkStats(unittest.TestCase):
+
+    # python -m unittest tests.test_network_stats -v
+
+    def setUp(self):
+        self.stats = NetworkStats(interval=2)
+        self.address = ('127.0.0.1', 5000)
+
+    def test_rates_over_a_window(self):
+        self.assertFalse(self.stats.roll(0))
+        for _ in range(60):
+            self.stats.sent(self.address, 100)
+        self.stats.received(self.address, 40)
+        peer = self.stats.peer(self.address)
+        peer.record_snapshot(80, 400, 0.001)
+        peer.record_snapshot(120, 400, 0.003)
+        peer.delivered, peer.lost, peer.rtt = 19, 1, 0.05
+
+        self.assertFalse(self.stats.roll(1))
+        self.assertTrue(self.stats.roll(2))
+        rates = self.stats.report()[self.address]
+        self.assertEqual(rates['packets_sent'], 30)
+        self.assertEqual(rates['bytes_sent'], 3000)
+        self.assertEqual(rates['bytes_received'], 20)
+        self.assertEqual(rates['snapshot_size'], 100)
+        self.assertEqual(rates['keyframe_size'], 400)
+        self.assertAlmostEqual(rates['codec_time'], 0.002)
+        self.assertEqual(rates['max_codec_time'], 0.003)
+        self.assertEqual(rates['loss'], 0.05)
+        self.assertIn("rtt 50.0 ms", format_rates(rates))
+
+        # Counters start over, the smoothed rtt carries on
+        self.assertEqual(peer.packets_sent, 0)
+        self.assertEqual(peer.rtt, 0.05)
+
+    def test_disabled(self):
+        stats = NetworkStats(interval=0)
+        stats.sent(self.address, 100)
+        self.assertFalse(stats.roll(0))
+        self.assertFalse(stats.roll(100))
+        self.assertEqual(stats.report(), {})
+
+    def test_silent_peers_are_dropped(self):
+        stray = ('10.0.0.1', 5000)
+        self.stats.roll(0)
+        self.stats.received(stray, 40)
+        self.stats.sent(self.address, 100)
+        self.stats.roll(2)
+        self.assertIn(stray, self.stats.report())
+
+        self.stats.sent(self.address, 100)
+        self.stats.roll(4)
+        self.assertEqual(list(self.stats.report()), [self.address])
+        self.assertEqual(list(self.stats.peers), [self.address])
+
+    def test_forget(self):
+        self.stats.sent(self.address, 100)
+        self.stats.roll(0)
+        self.stats.roll(2)
+        self.stats.forget(self.address)
+        self.assertEqual(self.stats.report(), {})
+        self.assertNotIn(self.address, self.stats.peers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+from networking.input_packet import InputFrame, BUTTON_BITS
+from server_scenes.player_input_buffer import PlayerInputBuffer
+
+W = BUTTON_BITS['w']
+X_PRESSED = BUTTON_BITS['x_pressed']
+
+
+def frame(sequence, buttons=W):
+    return InputFrame(sequence, buttons, 10, 20)
+
+
+class TestPlayerInputBuffer(unittest.TestCase):
+
+    # python -m unittest tests.test_player_input_buffer -v
+
+    def setUp(self):
+        self.buffer = PlayerInputBuffer(min_depth=1, max_depth=4, window=10)
+
+    def test_one_input_per_tick(self):
+        # Two packets in one tick, then none the next
+        self.buffer.add(frame(1))
+        self.buffer.add(frame(2))
+
+        self.assertEqual(self.buffer.next_input().sequence, 1)
+        self.assertEqual(self.buffer.next_input().sequence, 2)
+
+    def test_repeats_stop_after_the_limit(self):
+        buffer = PlayerInputBuffer(min_depth=1, max_depth=4, window=10, repeat_limit=3)
+        buffer.add(frame(1))
+        buffer.next_input()
+
+        held = [buffer.next_input().get('w') for _ in range(5)]
+        self.assertEqual(held, [True, True, True, False, False])
+
+        # Input coming back resets the count
+        buffer.add(frame(2))
+        buffer.add(frame(3))
+        while buffer.next_input().sequence != 3:
+            pass
+        self.assertTrue(buffer.next_input().get('w'))
+
+    def test_repeats_advance_the_view_tick(self):
+        self.buffer.add(InputFrame(1, W, 10, 20, view_tick=50))
+        self.buffer.next_input()
+        self.assertEqual([self.buffer.next_input().view_tick for _ in range(3)], [51, 52, 53])
+
+    def test_trimming_down_to_nothing(self):
+        # With min_depth 0 adapt() can trim the last buffered frame, nothing left to carry presses to
+        buffer = PlayerInputBuffer(min_depth=0, max_depth=4, window=10)
+        buffer.add(frame(1, W | X_PRESSED))
+        buffer.drop_oldest()
+        self.assertEqual(len(buffer.frames), 0)
+        self.assertEqual(buffer.dropped_frames, 1)
+
+    def test_nothing_before_first_input(self):
+        self.assertIsNone(self.buffer.next_input())
+
+    def test_late_input_repeats_held_buttons_only(self):
+        self.buffer.add(frame(1, W | X_PRESSED))
+        self.assertTrue(self.buffer.next_input().get('x_pressed'))
+
+        repeated = self.buffer.next_input()
+        self.assertTrue(repeated.get('w'))
+        self.assertFalse(repeated.get('x_pressed'))
+        self.assertEqual(repeated.get('mouse_world_pos'), (10, 20))
+        self.assertEqual(self.buffer.starved_ticks, 1)
+        self.assertEqual(self.buffer.target_depth, 2)
+
+    def test_refills_to_target_after_running_dry(self):
+        self.buffer.add(frame(1))
+        self.buffer.next_input()
+        self.buffer.next_input()  # Ran dry, target is now 2
+
+        self.buffer.add(frame(2))
+        self.assertEqual(self.buffer.next_input().sequence, 1)  # Still filling, repeat
+        self.buffer.add(frame(3))
+        self.assertEqual(self.buffer.next_input().sequence, 2)
+
+    def test_shrinks_and_keeps_presses_when_steady(self):
+        sequence = 0
+        for _ in range(5):
+            sequence += 1
+            self.buffer.add(frame(sequence, W | X_PRESSED if sequence == 1 else W))
+
+        presses = 0
+        for _ in range(10):
+            sequence += 1
+            self.buffer.add(frame(sequence))
+            presses += bool(self.buffer.next_input().get('x_pressed'))
+
+        self.assertLessEqual(len(self.buffer.frames), 1)
+        self.assertGreater(self.buffer.dropped_frames, 0)
+        self.assertEqual(presses, 1)
+
+    def test_duplicates_are_ignored(self):
+        self.buffer.add(frame(2))
+        self.buffer.add(frame(2))
+        self.buffer.add(frame(1))
+        self.assertEqual(len(self.buffer.frames), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
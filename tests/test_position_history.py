@@ -0,0 +1,51 @@
+import unittest
+from entities.ships.ship import Ship
+from entities.projectiles.bullet import Bullet
+from server_scenes.position_history import PositionHistory
+from shared_util.projectile_logic import check_projectile_collisions
+
+
+class TestPositionHistory(unittest.TestCase):
+
+    # python -m unittest tests.test_position_history -v
+
+    def setUp(self):
+        self.history = PositionHistory(size=5)
+        self.target = Ship(0, 1000, 'target', None)
+        self.target.net_id = 1
+        for tick in range(1, 11):
+            self.target.x = tick * 100
+            self.history.record(tick, [self.target])
+
+    def test_rewinds_to_an_earlier_tick(self):
+        self.assertEqual(self.history.position_at(self.target, 0), (1000, 1000))
+        self.assertEqual(self.history.position_at(self.target, 3), (700, 1000))
+
+    def test_rewind_is_bounded_by_the_window(self):
+        self.assertEqual(self.history.position_at(self.target, 50), (600, 1000))
+
+    def test_new_ship_is_not_rewound_past_its_spawn(self):
+        ship = Ship(5, 5, 'late', None)
+        ship.net_id = 2
+        self.history.record(11, [ship])
+        self.assertEqual(self.history.position_at(ship, 3), (5, 5))
+
+        self.history.forget(ship)
+        self.assertNotIn(2, self.history.positions)
+
+    def test_hit_against_where_the_shooter_saw_the_target(self):
+        # The target has since moved on to x=1000, the shooter saw it at x=700
+        bullet = Bullet(700, 1080, 0, 0, 0, 'shooter', (0, -1))
+        bullet.run()
+        check_projectile_collisions(bullet, [self.target], {}, self.history)
+        self.assertTrue(bullet.alive)
+
+        bullet = Bullet(700, 1080, 0, 0, 0, 'shooter', (0, -1))
+        bullet.rewind_ticks = 3
+        bullet.run()
+        check_projectile_collisions(bullet, [self.target], {}, self.history)
+        self.assertFalse(bullet.alive)
+
+
+if __name__ == '__main__':
+    unittest.main()
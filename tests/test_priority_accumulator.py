@@ -0,0 +1,129 @@
+import unittest
+from entities.ships.ship import Ship
+from entities.projectiles.bullet import Bullet
+from networking.snapshot_codec import *
+from networking.snapshot_history import SnapshotHistory
+from networking.congestion_control import CongestionControl, ReceivedSequences
+from server_scenes.priority_accumulator import PriorityAccumulator
+from game.settings import *
+
+
+class TestPriorityAccumulator(unittest.TestCase):
+
+    # python -m unittest tests.test_priority_accumulator -v
+
+    def setUp(self):
+        self.viewer = Ship(1000, 1000, 'viewer', None)
+        self.viewer.owner_name = "pilot"
+        self.viewer.net_id = 1
+        self.bullets = []
+        for i in range(100):
+            bullet = Bullet(1000 + i * 50, 1000, 0, 0, 0, 'viewer', (1, 0))
+            bullet.net_id = 10 + i
+            self.bullets.append(bullet)
+
+        self.accumulator = PriorityAccumulator()
+        self.encoder = SnapshotEncoder()
+        self.tick = 1
+
+    def tables(self):
+        return build_snapshot_tables([self.viewer], self.bullets, [], self.tick)
+
+    def encode(self, sequence, tables, baseline):
+        return self.encoder.encode(sequence, self.tick, 0.0, tables, [], [], baseline, sequence - 1, 1)
+
+    def test_fits_the_budget_and_catches_up(self):
+        history = SnapshotHistory()
+        client_history = SnapshotHistory()
+        baseline = None
+        sent = []
+
+        for sequence in range(1, 30):
+            tables, limited = self.accumulator.fit(self.tables(), baseline, 500, 1, [], [])
+            data = self.encode(sequence, tables, baseline)
+            self.assertLessEqual(len(data), 500)
+            history.add(sequence, tables)
+
+            # The client ends up with exactly the tables the server kept for the next delta
+            message = decode_snapshot(data, client_history)
+            client_history.add(sequence, message['tables'])
+            self.assertEqual(message['tables'], tables)
+            self.assertIn(1, message['tables']['s'])
+
+            if sequence == 1:
+                first_sent = sorted(tables['p'])
+            baseline = tables
+            sent.append(len(tables['p']))
+            if not limited:
+                break
+
+        self.assertEqual(sent[-1], 100)
+        self.assertGreater(len(sent), 2)
+        # Nearest first
+        self.assertEqual(first_sent, list(range(10, 10 + sent[0])))
+
+    def test_held_back_entities_build_up_priority(self):
+        # Far away bullets eventually beat a nearby one that keeps changing
+        far = self.bullets[-1]
+        self.accumulator.fit(self.tables(), None, 200, 1, [], [])
+        first = self.accumulator.accumulated[far.net_id]
+        self.accumulator.fit(self.tables(), None, 200, 1, [], [])
+        self.assertGreater(self.accumulator.accumulated[far.net_id], first)
+
+    def test_viewer_goes_even_when_events_use_up_the_budget(self):
+        explosions = [(1000, 1000, ORANGE, 150)] * 40
+        tables, limited = self.accumulator.fit(self.tables(), None, 200, 1, explosions, [])
+        self.assertTrue(limited)
+        self.assertIn(1, tables['s'])
+        self.assertEqual(tables['p'], {})
+
+    def test_under_budget_is_untouched(self):
+        tables = self.tables()
+        fitted, limited = self.accumulator.fit(tables, None, 100000, 1, [], [])
+        self.assertIs(fitted, tables)
+        self.assertFalse(limited)
+
+
+class TestCongestionControl(unittest.TestCase):
+
+    # python -m unittest tests.test_priority_accumulator -v
+
+    def test_grows_while_limited_and_halves_on_loss(self):
+        congestion = CongestionControl(bandwidth=20000)
+        now = 0.0
+        for sequence in range(1, 31):
+            congestion.on_sent(sequence, now, limited=True)
+            congestion.on_ack(sequence, 0, now + 0.02)
+            now += 1 / 30
+        self.assertEqual(congestion.bandwidth, 20000 + BANDWIDTH_INCREASE * 1)
+
+        grown = congestion.bandwidth
+        for sequence in range(31, 61):
+            congestion.on_sent(sequence, now, limited=True)
+            if sequence % 4:
+                congestion.on_ack(sequence, 0, now + 0.02)
+            now += 1 / 30
+        self.assertLess(congestion.bandwidth, grown)
+
+    def test_budget_stays_under_the_mtu(self):
+        congestion = CongestionControl(bandwidth=BANDWIDTH_MAX)
+        self.assertEqual(congestion.snapshot_budget(20), SNAPSHOT_MTU)
+        self.assertEqual(CongestionControl(bandwidth=6000).snapshot_budget(30), 200)
+
+    def test_skipped_snapshots_are_not_lost(self):
+        received = ReceivedSequences()
+        for sequence in (1, 2, 4, 5):
+            received.add(sequence)
+        bits = received.bits_before(5)
+        self.assertEqual(bits, 0b1101)
+
+        congestion = CongestionControl()
+        for sequence in range(1, 6):
+            congestion.on_sent(sequence, 0.0)
+        congestion.on_ack(5, bits, 0.05)
+        self.assertEqual(list(congestion.in_flight), [3])
+        self.assertEqual(congestion.delivered, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import random
+import unittest
+from networking.reliable_channel import *
+from networking.network_layer import NetworkLayer
+
+
+class TestReliableChannel(unittest.TestCase):
+
+    # python -m unittest tests.test_reliable_channel -v
+
+    def setUp(self):
+        self.sender = ReliableChannel()
+        self.receiver = ReliableChannel()
+        self.now = 0.0
+
+    def deliver(self, packets):
+        """Hands packets to the receiver and its acks back to the sender, returns what came out"""
+        messages = []
+        for packet in packets:
+            delivered, ack = self.receiver.receive(packet)
+            messages.extend(delivered)
+            self.sender.receive(ack)
+        return messages
+
+    def test_in_order_and_acked(self):
+        packets = [self.sender.send(b'%d' % i, self.now) for i in range(3)]
+        self.assertTrue(all(is_reliable(packet) for packet in packets))
+        self.assertEqual(self.deliver(packets), [b'0', b'1', b'2'])
+        self.assertFalse(self.sender.unacked)
+        self.assertEqual(self.sender.resends(self.now + 10), [])
+
+    def test_reorders_and_drops_duplicates(self):
+        packets = [self.sender.send(b'%d' % i, self.now) for i in range(4)]
+        messages = self.deliver([packets[2], packets[0], packets[2], packets[3]])
+        self.assertEqual(messages, [b'0'])
+        # Selective acks, only the one still missing needs resending
+        self.assertEqual(list(self.sender.unacked), [1])
+        self.assertEqual(self.deliver([packets[1], packets[0]]), [b'1', b'2', b'3'])
+
+    def test_early_packets_received_into_one_buffer(self):
+        packets = [self.sender.send(b'%d' % i, self.now) for i in range(3)]
+        buffer = bytearray(64)
+        view = memoryview(buffer)
+        messages = []
+        for packet in [packets[2], packets[1], packets[0]]:
+            buffer[:len(packet)] = packet
+            messages.extend(self.receiver.receive(view[:len(packet)])[0])
+        self.assertEqual(messages, [b'0', b'1', b'2'])
+
+    def test_resends_with_backoff(self):
+        packet = self.sender.send(b'ready', self.now)
+        self.assertEqual(self.sender.resends(self.now + RELIABLE_RESEND_TIME / 2), [])
+        self.assertEqual(self.sender.resends(self.now + RELIABLE_RESEND_TIME), [packet])
+        # Next one waits twice as long
+        self.assertEqual(self.sender.resends(self.now + RELIABLE_RESEND_TIME * 2), [])
+        self.assertEqual(self.sender.resends(self.now + RELIABLE_RESEND_TIME * 3), [packet])
+
+    def test_lossy_link(self):
+        rng = random.Random(7)
+        sent = [b'message %d' % i for i in range(50)]
+        received = []
+        in_flight = [self.sender.send(message, self.now) for message in sent]
+        while len(received) < len(sent) and self.now < 60:
+            for packet in in_flight:
+                if rng.random() < 0.3:
+                    continue
+                delivered, ack = self.receiver.receive(packet)
+                received.extend(delivered)
+                if rng.random() >= 0.3:
+                    self.sender.receive(ack)
+            self.now += 0.1
+            in_flight = self.sender.resends(self.now)
+        self.assertEqual(received, sent)
+
+
+class TestIdleChannels(unittest.TestCase):
+
+    # python -m unittest tests.test_reliable_channel -v
+
+    def test_server_drops_channels_it_stopped_hearing_from(self):
+        layer = NetworkLayer(bind_socket=True)
+        stray, player = ('10.0.0.1', 5000), ('10.0.0.2', 5000)
+        layer.channel(stray).last_heard = 0.0
+        layer.channel(player).last_heard = RELIABLE_IDLE_TIMEOUT
+
+        layer.drop_idle_channels(RELIABLE_IDLE_TIMEOUT + 1)
+        self.assertEqual(list(layer.channels), [player])
+
+
+if __name__ == '__main__':
+    unittest.main()
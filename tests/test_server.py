@@ -0,0 +1,190 @@
+import json
+import time
+import unittest
+from game.server import Server
+from game.settings import MAX_SNAPSHOT_EVENTS
+from networking.snapshot_codec import is_snapshot, peek_sequence
+from networking.keepalive import KEEPALIVE
+from networking.input_packet import InputHistory
+from networking.network_stats import NetworkStats
+
+
+class LoopbackLayer:
+    """Stands in for NetworkLayer, hands out queued messages and keeps what was sent"""
+
+    def __init__(self):
+        self.incoming = []
+        self.sent = []
+        self.forgotten = []
+        self.stats = NetworkStats()
+
+    def send_to(self, message, address):
+        self.sent.append((message, address))
+
+    def send_reliable(self, message, address):
+        self.sent.append((message, address))
+
+    def forget(self, address):
+        self.forgotten.append(address)
+
+    def is_local(self, address):
+        return False
+
+    def listen_for_messages(self):
+        return self.incoming.pop(0) if self.incoming else None
+
+
+class TestServerSendRate(unittest.TestCase):
+
+    # python -m unittest tests.test_server -v
+
+    def setUp(self):
+        self.layer = LoopbackLayer()
+        self.server = Server(self.layer, tick_rate=60, send_rate=30)
+
+    def connect(self, address, snapshot_rate=None):
+        message = {"type": "CONNECTION_ATTEMPT", "player_name": str(address[1]), "ready": True}
+        if snapshot_rate is not None:
+            message["snapshot_rate"] = snapshot_rate
+        self.layer.incoming.append((json.dumps(message).encode(), address))
+
+    def snapshots_to(self, address):
+        return [message for message, to in self.layer.sent if to == address and is_snapshot(message)]
+
+    def test_rate_is_negotiated_per_client(self):
+        fast, slow, default = ('127.0.0.1', 5001), ('127.0.0.1', 5002), ('127.0.0.1', 5003)
+        self.connect(fast, 120)
+        self.connect(slow, 20)
+        self.connect(default)
+        self.server.run(1 / 60)
+        self.assertEqual(self.server.state, "in_game")
+
+        replies = [json.loads(message.decode()) for message, to in self.layer.sent if not is_snapshot(message)]
+        confirmations = [reply for reply in replies if reply["type"] == "CONNECTION_CONFIRMATION"]
+        self.assertEqual([reply["snapshot_rate"] for reply in confirmations], [30, 20, 30])
+        # Clients play snapshots back on the server's clock, not their own idea of it
+        self.assertEqual({reply["tick_rate"] for reply in confirmations}, {60})
+
+        for _ in range(59):
+            self.server.run(1 / 60)
+
+        self.assertEqual(self.server.server_main_scene.tick, 60)
+        self.assertEqual(len(self.snapshots_to(fast)), 30)
+        self.assertEqual(len(self.snapshots_to(slow)), 20)
+        self.assertEqual(len(self.snapshots_to(default)), 30)
+
+        # Every client sees an unbroken sequence of its own
+        sequences = [peek_sequence(message) for message in self.snapshots_to(slow)]
+        self.assertEqual(sequences, list(range(1, 21)))
+
+    def test_binary_in_the_lobby_is_ignored(self):
+        # An input packet from a client that is still in a game it thinks is running
+        self.layer.incoming.append((b'\xa9\xff\xfe' * 8, ('127.0.0.1', 5009)))
+        self.connect(('127.0.0.1', 5001))
+        self.server.run(1 / 60)
+        self.assertEqual(list(self.server.connected_players), [('127.0.0.1', 5001)])
+
+    def test_events_between_snapshots_are_held(self):
+        address = ('127.0.0.1', 5001)
+        self.connect(address, 20)
+        self.server.run(1 / 60)
+
+        player = self.server.connected_players[address]
+        scene = self.server.server_main_scene
+        while scene.tick % player["send_interval"] != player["send_phase"]:
+            self.server.run(1 / 60)
+
+        scene.explosion_events.append((100, 100, (255, 0, 0), 50))
+        self.server.run(1 / 60)
+        self.assertEqual(len(player["pending_explosions"]), 1)
+
+        for _ in range(player["send_interval"] - 1):
+            self.server.run(1 / 60)
+        self.assertEqual(player["pending_explosions"], [])
+
+    def test_event_bursts_are_spread_over_snapshots(self):
+        address = ('127.0.0.1', 5001)
+        self.connect(address)
+        self.server.run(1 / 60)
+
+        player = self.server.connected_players[address]
+        scene = self.server.server_main_scene
+        while (scene.tick + 1) % player["send_interval"] != player["send_phase"]:
+            self.server.run(1 / 60)
+
+        ship = scene.entity_registry.ship_for_owner(address)
+        scene.explosion_events.extend([(ship.x, ship.y, (255, 0, 0), 50)] * (MAX_SNAPSHOT_EVENTS * 2 + 3))
+        left = []
+        for _ in range(3):
+            for _ in range(player["send_interval"]):
+                self.server.run(1 / 60)
+            left.append(len(player["pending_explosions"]))
+        self.assertEqual(left, [MAX_SNAPSHOT_EVENTS + 3, 3, 0])
+
+    def test_late_and_repeated_inputs_are_counted_apart(self):
+        address = ('127.0.0.1', 5001)
+        self.connect(address)
+        self.server.run(1 / 60)
+
+        history = InputHistory(size=2)
+        packets = [history.encode({}) for _ in range(3)]
+        # Newest first, then a copy of it, then one it overtook
+        self.layer.incoming.extend((packet, address) for packet in (packets[2], packets[2], packets[0]))
+        self.server.run(1 / 60)
+
+        peer = self.layer.stats.peer(address)
+        self.assertEqual(peer.duplicates, 1)
+        self.assertEqual(peer.out_of_order, 1)
+
+
+class TestServerTimeouts(unittest.TestCase):
+
+    # python -m unittest tests.test_server -v
+
+    def setUp(self):
+        self.layer = LoopbackLayer()
+        self.server = Server(self.layer, client_timeout=5)
+        self.quiet = ('127.0.0.1', 5001)
+        self.chatty = ('127.0.0.1', 5002)
+        for address in (self.quiet, self.chatty):
+            message = {"type": "CONNECTION_ATTEMPT", "player_name": str(address[1]), "ready": True}
+            self.layer.incoming.append((json.dumps(message).encode(), address))
+        self.server.run(1 / 60)
+        self.assertEqual(self.server.state, "in_game")
+
+    def age(self, seconds):
+        for player in self.server.connected_players.values():
+            player["last_seen"] -= seconds
+
+    def test_silent_client_is_dropped_and_despawned(self):
+        registry = self.server.server_main_scene.entity_registry
+        ship = registry.ship_for_owner(self.quiet)
+
+        self.age(6)
+        self.layer.incoming.append((KEEPALIVE, self.chatty))
+        sent_before = len(self.layer.sent)
+        self.server.run(1 / 60)
+
+        self.assertEqual(list(self.server.connected_players), [self.chatty])
+        self.assertEqual(self.layer.forgotten, [self.quiet])
+        self.assertIsNone(registry.ship_for_owner(self.quiet))
+        self.assertNotIn(ship, self.server.server_main_scene.all_ships)
+        # No more snapshots for it
+        self.assertTrue(all(address == self.chatty for message, address in self.layer.sent[sent_before:]))
+
+    def test_back_to_the_lobby_when_everyone_left(self):
+        self.age(6)
+        self.server.run(1 / 60)
+        self.assertEqual(self.server.connected_players, {})
+        self.assertEqual(self.server.state, "lobby")
+        self.assertIsNone(self.server.server_main_scene)
+
+    def test_keepalive_counts_as_traffic(self):
+        self.age(4)
+        self.layer.incoming.append((KEEPALIVE, self.quiet))
+        self.server.run(1 / 60)
+        self.assertGreater(self.server.connected_players[self.quiet]["last_seen"], time.time() - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
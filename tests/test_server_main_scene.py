@@ -0,0 +1,34 @@
+import subprocess
+import sys
+import unittest
+from server_scenes.server_main_scene import ServerMainScene
+from networking.input_packet import InputFrame, BUTTON_BITS
+
+
+class TestServerMainScene(unittest.TestCase):
+
+    # python -m unittest tests.test_server_main_scene -v
+
+    def setUp(self):
+        self.address = ('127.0.0.1', 5000)
+        self.scene = ServerMainScene({self.address: {'player_name': "pilot"}})
+
+    def test_fires_without_a_display(self):
+        input_data = InputFrame(1, BUTTON_BITS['mouse_left'], 0, 0)
+        for _ in range(3):
+            game_state = self.scene.step([(self.address, input_data)], 1 / 60)
+
+        self.assertEqual(game_state['tick'], 3)
+        self.assertTrue(game_state['projectiles'])
+
+    def test_simulation_does_not_import_pygame(self):
+        code = ("import sys\n"
+                "from server_scenes.server_main_scene import ServerMainScene\n"
+                "ServerMainScene({('127.0.0.1', 5000): {'player_name': 'pilot'}}).step([], 1 / 60)\n"
+                "sys.exit('pygame' in sys.modules)\n")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from entities.ships.ship import Ship
+from client_scenes.ship_prediction import ShipPrediction
+from shared_util.ship_logic import apply_inputs_to_ship
+
+
+def step(ship, input_data):
+    apply_inputs_to_ship(ship, input_data)
+    ship.run(1 / 60)
+
+
+class TestShipPrediction(unittest.TestCase):
+
+    # python -m unittest tests.test_ship_prediction -v
+
+    def setUp(self):
+        self.prediction = ShipPrediction()
+        self.client_ship = Ship(1000, 1000, 1, None)
+        self.server_ship = Ship(1000, 1000, 1, None)
+        self.inputs = [{'w': True, 'shift': sequence % 3 == 0, 'space': sequence == 8, 'd': sequence > 4}
+                       for sequence in range(1, 13)]
+
+    def predict(self, sequence):
+        input_data = self.inputs[sequence - 1]
+        boost_fuel = self.client_ship.current_boost_fuel
+        apply_inputs_to_ship(self.client_ship, input_data)
+        self.prediction.record(sequence, input_data, boost_fuel, self.client_ship.dampening_active)
+        self.client_ship.run(1 / 60)
+
+    def test_replay_lands_where_the_server_will(self):
+        for sequence in range(1, 13):
+            self.predict(sequence)
+
+        # The server has only seen the first 7, and something pushed the ship meanwhile
+        for input_data in self.inputs[:7]:
+            step(self.server_ship, input_data)
+        self.server_ship.dx += 3
+
+        self.prediction.reconcile(self.client_ship, self.server_ship, 7)
+        self.assertEqual(len(self.prediction.pending), 5)
+
+        for input_data in self.inputs[7:]:
+            step(self.server_ship, input_data)
+        self.assertAlmostEqual(self.client_ship.x, self.server_ship.x)
+        self.assertAlmostEqual(self.client_ship.y, self.server_ship.y)
+        self.assertAlmostEqual(self.client_ship.dx, self.server_ship.dx)
+        self.assertGreater(self.prediction.last_error, 0)
+
+    def test_no_correction_when_prediction_was_right(self):
+        for sequence in range(1, 13):
+            self.predict(sequence)
+            step(self.server_ship, self.inputs[sequence - 1])
+        self.prediction.reconcile(self.client_ship, self.server_ship, 12)
+
+        self.assertEqual(len(self.prediction.pending), 0)
+        self.assertAlmostEqual(self.prediction.last_error, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
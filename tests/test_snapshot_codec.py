@@ -0,0 +1,208 @@
+import unittest
+from entities.ships.ship import Ship
+from entities.projectiles.bullet import Bullet
+from entities.projectiles.rocket import Rocket
+from entities.world_entities.asteroid import Asteroid
+from networking.snapshot_codec import *
+from networking.snapshot_history import SnapshotHistory
+from game.settings import *
+
+
+def tables_to_message(tables, tick):
+    """Plain dict view of decoded tables, easier to assert on than the records"""
+    ships = []
+    for net_id, (x, y, dx, dy, angle, shield, health, ship_type, name) in tables['s'].items():
+        ships.append({
+            'id': net_id,
+            'x': x,
+            'y': y,
+            'dx': dx / VELOCITY_SCALE,
+            'dy': dy / VELOCITY_SCALE,
+            'a': angle / ANGLE_SCALE,
+            's': shield,
+            'h': health,
+            'tp': SHIP_TYPES[ship_type],
+            'n': name,
+        })
+
+    projectiles = []
+    for net_id, (ax, ay, vx, vy, anchor_tick, angle, projectile_type) in tables['p'].items():
+        projectiles.append({
+            'id': net_id,
+            'x': extrapolate(ax, vx, anchor_tick, tick),
+            'y': extrapolate(ay, vy, anchor_tick, tick),
+            'angle': angle / ANGLE_SCALE,
+            'sprite_name': PROJECTILE_TYPES[projectile_type],
+        })
+
+    asteroids = {}
+    for net_id, (ax, ay, vx, vy, anchor_tick, radius) in tables['a'].items():
+        x = extrapolate(ax, vx, anchor_tick, tick)
+        y = extrapolate(ay, vy, anchor_tick, tick)
+        sector = (int(x // SECTOR_SIZE), int(y // SECTOR_SIZE))
+        if sector not in asteroids:
+            asteroids[sector] = []
+        asteroids[sector].append({'id': net_id, 'x': x, 'y': y, 'radius': radius})
+
+    return {'s': ships, 'p': projectiles, 'a': asteroids}
+
+
+class TestSnapshotCodec(unittest.TestCase):
+
+    # python -m unittest tests.test_snapshot_codec -v
+
+    def setUp(self):
+        self.ship = Ship(x=1000.4, y=2000.6, owner=('127.0.0.1', 5000), camera=None)
+        self.ship.owner_name = "pilot"
+        self.ship.dx = 1.5
+        self.ship.dy = -2.25
+        self.ship.facing_angle = 90
+        self.ship.net_id = (3 << 16) | 1  # Generation 3 of slot 1
+        self.rocket = Rocket(10, 20, 0, 0, 45, self.ship.owner, (0, 1))
+        self.rocket.net_id = 2
+        self.bullet = Bullet(100, 100, 2, 0, 0, self.ship.owner, (1, 0))
+        self.bullet.net_id = 3
+        self.asteroid = Asteroid(600, 700, 0.5, 0.25, 80, (WORLD_WIDTH, WORLD_HEIGHT), (1, 1))
+        self.asteroid.net_id = 4
+
+        self.encoder = SnapshotEncoder(initial_size=16)
+        self.history = SnapshotHistory()
+        self.tick = 1
+
+    def tables(self):
+        return build_snapshot_tables([self.ship], [self.rocket, self.bullet], [self.asteroid], self.tick)
+
+    def encode(self, sequence, tables, baseline=None, baseline_sequence=0):
+        return self.encoder.encode(sequence, self.tick, 123.5, tables, [(5, 6, ORANGE, 150)],
+                                   [{'ship_id': self.ship.net_id, 'collision_type': 'asteroid'}],
+                                   baseline, baseline_sequence, self.ship.net_id)
+
+    def receive(self, data):
+        message = decode_snapshot(data, self.history)
+        self.history.add(message['seq'], message['tables'])
+        message.update(tables_to_message(message['tables'], message['tick']))
+        return message
+
+    def test_keyframe_round_trip(self):
+        message = self.receive(self.encode(1, self.tables()))
+
+        self.assertEqual((message['seq'], message['tick'], message['ts']), (1, 1, 123.5))
+        self.assertEqual(message['viewer'], self.ship.net_id)
+
+        ship = message['s'][0]
+        self.assertEqual((ship['x'], ship['y']), (1000, 2001))
+        self.assertEqual((ship['dx'], ship['dy']), (1.5, -2.25))
+        self.assertAlmostEqual(ship['a'], 90, places=1)
+        self.assertEqual(ship['id'], self.ship.net_id)
+        self.assertEqual(ship['n'], "pilot")
+        self.assertEqual(ship['tp'], 'ship')
+
+        rocket = message['p'][0]
+        self.assertEqual((rocket['x'], rocket['y'], rocket['sprite_name']), (10, 20, 'rocket'))
+        self.assertAlmostEqual(rocket['angle'], 45, places=1)
+        self.assertEqual(message['a'], {(1, 1): [{'id': 4, 'x': 600, 'y': 700, 'radius': 80}]})
+        self.assertEqual(message['e'], [(5, 6, ORANGE, 150)])
+        self.assertEqual(message['c'], [{'ship_id': self.ship.net_id, 'collision_type': 'asteroid'}])
+
+    def test_linear_motion_is_not_resent(self):
+        baseline = self.tables()
+        self.receive(self.encode(1, baseline))
+
+        self.bullet.run()
+        baseline = self.tables()
+        self.receive(self.encode(2, baseline))
+
+        for _ in range(50):
+            self.tick += 1
+            self.bullet.run()
+            self.asteroid.float_on()
+        tables = self.tables()
+        self.assertEqual(tables['p'][3], baseline['p'][3])
+        self.assertEqual(tables['a'][4], baseline['a'][4])
+
+        message = self.receive(self.encode(3, tables, baseline, 2))
+        bullet = next(projectile for projectile in message['p'] if projectile['id'] == 3)
+        self.assertAlmostEqual(bullet['x'], self.bullet.x, delta=MOTION_TOLERANCE)
+        asteroid = message['a'][(1, 1)][0]
+        self.assertAlmostEqual(asteroid['x'], self.asteroid.x, delta=MOTION_TOLERANCE)
+        self.assertAlmostEqual(asteroid['y'], self.asteroid.y, delta=MOTION_TOLERANCE)
+
+    def test_delta_only_carries_changes(self):
+        baseline = self.tables()
+        keyframe = self.encode(1, baseline)
+        self.receive(keyframe)
+
+        self.ship.x += 10
+        delta = self.encode(2, self.tables(), baseline, 1)
+        # Header, explosion and collision cost the same in both, compare what the entities take
+        fixed = fixed_size(0, 1, 1)
+        self.assertLess(len(delta) - fixed, (len(keyframe) - fixed) // 2)
+
+        ship = self.receive(delta)['s'][0]
+        self.assertEqual(ship['x'], 1010)
+        self.assertEqual(ship['n'], "pilot")
+
+    def test_removed_entities_are_dropped(self):
+        baseline = self.tables()
+        self.receive(self.encode(1, baseline))
+
+        tables = build_snapshot_tables([self.ship], [], [], self.tick)
+        message = self.receive(self.encode(2, tables, baseline, 1))
+        self.assertEqual(message['p'], [])
+        self.assertEqual(message['a'], {})
+
+    def test_anchor_age_is_relative_to_the_snapshot_tick(self):
+        self.tick = 100000
+        self.bullet.run()
+        baseline = self.tables()
+        keyframe = self.receive(self.encode(1, baseline))
+        self.assertEqual(keyframe['tables']['p'][3][4], 100000)
+
+        # The anchor is old by now, the record keeps its tick but the wire only its age
+        for _ in range(MAX_ANCHOR_AGE):
+            self.tick += 1
+            self.bullet.run()
+        tables = self.tables()
+        self.assertEqual(tables['p'][3][4], 100000)
+        self.assertEqual(self.receive(self.encode(2, tables, baseline, 1))['tables'], tables)
+
+        # One tick too old for a byte, re-anchored
+        self.tick += 1
+        self.bullet.run()
+        self.assertEqual(self.tables()['p'][3][4], self.tick)
+
+    def test_missing_baseline_is_rejected(self):
+        baseline = self.tables()
+        with self.assertRaises(ValueError):
+            decode_snapshot(self.encode(2, baseline, baseline, 1), self.history)
+
+    def test_buffer_is_reused(self):
+        self.encode(1, self.tables())
+        buffer = self.encoder.buffer
+        self.encode(2, self.tables())
+        self.assertIs(self.encoder.buffer, buffer)
+
+    def test_size_estimates_match_the_encoder(self):
+        tables = self.tables()
+        self.assertEqual(keyframe_size(tables, 1, 1), len(self.encode(1, tables)))
+
+        self.ship.x += 10
+        self.ship.owner_name = "renamed"
+        changed = self.tables()
+        entries = sum(entry_size(layout, record, tables[key].get(net_id))
+                      for key, layout in TABLE_LAYOUTS for net_id, record in changed[key].items())
+        self.assertEqual(fixed_size(0, 1, 1) + entries, len(self.encode(2, changed, tables, 1)))
+
+    def test_ack_round_trip(self):
+        ack = encode_snapshot_ack(42, 0b101)
+        self.assertTrue(is_snapshot_ack(ack))
+        self.assertFalse(is_snapshot(ack))
+        self.assertEqual(decode_snapshot_ack(ack), (42, 0b101))
+
+    def test_rejects_other_messages(self):
+        with self.assertRaises(ValueError):
+            decode_snapshot(b'{"type": "START_GAME"}' * 4, self.history)
+
+
+if __name__ == '__main__':
+    unittest.main()